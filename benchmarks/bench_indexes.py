@@ -0,0 +1,94 @@
+"""
+Query plans of title lookups before and after migrations/001_title_indexes.sql.
+
+Seeds a synthetic library (100k titles by default) if the database holds a different number of titles,
+then runs EXPLAIN ANALYZE for every lookup without the indexes and with them.
+
+Usage:
+    python -m benchmarks.bench_indexes --database moviedb_bench --host localhost --count 100000
+"""
+import argparse
+import re
+from pathlib import Path
+
+import psycopg2
+
+from benchmarks.seed import seed_library, library_size
+from src.dbmanager import DbManager
+
+MIGRATION = Path(__file__).parent.parent / "docker" / "migrations" / "001_title_indexes.sql"
+
+# Lookup name -> (query, parameters)
+QUERIES = {
+    "substring search": ("SELECT imdbid FROM titles WHERE title ILIKE %s", ("%heist empire%",)),
+    "exact title": ("SELECT imdbid FROM titles WHERE LOWER(title) = LOWER(%s)", ("Dark Night 4242",)),
+    "rating filter": ("SELECT imdbid FROM titles WHERE my_rating >= %s", (10,)),
+    "titles of person": (
+        """SELECT t.imdbid FROM titles t JOIN title_roles tr ON t.title_id = tr.title_id
+           JOIN people p ON tr.person_id = p.person_id WHERE p.name = %s""", ("Laura Dubois 0",)),
+    "titles of genre": (
+        """SELECT COUNT(*) FROM title_genres tg JOIN genres g ON tg.genre_id = g.genre_id
+           WHERE g.name = %s""", ("Western",)),
+}
+
+
+def index_names() -> list[str]:
+    # Index names created by the migration
+    return re.findall(r"CREATE INDEX IF NOT EXISTS (\w+)", MIGRATION.read_text())
+
+
+def explain(cur, query: str, params: tuple) -> tuple[str, float]:
+    cur.execute("EXPLAIN (ANALYZE, BUFFERS) " + query, params)
+    plan = "\n".join(row[0] for row in cur.fetchall())
+    execution_ms = float(re.search(r"Execution Time: ([\d.]+) ms", plan).group(1))
+    return plan, execution_ms
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database", default="moviedb_bench")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", default="5432")
+    parser.add_argument("--user", default="admin")
+    parser.add_argument("--password", default="admin")
+    parser.add_argument("--count", type=int, default=100_000, help="number of synthetic titles")
+    parser.add_argument("--verbose", action="store_true", help="print full query plans")
+    args = parser.parse_args()
+
+    dbm = DbManager(database=args.database, host=args.host, port=args.port, user=args.user, password=args.password)
+    if library_size(dbm) != args.count:
+        print(f"Seeding {args.count} titles...")
+        seed_library(dbm, args.count)
+
+    conn = psycopg2.connect(**dbm.dsn)
+    conn.autocommit = True
+    results = {}
+    try:
+        with conn.cursor() as cur:
+            for phase in ("before", "after"):
+                if phase == "before":
+                    for name in index_names():
+                        cur.execute(f"DROP INDEX IF EXISTS {name}")
+                else:
+                    cur.execute(MIGRATION.read_text())
+                cur.execute("ANALYZE")
+
+                print(f"\n{'=' * 30} {phase.upper()} {'=' * 30}")
+                for name, (query, params) in QUERIES.items():
+                    plan, execution_ms = explain(cur, query, params)
+                    results.setdefault(name, {})[phase] = execution_ms
+                    print(f"\n--- {name}: {execution_ms:.2f} ms")
+                    print(plan if args.verbose else plan.splitlines()[0])
+    finally:
+        conn.close()
+        dbm.close()
+
+    # Summary
+    print(f"\n{'query':<20} {'before, ms':>12} {'after, ms':>12} {'speedup':>10}")
+    for name, times in results.items():
+        speedup = times["before"] / times["after"] if times["after"] else float("inf")
+        print(f"{name:<20} {times['before']:>12.2f} {times['after']:>12.2f} {speedup:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
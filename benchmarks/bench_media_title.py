@@ -0,0 +1,82 @@
+"""
+Memory used by a library of MediaTitle objects: current compact MediaTitle vs the previous plain class.
+
+Titles are built from title dicts the way DbManager returns them (every row has its own string objects).
+
+Usage:
+    python -m benchmarks.bench_media_title --count 100000
+"""
+import argparse
+import gc
+import tracemalloc
+
+from benchmarks.seed import synthetic_titles
+from src.media_title import MediaTitle
+
+
+class LegacyMediaTitle:
+    """ Previous MediaTitle layout: per-instance __dict__, fresh strings in every list. """
+    def __init__(self, title, year, director, writers, poster, genre, runtime, actors, plot, awards, country, imdbid,
+                 imdb_rating, title_type, my_rating=None):
+        self.title = title
+        self.year = year
+        self.director = director.split(", ")
+        self.writers = writers.split(", ")
+        self.poster = poster
+        self.genre = genre.split(", ")
+        self.runtime = runtime
+        self.actors = actors.split(", ")
+        self.plot = plot
+        self.awards = awards
+        self.country = country.split(", ")
+        self.imdbid = imdbid
+        self.imdb_rating = imdb_rating
+        self.title_type = title_type
+        self.my_rating = my_rating or 0
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        return cls(data["Title"], data["Year"], data["Director"], data["Writer"], data["Poster"], data["Genre"],
+                   data["Runtime"], data["Actors"], data["Plot"], data["Awards"], data["Country"], data["imdbID"],
+                   data["imdbRating"], data["Type"], data["MyRating"])
+
+
+def title_rows(count: int):
+    # Fresh dict with fresh strings for every title, like rows coming from Db
+    for media in synthetic_titles(count):
+        yield {
+            "Title": "".join(media.title), "Year": "".join(media.year), "Director": ", ".join(media.director),
+            "Writer": ", ".join(media.writers), "Poster": "".join(media.poster), "Genre": ", ".join(media.genre),
+            "Runtime": "".join(media.runtime), "Actors": ", ".join(media.actors), "Plot": "".join(media.plot),
+            "Awards": "".join(media.awards), "Country": ", ".join(media.country), "imdbID": "".join(media.imdbid),
+            "imdbRating": "".join(media.imdb_rating), "Type": "".join(media.title_type), "MyRating": media.my_rating,
+        }
+
+
+def measure(cls, count: int) -> int:
+    # Peak bytes held by 'count' objects of cls (source rows are dropped right after use)
+    gc.collect()
+    tracemalloc.start()
+    library = [cls.from_dict(row) for row in title_rows(count)]
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del library
+    return current
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=100_000, help="number of titles")
+    args = parser.parse_args()
+
+    legacy = measure(LegacyMediaTitle, args.count)
+    compact = measure(MediaTitle, args.count)
+
+    print(f"{'layout':<10} {'total, MB':>10} {'per title, B':>14}")
+    for name, size in (("before", legacy), ("after", compact)):
+        print(f"{name:<10} {size / 2 ** 20:>10.1f} {size / args.count:>14.0f}")
+    print(f"saved {(1 - compact / legacy) * 100:.0f}%")
+
+
+if __name__ == "__main__":
+    main()
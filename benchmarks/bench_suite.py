@@ -0,0 +1,210 @@
+"""
+Benchmark suite for hot paths of DbManager, Exporter and OMDbClient.
+
+For every library size the database is seeded with synthetic titles (see benchmarks/seed.py), then every benchmark
+is run 'samples' times. Reported per benchmark: ops/sec, p50 and p99 latency and peak Python memory of one
+extra traced run. OMDbClient is timed against the local OMDb stub server (tests/omdb_stub.py), without cache.
+
+Results can be saved as baselines and compared with them on later runs (regressions are marked with '!').
+
+Usage:
+    python -m benchmarks.bench_suite --database moviedb_bench --sizes 1000,10000,100000 --save-baseline
+    python -m benchmarks.bench_suite --sizes 1000 --only db --fail-on-regression
+"""
+import argparse
+import json
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import ExitStack
+from itertools import islice
+from pathlib import Path
+from typing import Callable
+
+import psycopg2
+
+from benchmarks.seed import WORDS, seed_library, library_size, synthetic_titles
+from src.dbmanager import DbManager
+from src.exporter import Exporter
+from src.omdb_client import OMDbClient
+from tests.omdb_stub import OMDbStubServer, make_titles
+
+BASELINES = Path(__file__).parent / "baselines.json"
+MOVIE = Path(__file__).parent.parent / "tests" / "test_unit" / "test_movie.json"
+GROUPS = ("db", "export", "omdb")
+
+
+class Benchmark:
+    """ One timed operation. 'func' gets the sample number; 'samples' is adjusted to library size by the suite. """
+    def __init__(self, name: str, group: str, func: Callable[[int], object], samples: int):
+        self.name = name
+        self.group = group
+        self.func = func
+        self.samples = samples
+
+    def run(self) -> dict:
+        # Warm-up, timed samples, then one traced sample for peak memory (tracing slows the code down).
+        # Every call gets its own sample number, so operations like inserts never repeat
+        self.func(self.samples + 1)
+        latencies = []
+        for i in range(self.samples):
+            start = time.perf_counter()
+            self.func(i)
+            latencies.append(time.perf_counter() - start)
+
+        tracemalloc.start()
+        self.func(self.samples)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        return {
+            "samples": self.samples,
+            "ops": self.samples / sum(latencies),
+            "p50_ms": statistics.median(latencies) * 1000,
+            "p99_ms": percentile(latencies, 99) * 1000,
+            "peak_kb": peak / 1024,
+        }
+
+
+def percentile(values: list[float], pct: float) -> float:
+    # Nearest-rank percentile
+    ordered = sorted(values)
+    return ordered[max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))]
+
+
+def db_benchmarks(dbm: DbManager, size: int) -> list[Benchmark]:
+    rnd = random.Random(size)
+    # Titles added by 'add_title' get imdbIDs after the seeded library and are removed afterwards
+    new_titles = list(islice(synthetic_titles(size + 1000, seed=size + 1), size, None))
+    imdbids = [f"tt{10_000_000 + rnd.randrange(size)}" for _ in range(1000)]
+    # Full reads of the whole library are slow on big libraries - fewer samples
+    full_samples = max(3, min(50, 50_000 // size))
+
+    return [
+        Benchmark("add_title", "db", lambda i: dbm.add_title(new_titles[i], new_titles[i].my_rating), 50),
+        Benchmark("get_title_by_imdbid", "db", lambda i: dbm.get_title_by_imdbid(imdbids[i % 1000]), 200),
+        Benchmark("get_all_titles", "db", lambda i: dbm.get_all_titles(), full_samples),
+        Benchmark("get_all_titles summary", "db", lambda i: dbm.get_all_titles(summary=True), full_samples),
+        Benchmark("search_titles_by_name", "db",
+                  lambda i: dbm.search_titles_by_name(f"{WORDS[i % len(WORDS)]} {WORDS[i * 7 % len(WORDS)]}"), 100),
+        Benchmark("get_titles_by_rating", "db", lambda i: dbm.get_titles_by_rating("10"), full_samples),
+    ]
+
+
+def export_benchmarks(directory: str) -> list[Benchmark]:
+    titles = list(synthetic_titles(200))
+    return [
+        Benchmark("Exporter.to_json", "export",
+                  lambda i: Exporter(titles[i % 200], f"{directory}/{i % 200}.json").to_json(), 200),
+        Benchmark("Exporter.to_yaml", "export",
+                  lambda i: Exporter(titles[i % 200], f"{directory}/{i % 200}.yaml").to_yaml(), 200),
+    ]
+
+
+def omdb_benchmarks(stub: OMDbStubServer) -> list[Benchmark]:
+    client = OMDbClient(api_key=stub.api_key, base_url=stub.url, retries=0)
+    imdbids = [t["imdbID"] for t in stub.titles]
+    return [
+        Benchmark("OMDbClient.get_title_by_imdbid", "omdb",
+                  lambda i: client.get_title_by_imdbid(imdbids[i % len(imdbids)]), 200),
+        Benchmark("OMDbClient.search_title", "omdb", lambda i: client.search_title("inception", page=i % 5 + 1), 200),
+        Benchmark("OMDbClient.get_titles_by_imdbids x50", "omdb",
+                  lambda i: client.get_titles_by_imdbids(imdbids[i % 4 * 50:(i % 4 + 1) * 50]), 20),
+    ]
+
+
+def remove_titles(dbm: DbManager, size: int) -> None:
+    # Drop titles added by 'add_title' benchmark (see db_benchmarks) with their links
+    imdbids = [f"tt{10_000_000 + i}" for i in range(size, size + 1000)]
+    with psycopg2.connect(**dbm.dsn) as conn, conn.cursor() as cur:
+        cur.execute("SELECT title_id FROM titles WHERE imdbid = ANY(%s)", (imdbids,))
+        ids = [row[0] for row in cur.fetchall()]
+        for table in ("title_roles", "title_genres", "title_countries", "titles"):
+            cur.execute(f"DELETE FROM {table} WHERE title_id = ANY(%s)", (ids,))
+    conn.close()
+
+
+def compare(results: dict, baselines: dict, tolerance: float) -> list[str]:
+    """ Print results next to baselines; returns names of benchmarks slower than baseline p50 by over 'tolerance'. """
+    regressions = []
+    print(f"\n{'size':>7} {'benchmark':<36} {'ops/s':>10} {'p50, ms':>9} {'p99, ms':>9} {'peak, KB':>10} {'vs base':>9}")
+    for size, benchmarks in results.items():
+        for name, result in benchmarks.items():
+            base = baselines.get(size, {}).get(name)
+            delta = ""
+            if base:
+                change = result["p50_ms"] / base["p50_ms"] - 1 if base["p50_ms"] else 0.0
+                slow = change > tolerance
+                delta = f"{change * 100:+.0f}%{'!' if slow else ''}"
+                if slow:
+                    regressions.append(f"{name} ({size})")
+            print(f"{size:>7} {name:<36} {result['ops']:>10.1f} {result['p50_ms']:>9.3f} {result['p99_ms']:>9.3f} "
+                  f"{result['peak_kb']:>10.1f} {delta:>9}")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database", default="moviedb_bench")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", default="5432")
+    parser.add_argument("--user", default="admin")
+    parser.add_argument("--password", default="admin")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="comma-separated library sizes")
+    parser.add_argument("--only", choices=GROUPS, action="append", help="run only these groups (repeatable)")
+    parser.add_argument("--baseline", default=str(BASELINES), help="baselines file")
+    parser.add_argument("--save-baseline", action="store_true", help="store results as new baselines")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed p50 slowdown (0.25 = 25%%)")
+    parser.add_argument("--fail-on-regression", action="store_true", help="exit with 1 if anything got slower")
+    args = parser.parse_args()
+    groups = args.only or GROUPS
+    sizes = [int(size) for size in args.sizes.split(",")]
+
+    results: dict[str, dict] = {}
+    # Db benchmarks depend on library size, the others run once (reported under size "-")
+    if "db" in groups:
+        dbm = DbManager(database=args.database, host=args.host, port=args.port, user=args.user,
+                        password=args.password, cache_size=0)
+        try:
+            for size in sizes:
+                if library_size(dbm) != size:
+                    print(f"Seeding {size} titles...")
+                    seed_library(dbm, size)
+                try:
+                    for benchmark in db_benchmarks(dbm, size):
+                        print(f"{size}: {benchmark.name}...")
+                        results.setdefault(str(size), {})[benchmark.name] = benchmark.run()
+                finally:
+                    remove_titles(dbm, size)
+        finally:
+            dbm.close()
+
+    with tempfile.TemporaryDirectory() as directory, ExitStack() as stack:
+        benchmarks = export_benchmarks(directory) if "export" in groups else []
+        if "omdb" in groups:
+            base = json.loads(MOVIE.read_text(encoding="utf-8"))
+            benchmarks += omdb_benchmarks(stack.enter_context(OMDbStubServer(make_titles(200, base))))
+        for benchmark in benchmarks:
+            print(f"{benchmark.name}...")
+            results.setdefault("-", {})[benchmark.name] = benchmark.run()
+
+    path = Path(args.baseline)
+    baselines = json.loads(path.read_text(encoding="utf-8")) if path.exists() else {}
+    regressions = compare(results, baselines, args.tolerance)
+
+    if args.save_baseline:
+        for size, benchmarks in results.items():
+            baselines.setdefault(size, {}).update(benchmarks)
+        path.write_text(json.dumps(baselines, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+        print(f"\nBaselines saved to {path}")
+    if regressions:
+        print(f"\nSlower than baseline: {', '.join(regressions)}")
+        if args.fail_on_regression:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
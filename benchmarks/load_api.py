@@ -0,0 +1,135 @@
+"""
+Load test for the HTTP read API (src/api_server.py).
+
+Opens 'concurrency' keep-alive connections and sends a mix of requests for 'duration' seconds:
+lookups by imdbID (half of them revalidated with If-None-Match), title pages, search pages and rating filters.
+Reports requests/sec, p50/p95/p99 latency and counts of status codes.
+
+Usage:
+    python -m src.api_server --port 8080 &
+    python -m benchmarks.load_api --url http://localhost:8080 --concurrency 300 --duration 20
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+from collections import Counter
+from urllib.parse import urlsplit, quote
+
+from benchmarks.seed import WORDS
+
+
+class Connection:
+    """ Minimal keep-alive HTTP/1.1 client connection (Content-Length answers only). """
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.reader: asyncio.StreamReader | None = None
+        self.writer: asyncio.StreamWriter | None = None
+
+    async def get(self, target: str, headers: dict | None = None) -> tuple[int, dict, bytes]:
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        lines = [f"GET {target} HTTP/1.1", f"Host: {self.host}"] + [f"{k}: {v}" for k, v in (headers or {}).items()]
+        self.writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+        head = (await self.reader.readuntil(b"\r\n\r\n")).decode("latin-1").split("\r\n")
+        status = int(head[0].split(" ")[1])
+        answer_headers = {k.lower(): v.strip() for k, v in (line.split(":", 1) for line in head[1:] if ":" in line)}
+        body = await self.reader.readexactly(int(answer_headers.get("content-length", 0)))
+        if answer_headers.get("connection") == "close":
+            self.close()
+        return status, answer_headers, body
+
+    def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+
+async def collect_imdbids(host: str, port: int, count: int) -> list[str]:
+    # imdbIDs of the first 'count' titles, read page by page
+    connection, imdbids, target = Connection(host, port), [], "/titles?limit=100"
+    try:
+        while target and len(imdbids) < count:
+            status, _, body = await connection.get(target)
+            if status != 200:
+                raise RuntimeError(f"{target} answered {status}")
+            page = json.loads(body)
+            imdbids += [title["imdbID"] for title in page["titles"]]
+            target = page["next"]
+    finally:
+        connection.close()
+    return imdbids[:count]
+
+
+async def worker(host: str, port: int, imdbids: list[str], deadline: float, latencies: list, statuses: Counter,
+                 rnd: random.Random) -> None:
+    connection, etags = Connection(host, port), {}
+    try:
+        while time.perf_counter() < deadline:
+            kind = rnd.random()
+            headers = None
+            if kind < 0.6:
+                imdbid = rnd.choice(imdbids)
+                target = f"/titles/{imdbid}"
+                if imdbid in etags and rnd.random() < 0.5:
+                    headers = {"If-None-Match": etags[imdbid]}
+            elif kind < 0.8:
+                target = "/titles?limit=20"
+            elif kind < 0.9:
+                target = f"/titles?q={quote(rnd.choice(WORDS))}&limit=20"
+            else:
+                target = f"/titles?min_rating={rnd.randint(5, 10)}&limit=20"
+
+            start = time.perf_counter()
+            try:
+                status, answer_headers, _ = await connection.get(target, headers)
+            except (ConnectionError, asyncio.IncompleteReadError) as e:
+                statuses[type(e).__name__] += 1
+                connection.close()
+                continue
+            latencies.append(time.perf_counter() - start)
+            statuses[status] += 1
+            if target.startswith("/titles/") and status == 200:
+                etags[target[len("/titles/"):]] = answer_headers["etag"]
+    finally:
+        connection.close()
+
+
+async def run(url: str, concurrency: int, duration: float, seed: int) -> None:
+    address = urlsplit(url)
+    host, port = address.hostname, address.port or 80
+    imdbids = await collect_imdbids(host, port, 1000)
+    if not imdbids:
+        raise RuntimeError("Library is empty - seed it first (see benchmarks/seed.py)")
+
+    latencies, statuses = [], Counter()
+    deadline = time.perf_counter() + duration
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(host, port, imdbids, deadline, latencies, statuses, random.Random(seed + i))
+                           for i in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    pct = lambda p: latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))] * 1000
+    print(f"{len(latencies)} requests in {elapsed:.1f}s with {concurrency} connections: "
+          f"{len(latencies) / elapsed:.0f} req/s")
+    print(f"latency p50 {pct(50):.1f} ms, p95 {pct(95):.1f} ms, p99 {pct(99):.1f} ms, "
+          f"mean {statistics.fmean(latencies) * 1000:.1f} ms")
+    print("statuses: " + ", ".join(f"{status}: {n}" for status, n in sorted(statuses.items(), key=str)))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8080")
+    parser.add_argument("--concurrency", type=int, default=200, help="parallel keep-alive connections")
+    parser.add_argument("--duration", type=float, default=10, help="seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    asyncio.run(run(args.url, args.concurrency, args.duration, args.seed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import random
+from typing import Iterator
+
+import psycopg2
+
+from src.dbmanager import DbManager
+from src.media_title import MediaTitle
+
+GENRES = ["Action", "Adventure", "Animation", "Biography", "Comedy", "Crime", "Documentary", "Drama", "Family",
+          "Fantasy", "History", "Horror", "Music", "Mystery", "Romance", "Sci-Fi", "Sport", "Thriller", "War",
+          "Western"]
+COUNTRIES = ["United States", "United Kingdom", "France", "Germany", "Italy", "Spain", "Japan", "South Korea",
+             "India", "Canada", "Australia", "Sweden", "Denmark", "Mexico", "Brazil"]
+WORDS = ["Dark", "Night", "Last", "Silent", "Lost", "City", "Dream", "Blood", "Star", "River", "Fire", "Ghost",
+         "King", "Road", "Winter", "Shadow", "Secret", "Golden", "Broken", "Wild", "Heist", "Empire", "Storm"]
+FIRST_NAMES = ["John", "Mary", "James", "Anna", "Robert", "Laura", "Michael", "Emma", "David", "Sofia", "Pierre",
+               "Yuki", "Carlos", "Ingrid", "Raj", "Olga", "Tom", "Chloe", "Kenji", "Elena"]
+LAST_NAMES = ["Smith", "Nolan", "Dubois", "Tanaka", "Garcia", "Rossi", "Muller", "Kim", "Singh", "Larsen",
+              "Brown", "Ivanova", "Lopez", "Moreau", "Sato", "Novak", "Keller", "Costa", "Walsh", "Berg"]
+
+
+def synthetic_titles(count: int, seed: int = 0) -> Iterator[MediaTitle]:
+    """
+    Yield 'count' synthetic movies with realistic cast sizes (3-4 actors, 1-3 writers, 1-2 directors).
+    People are drawn from a pool of about 'count' names, so most of them appear in several titles.
+    """
+    rnd = random.Random(seed)
+    people_pool = max(100, count)
+
+    def person() -> str:
+        n = rnd.randrange(people_pool)
+        return f"{FIRST_NAMES[n % 20]} {LAST_NAMES[n // 20 % 20]} {n // 400}"
+
+    for i in range(count):
+        yield MediaTitle.from_dict({
+            "Title": f"{rnd.choice(WORDS)} {rnd.choice(WORDS)} {i}",
+            "Year": str(rnd.randint(1950, 2025)),
+            "Director": ", ".join({person() for _ in range(rnd.choice((1, 1, 1, 2)))}),
+            "Writer": ", ".join({person() for _ in range(rnd.randint(1, 3))}),
+            "Actors": ", ".join({person() for _ in range(rnd.randint(3, 4))}),
+            "Genre": ", ".join(rnd.sample(GENRES, rnd.randint(1, 3))),
+            "Country": ", ".join(rnd.sample(COUNTRIES, rnd.choice((1, 1, 2)))),
+            "Poster": f"https://example.com/posters/{i}.jpg",
+            "Runtime": f"{rnd.randint(80, 180)} min",
+            "Plot": f"A {rnd.choice(WORDS).lower()} story about a {rnd.choice(WORDS).lower()} "
+                    f"{rnd.choice(WORDS).lower()} and the people around it.",
+            "Awards": rnd.choice(["N/A", "1 win", "3 wins & 5 nominations", "Won 1 Oscar. 12 wins total"]),
+            "imdbRating": f"{rnd.uniform(1, 10):.1f}",
+            "imdbID": f"tt{10_000_000 + i}",
+            "Type": "movie",
+            "MyRating": rnd.randint(0, 10),
+        })
+
+
+def seed_library(dbm: DbManager, count: int, batch_size: int = 1000) -> None:
+    """ Replace library in Db with 'count' synthetic titles. """
+    with psycopg2.connect(**dbm.dsn) as conn, conn.cursor() as cur:
+        cur.execute("TRUNCATE TABLE titles, people, genres, countries RESTART IDENTITY CASCADE")
+    conn.close()
+    dbm.add_titles(synthetic_titles(count), batch_size=batch_size)
+    with psycopg2.connect(**dbm.dsn) as conn:
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            cur.execute("ANALYZE")
+    conn.close()
+
+
+def library_size(dbm: DbManager) -> int:
+    with psycopg2.connect(**dbm.dsn) as conn, conn.cursor() as cur:
+        cur.execute("SELECT COUNT(*) FROM titles")
+        size = cur.fetchone()[0]
+    conn.close()
+    return size
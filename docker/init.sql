@@ -82,5 +82,122 @@ CREATE TABLE title_countries (
     PRIMARY KEY (title_id, country_id)
 );
 
+-- TITLE_DOCUMENTS (same as migrations/003_title_documents.sql)
+-- Denormalized read model: one row per title with names of genres, countries and people as sorted arrays.
+-- Rows are refreshed by refresh_title_documents() in the same transaction as writes to 'titles'.
+CREATE TABLE title_documents (
+    title_id INT PRIMARY KEY REFERENCES titles(title_id) ON DELETE CASCADE,
+    imdbid VARCHAR(15) UNIQUE NOT NULL,
+    title VARCHAR(150) NOT NULL,
+    year INT NOT NULL,
+    runtime TEXT,
+    poster TEXT,
+    plot TEXT,
+    awards TEXT,
+    imdb_rating NUMERIC(3,1) NOT NULL,
+    type VARCHAR(50) NOT NULL,
+    my_rating INT,
+    genres TEXT[] NOT NULL,
+    countries TEXT[] NOT NULL,
+    directors TEXT[] NOT NULL,
+    actors TEXT[] NOT NULL,
+    writers TEXT[] NOT NULL -- writers of movies / creators of series
+);
+
+-- Rebuild documents of the given titles (each list is read with its own subquery - no cartesian joins)
+CREATE OR REPLACE FUNCTION refresh_title_documents(ids INT[]) RETURNS VOID AS $$
+    INSERT INTO title_documents (title_id, imdbid, title, year, runtime, poster, plot, awards, imdb_rating, type,
+                                 my_rating, genres, countries, directors, actors, writers)
+    SELECT t.title_id, t.imdbid, t.title, t.year, t.runtime, t.poster, t.plot, t.awards, t.imdb_rating, ty.name,
+        t.my_rating,
+        ARRAY(SELECT g.name FROM title_genres tg JOIN genres g ON g.genre_id = tg.genre_id
+              WHERE tg.title_id = t.title_id ORDER BY g.name),
+        ARRAY(SELECT c.name FROM title_countries tc JOIN countries c ON c.country_id = tc.country_id
+              WHERE tc.title_id = t.title_id ORDER BY c.name),
+        ARRAY(SELECT DISTINCT p.name FROM title_roles tr JOIN people p ON p.person_id = tr.person_id
+              WHERE tr.title_id = t.title_id AND tr.role = 'director' ORDER BY p.name),
+        ARRAY(SELECT DISTINCT p.name FROM title_roles tr JOIN people p ON p.person_id = tr.person_id
+              WHERE tr.title_id = t.title_id AND tr.role = 'actor' ORDER BY p.name),
+        ARRAY(SELECT DISTINCT p.name FROM title_roles tr JOIN people p ON p.person_id = tr.person_id
+              WHERE tr.title_id = t.title_id AND tr.role IN ('writer', 'creator') ORDER BY p.name)
+    FROM titles t
+        JOIN types ty ON ty.type_id = t.type_id
+    WHERE t.title_id = ANY(ids)
+    ON CONFLICT (title_id) DO UPDATE SET
+        imdbid = EXCLUDED.imdbid, title = EXCLUDED.title, year = EXCLUDED.year, runtime = EXCLUDED.runtime,
+        poster = EXCLUDED.poster, plot = EXCLUDED.plot, awards = EXCLUDED.awards,
+        imdb_rating = EXCLUDED.imdb_rating, type = EXCLUDED.type, my_rating = EXCLUDED.my_rating,
+        genres = EXCLUDED.genres, countries = EXCLUDED.countries, directors = EXCLUDED.directors,
+        actors = EXCLUDED.actors, writers = EXCLUDED.writers;
+$$ LANGUAGE sql;
+CREATE INDEX title_documents_lower_title_idx ON title_documents (LOWER(title));
+CREATE INDEX title_documents_my_rating_idx ON title_documents (my_rating);
+
+-- FULL-TEXT SEARCH (same as migrations/004_full_text_search.sql)
+ALTER TABLE title_documents ADD COLUMN search_vector TSVECTOR;
+
+-- Weights: title A, people (directors, actors, writers) B, plot C, awards D
+CREATE OR REPLACE FUNCTION title_documents_search_vector() RETURNS TRIGGER AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('english', NEW.title), 'A') ||
+        setweight(to_tsvector('english', ARRAY_TO_STRING(NEW.directors || NEW.actors || NEW.writers, ' ')), 'B') ||
+        setweight(to_tsvector('english', COALESCE(NEW.plot, '')), 'C') ||
+        setweight(to_tsvector('english', COALESCE(NEW.awards, '')), 'D');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+-- Rating updates don't touch the searched columns and don't rebuild the vector
+CREATE TRIGGER title_documents_search_vector_trg
+    BEFORE INSERT OR UPDATE OF title, plot, awards, directors, actors, writers ON title_documents
+    FOR EACH ROW EXECUTE FUNCTION title_documents_search_vector();
+
+CREATE INDEX title_documents_search_idx ON title_documents USING GIN (search_vector);
+
+-- TITLE_SYNC (same as migrations/005_title_sync.sql)
+-- Last time OMDb data of a title was fetched. Titles without a row were never synced (stalest of all).
+-- Failed fetches count in 'failures' (reset by the next success) and hold the title back from stale reads
+-- for a backoff time after 'attempted_at', so titles OMDb can't answer don't use up every run's quota
+CREATE TABLE title_sync (
+    title_id INT PRIMARY KEY REFERENCES titles(title_id) ON DELETE CASCADE,
+    synced_at TIMESTAMPTZ,
+    attempted_at TIMESTAMPTZ NOT NULL,
+    failures INT NOT NULL DEFAULT 0
+);
+CREATE INDEX title_sync_synced_at_idx ON title_sync (synced_at);
+
+-- INDEXES (same as migrations/001_title_indexes.sql; trigram indexes are created after COMMIT)
+CREATE INDEX titles_lower_title_idx ON titles (LOWER(title));
+CREATE INDEX titles_my_rating_idx ON titles (my_rating);
+CREATE INDEX title_roles_person_id_idx ON title_roles (person_id);
+CREATE INDEX title_genres_genre_id_idx ON title_genres (genre_id);
+CREATE INDEX title_countries_country_id_idx ON title_countries (country_id);
+
+-- INDEXES (same as migrations/002_facet_indexes.sql)
+CREATE INDEX people_lower_name_idx ON people (LOWER(name));
+CREATE INDEX genres_lower_name_idx ON genres (LOWER(name));
+CREATE INDEX countries_lower_name_idx ON countries (LOWER(name));
+CREATE INDEX titles_year_idx ON titles (year);
+CREATE INDEX titles_imdb_rating_idx ON titles (imdb_rating);
+
 
 COMMIT;
+
+-- TRIGRAM INDEXES (same as migrations/001_title_indexes.sql and 003_title_documents.sql)
+-- pg_trgm ships with PostgreSQL contrib. Without it the schema is still created and substring search
+-- (title ILIKE '%x%') works as a sequential scan
+DO $$
+BEGIN
+    CREATE EXTENSION IF NOT EXISTS pg_trgm;
+EXCEPTION WHEN OTHERS THEN
+    RAISE WARNING 'pg_trgm is not available, trigram indexes are skipped: %', SQLERRM;
+END $$;
+
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm') THEN
+        CREATE INDEX IF NOT EXISTS titles_title_trgm_idx ON titles USING GIN (title gin_trgm_ops);
+        CREATE INDEX IF NOT EXISTS title_documents_title_trgm_idx ON title_documents USING GIN (title gin_trgm_ops);
+    END IF;
+END $$;
@@ -0,0 +1,21 @@
+-- Indexes for title lookups and reverse lookups (title_roles / title_genres / title_countries).
+-- Apply to an existing database:
+--   docker exec -i moviedb_db psql -U admin -d moviedb < docker/migrations/001_title_indexes.sql
+BEGIN;
+
+-- Trigram index for substring search (title ILIKE '%x%')
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE INDEX IF NOT EXISTS titles_title_trgm_idx ON titles USING GIN (title gin_trgm_ops);
+
+-- Case-insensitive exact title lookup (LOWER(title) = LOWER(%s))
+CREATE INDEX IF NOT EXISTS titles_lower_title_idx ON titles (LOWER(title));
+
+-- Rating filter (my_rating >= %s)
+CREATE INDEX IF NOT EXISTS titles_my_rating_idx ON titles (my_rating);
+
+-- Reverse lookups: titles of a person / genre / country
+CREATE INDEX IF NOT EXISTS title_roles_person_id_idx ON title_roles (person_id);
+CREATE INDEX IF NOT EXISTS title_genres_genre_id_idx ON title_genres (genre_id);
+CREATE INDEX IF NOT EXISTS title_countries_country_id_idx ON title_countries (country_id);
+
+COMMIT;
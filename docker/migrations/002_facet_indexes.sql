@@ -0,0 +1,18 @@
+-- Indexes for faceted filtering (DbManager.find_titles / src/title_query.py).
+-- Apply to an existing database:
+--   docker exec -i moviedb_db psql -U admin -d moviedb < docker/migrations/002_facet_indexes.sql
+BEGIN;
+
+-- Case-insensitive name lookups (LOWER(name) = ...)
+CREATE INDEX IF NOT EXISTS people_lower_name_idx ON people (LOWER(name));
+CREATE INDEX IF NOT EXISTS genres_lower_name_idx ON genres (LOWER(name));
+CREATE INDEX IF NOT EXISTS countries_lower_name_idx ON countries (LOWER(name));
+
+-- Year range and IMDb rating range filters
+CREATE INDEX IF NOT EXISTS titles_year_idx ON titles (year);
+CREATE INDEX IF NOT EXISTS titles_imdb_rating_idx ON titles (imdb_rating);
+
+COMMIT;
+
+-- Statistics for the new expression indexes, so the planner uses them right away
+ANALYZE people, genres, countries;
@@ -0,0 +1,63 @@
+-- Title documents: denormalized read model used by DbManager for full title reads.
+-- Apply to an existing database:
+--   docker exec -i moviedb_db psql -U admin -d moviedb < docker/migrations/003_title_documents.sql
+BEGIN;
+
+-- Denormalized read model: one row per title with names of genres, countries and people as sorted arrays.
+-- Rows are refreshed by refresh_title_documents() in the same transaction as writes to 'titles'.
+CREATE TABLE IF NOT EXISTS title_documents (
+    title_id INT PRIMARY KEY REFERENCES titles(title_id) ON DELETE CASCADE,
+    imdbid VARCHAR(15) UNIQUE NOT NULL,
+    title VARCHAR(150) NOT NULL,
+    year INT NOT NULL,
+    runtime TEXT,
+    poster TEXT,
+    plot TEXT,
+    awards TEXT,
+    imdb_rating NUMERIC(3,1) NOT NULL,
+    type VARCHAR(50) NOT NULL,
+    my_rating INT,
+    genres TEXT[] NOT NULL,
+    countries TEXT[] NOT NULL,
+    directors TEXT[] NOT NULL,
+    actors TEXT[] NOT NULL,
+    writers TEXT[] NOT NULL -- writers of movies / creators of series
+);
+
+-- Rebuild documents of the given titles (each list is read with its own subquery - no cartesian joins)
+CREATE OR REPLACE FUNCTION refresh_title_documents(ids INT[]) RETURNS VOID AS $$
+    INSERT INTO title_documents (title_id, imdbid, title, year, runtime, poster, plot, awards, imdb_rating, type,
+                                 my_rating, genres, countries, directors, actors, writers)
+    SELECT t.title_id, t.imdbid, t.title, t.year, t.runtime, t.poster, t.plot, t.awards, t.imdb_rating, ty.name,
+        t.my_rating,
+        ARRAY(SELECT g.name FROM title_genres tg JOIN genres g ON g.genre_id = tg.genre_id
+              WHERE tg.title_id = t.title_id ORDER BY g.name),
+        ARRAY(SELECT c.name FROM title_countries tc JOIN countries c ON c.country_id = tc.country_id
+              WHERE tc.title_id = t.title_id ORDER BY c.name),
+        ARRAY(SELECT DISTINCT p.name FROM title_roles tr JOIN people p ON p.person_id = tr.person_id
+              WHERE tr.title_id = t.title_id AND tr.role = 'director' ORDER BY p.name),
+        ARRAY(SELECT DISTINCT p.name FROM title_roles tr JOIN people p ON p.person_id = tr.person_id
+              WHERE tr.title_id = t.title_id AND tr.role = 'actor' ORDER BY p.name),
+        ARRAY(SELECT DISTINCT p.name FROM title_roles tr JOIN people p ON p.person_id = tr.person_id
+              WHERE tr.title_id = t.title_id AND tr.role IN ('writer', 'creator') ORDER BY p.name)
+    FROM titles t
+        JOIN types ty ON ty.type_id = t.type_id
+    WHERE t.title_id = ANY(ids)
+    ON CONFLICT (title_id) DO UPDATE SET
+        imdbid = EXCLUDED.imdbid, title = EXCLUDED.title, year = EXCLUDED.year, runtime = EXCLUDED.runtime,
+        poster = EXCLUDED.poster, plot = EXCLUDED.plot, awards = EXCLUDED.awards,
+        imdb_rating = EXCLUDED.imdb_rating, type = EXCLUDED.type, my_rating = EXCLUDED.my_rating,
+        genres = EXCLUDED.genres, countries = EXCLUDED.countries, directors = EXCLUDED.directors,
+        actors = EXCLUDED.actors, writers = EXCLUDED.writers;
+$$ LANGUAGE sql;
+
+-- Indexes used by read filters (same as on 'titles')
+CREATE INDEX IF NOT EXISTS title_documents_lower_title_idx ON title_documents (LOWER(title));
+CREATE INDEX IF NOT EXISTS title_documents_my_rating_idx ON title_documents (my_rating);
+-- Substring filters (title ILIKE '%x%'); pg_trgm is created by 001_title_indexes.sql
+CREATE INDEX IF NOT EXISTS title_documents_title_trgm_idx ON title_documents USING GIN (title gin_trgm_ops);
+
+-- Documents of existing titles
+SELECT refresh_title_documents(ARRAY(SELECT title_id FROM titles));
+
+COMMIT;
@@ -0,0 +1,32 @@
+-- Full-text search over title, people, plot and awards (DbManager.search_full_text).
+-- Apply to an existing database (after 003_title_documents.sql):
+--   docker exec -i moviedb_db psql -U admin -d moviedb < docker/migrations/004_full_text_search.sql
+BEGIN;
+
+ALTER TABLE title_documents ADD COLUMN IF NOT EXISTS search_vector TSVECTOR;
+
+-- Weights: title A, people (directors, actors, writers) B, plot C, awards D
+CREATE OR REPLACE FUNCTION title_documents_search_vector() RETURNS TRIGGER AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('english', NEW.title), 'A') ||
+        setweight(to_tsvector('english', ARRAY_TO_STRING(NEW.directors || NEW.actors || NEW.writers, ' ')), 'B') ||
+        setweight(to_tsvector('english', COALESCE(NEW.plot, '')), 'C') ||
+        setweight(to_tsvector('english', COALESCE(NEW.awards, '')), 'D');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+-- Rating updates don't touch the searched columns and don't rebuild the vector
+DROP TRIGGER IF EXISTS title_documents_search_vector_trg ON title_documents;
+CREATE TRIGGER title_documents_search_vector_trg
+    BEFORE INSERT OR UPDATE OF title, plot, awards, directors, actors, writers ON title_documents
+    FOR EACH ROW EXECUTE FUNCTION title_documents_search_vector();
+
+-- Vectors of existing documents
+UPDATE title_documents SET title = title;
+
+CREATE INDEX IF NOT EXISTS title_documents_search_idx ON title_documents USING GIN (search_vector);
+ANALYZE title_documents;
+
+COMMIT;
@@ -0,0 +1,19 @@
+-- Sync state of titles refreshed from OMDb (src/enrichment.py, incremental mode).
+-- Apply to an existing database:
+--   docker exec -i moviedb_db psql -U admin -d moviedb < docker/migrations/005_title_sync.sql
+BEGIN;
+
+-- Last time OMDb data of a title was fetched. Titles without a row were never synced (stalest of all).
+-- Failed fetches count in 'failures' (reset by the next success) and hold the title back from stale reads
+-- for a backoff time after 'attempted_at', so titles OMDb can't answer don't use up every run's quota
+CREATE TABLE IF NOT EXISTS title_sync (
+    title_id INT PRIMARY KEY REFERENCES titles(title_id) ON DELETE CASCADE,
+    synced_at TIMESTAMPTZ,
+    attempted_at TIMESTAMPTZ NOT NULL,
+    failures INT NOT NULL DEFAULT 0
+);
+
+-- Stale-first reads
+CREATE INDEX IF NOT EXISTS title_sync_synced_at_idx ON title_sync (synced_at);
+
+COMMIT;
@@ -0,0 +1,305 @@
+"""
+HTTP/JSON read API for the movie library.
+
+Endpoints (GET, JSON answers):
+    /titles/<imdbID>                               - full title record
+    /titles?q=<substring>&min_rating=<0-10>&limit=<n>&after=<title>|before=<title>
+                                                   - page of title summaries ordered by title (keyset pagination),
+                                                     'next' / 'prev' hold links to the neighbouring pages
+    /export?q=<substring>&min_rating=<0-10>        - all matching full records as JSON Lines stream (chunked)
+    /health                                        - database check
+
+Answers carry an ETag; requests with a matching If-None-Match get '304 Not Modified' without a body.
+Db calls run in a thread pool sized to the DbManager connection pool, so slow queries never block the event loop
+and hundreds of keep-alive clients just queue for a free connection.
+
+Usage:
+    python -m src.api_server --host 0.0.0.0 --port 8080 --pool-size 20
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from itertools import islice
+from urllib.parse import urlsplit, parse_qsl, urlencode
+
+from src.dbmanager import DbManager, DbMovieNotFoundError
+from src.exporter import title_to_dict
+from src.media_title import MediaTitle
+
+MAX_HEADER_SIZE = 16 * 1024
+EXPORT_BATCH = 200  # titles read from Db per thread hop while streaming
+
+logger = logging.getLogger("moviedb.api")
+
+
+class ApiError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class ApiServer:
+    """
+    Asyncio HTTP/1.1 server in front of DbManager (pooled mode).
+
+    Responsibilities:
+        - Parse requests from keep-alive connections and route them to handlers.
+        - Run DbManager calls in a thread pool with one thread per pooled connection.
+        - Answer with JSON, ETag and conditional (304) responses; stream exports with chunked encoding.
+    """
+    def __init__(self, dbm: DbManager, host: str = "127.0.0.1", port: int = 8080, max_page: int = 100,
+                 keep_alive: float = 15):
+        if dbm.pool is None:
+            raise ValueError("ApiServer needs DbManager in pooled mode (max_connections is set).")
+        self.dbm = dbm
+        self.host = host
+        self.port = port
+        self.max_page = max_page
+        self.keep_alive = keep_alive
+        self._executor = ThreadPoolExecutor(max_workers=dbm.pool.maxconn, thread_name_prefix="api-db")
+        self._server: asyncio.AbstractServer | None = None
+        # Export streams hold a Db connection while waiting for slow readers - keep some for the other requests
+        self._exports: asyncio.Semaphore | None = None
+
+    async def start(self) -> None:
+        self._exports = asyncio.Semaphore(max(1, self.dbm.pool.maxconn // 2))
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port, backlog=1024,
+                                                  limit=MAX_HEADER_SIZE)
+        # Real port if 0 (any free port) was asked for
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self) -> None:
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _db(self, func, *args, **kwargs):
+        # Run a blocking DbManager call in the Db thread pool
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, lambda: func(*args, **kwargs))
+
+    # Connection handling
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), self.keep_alive)
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+                    return
+                except asyncio.LimitOverrunError:
+                    await self._send(writer, HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE,
+                                     {"error": "Request headers too large"}, keep_alive=False)
+                    return
+
+                method, target, version, headers = self._parse_head(head)
+                # Request bodies are not used, but must be read to keep the connection in sync
+                if headers.get("content-length", "0").isdigit() and int(headers.get("content-length", "0")):
+                    await reader.readexactly(int(headers["content-length"]))
+
+                keep_alive = (headers.get("connection", "").lower() != "close"
+                              and (version == "HTTP/1.1" or headers.get("connection", "").lower() == "keep-alive"))
+                await self._respond(writer, method, target, headers, keep_alive)
+                if not keep_alive:
+                    return
+        except (ConnectionError, asyncio.IncompleteReadError):
+            # Client went away
+            pass
+        except Exception:
+            # E.g. broken export stream (see _respond) - the answer can't be finished, drop the connection
+            logger.exception("Connection dropped after an unexpected error")
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    @staticmethod
+    def _parse_head(head: bytes) -> tuple[str, str, str, dict[str, str]]:
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, target, version = lines[0].split(" ", 2)
+        except ValueError:
+            method, target, version = "", "", "HTTP/1.0"
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                name, value = line.split(":", 1)
+                headers[name.strip().lower()] = value.strip()
+        return method, target, version, headers
+
+    async def _respond(self, writer, method: str, target: str, headers: dict, keep_alive: bool) -> None:
+        try:
+            if method not in ("GET", "HEAD"):
+                raise ApiError(HTTPStatus.METHOD_NOT_ALLOWED, "Only GET and HEAD are supported")
+            url = urlsplit(target)
+            params = dict(parse_qsl(url.query))
+            if url.path == "/export":
+                filters = self._filters(params)
+            else:
+                data = await self._route(url.path, params)
+        except ApiError as e:
+            await self._send(writer, e.status, {"error": str(e)}, keep_alive=keep_alive)
+            return
+        except Exception:
+            # Details (SQL, connection settings, paths) stay in the server log
+            logger.exception("Request failed: %s %s", method, target)
+            await self._send(writer, HTTPStatus.INTERNAL_SERVER_ERROR, {"error": "Internal error"},
+                             keep_alive=keep_alive)
+            return
+
+        if url.path == "/export":
+            # Errors after the stream has started can't be reported - they close the connection
+            await self._export(writer, filters, head_only=method == "HEAD", keep_alive=keep_alive)
+        else:
+            await self._send(writer, HTTPStatus.OK, data, keep_alive=keep_alive,
+                             if_none_match=headers.get("if-none-match"), head_only=method == "HEAD")
+
+    async def _route(self, path: str, params: dict):
+        if path == "/titles":
+            return await self._titles_page(params)
+        if path.startswith("/titles/"):
+            return await self._title(path[len("/titles/"):])
+        if path == "/health":
+            if not await self._db(self.dbm.ping):
+                raise ApiError(HTTPStatus.SERVICE_UNAVAILABLE, "Database is unavailable")
+            return {"status": "ok"}
+        raise ApiError(HTTPStatus.NOT_FOUND, f"Unknown path '{path}'")
+
+    # Handlers
+    async def _title(self, imdbid: str) -> dict:
+        try:
+            return await self._db(self.dbm.get_title_by_imdbid, imdbid)
+        except ValueError as e:
+            raise ApiError(HTTPStatus.BAD_REQUEST, str(e))
+        except DbMovieNotFoundError as e:
+            raise ApiError(HTTPStatus.NOT_FOUND, str(e))
+
+    async def _titles_page(self, params: dict) -> dict:
+        filters = self._filters(params)
+        limit = self._int_param(params, "limit", 10, 1, self.max_page)
+        after, before = params.get("after"), params.get("before")
+        if after is not None and before is not None:
+            raise ApiError(HTTPStatus.BAD_REQUEST, "Expected only one of 'after' and 'before'")
+
+        # One extra row tells if there is a page after this one (or before it, when paging back)
+        rows = await self._db(self.dbm.get_title_page, after=after, before=before, limit=limit + 1, **filters)
+        more = len(rows) > limit
+        rows = rows[1:] if more and before is not None else rows[:limit]
+
+        query = {k: v for k, v in params.items() if k in ("q", "min_rating", "limit")}
+        has_next = more if before is None else True
+        has_prev = (more if before is not None else after is not None) and bool(rows)
+        return {
+            "titles": rows,
+            "next": f"/titles?{urlencode({**query, 'after': rows[-1]['Title']})}" if has_next and rows else None,
+            "prev": f"/titles?{urlencode({**query, 'before': rows[0]['Title']})}" if has_prev else None,
+        }
+
+    async def _export(self, writer, filters: dict, head_only: bool, keep_alive: bool) -> None:
+        async with self._exports:
+            await self._stream_titles(writer, self.dbm.iter_titles(**filters), head_only, keep_alive)
+
+    async def _stream_titles(self, writer, titles, head_only: bool, keep_alive: bool) -> None:
+        writer.write(self._head(HTTPStatus.OK, {"Content-Type": "application/x-ndjson; charset=utf-8",
+                                                "Transfer-Encoding": "chunked"}, keep_alive))
+        try:
+            if head_only:
+                writer.write(b"0\r\n\r\n")
+                return
+            while True:
+                # Stream is read batch by batch in the Db pool, the connection is held until it is finished
+                batch = await self._db(lambda: list(islice(titles, EXPORT_BATCH)))
+                if not batch:
+                    break
+                chunk = "".join(json.dumps(title_to_dict(MediaTitle.from_dict(row)), ensure_ascii=False) + "\n"
+                                for row in batch).encode("utf-8")
+                writer.write(b"%X\r\n%s\r\n" % (len(chunk), chunk))
+                # Slow readers slow the stream down instead of filling memory
+                await writer.drain()
+            writer.write(b"0\r\n\r\n")
+            await writer.drain()
+        finally:
+            await self._db(titles.close)
+
+    # Helpers
+    def _filters(self, params: dict) -> dict:
+        filters = {}
+        if params.get("q"):
+            filters["substring"] = params["q"]
+        if "min_rating" in params:
+            filters["my_rating"] = str(self._int_param(params, "min_rating", 0, 0, 10))
+        return filters
+
+    @staticmethod
+    def _int_param(params: dict, name: str, default: int, minimum: int, maximum: int) -> int:
+        value = params.get(name)
+        if value is None:
+            return default
+        if not re.fullmatch(r"\d+", value) or not minimum <= int(value) <= maximum:
+            raise ApiError(HTTPStatus.BAD_REQUEST, f"'{name}' must be a number between {minimum} and {maximum}")
+        return int(value)
+
+    async def _send(self, writer, status: int, data, keep_alive: bool, if_none_match: str | None = None,
+                    head_only: bool = False) -> None:
+        body = json.dumps(data, ensure_ascii=False, default=str).encode("utf-8")
+        etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+        headers = {"Content-Type": "application/json; charset=utf-8", "ETag": etag, "Cache-Control": "no-cache"}
+
+        if status == HTTPStatus.OK and if_none_match and etag in (t.strip() for t in if_none_match.split(",")):
+            status, body = HTTPStatus.NOT_MODIFIED, b""
+        headers["Content-Length"] = str(len(body))
+        writer.write(self._head(status, headers, keep_alive) + (b"" if head_only else body))
+        await writer.drain()
+
+    @staticmethod
+    def _head(status: int, headers: dict, keep_alive: bool) -> bytes:
+        status = HTTPStatus(status)
+        lines = [f"HTTP/1.1 {status.value} {status.phrase}", "Server: MovieDb",
+                 f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+        lines += [f"{name}: {value}" for name, value in headers.items()]
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--pool-size", type=int, default=20, help="Db connections (and Db worker threads)")
+    parser.add_argument("--max-page", type=int, default=100, help="max titles per page")
+    args = parser.parse_args()
+
+    # No title cache: other processes (CLI, imports, enrichment) write the same Db
+    dbm = DbManager(min_connections=2, max_connections=args.pool_size, cache_size=0)
+    server = ApiServer(dbm, args.host, args.port, max_page=args.max_page)
+
+    async def run():
+        await server.start()
+        print(f"MovieDb API listening on http://{args.host}:{server.port}")
+        try:
+            await server.serve_forever()
+        finally:
+            await server.close()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        dbm.close()
+
+
+if __name__ == "__main__":
+    main()
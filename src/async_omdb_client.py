@@ -0,0 +1,116 @@
+import asyncio
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator
+
+from src.omdb_client import OMDbClient, OMDbNotFoundError, SEARCH_PAGE_SIZE
+from src.rate_limiter import TokenBucket
+
+
+class AsyncOMDbClient:
+    """
+    Asyncio client for concurrent OMDb lookups.
+
+    Responsibilities:
+        - Provide awaitable versions of OMDbClient lookups and gather-style batch methods.
+        - Bound number of requests in flight (concurrency) and their rate (token bucket, requests per second).
+
+    Requests are executed by the wrapped sync OMDbClient in a dedicated thread pool, so the response cache,
+    HTTP transport and error classes (OMDbNotFoundError, OMDbInvalidKeyError, ...) are shared with it.
+    """
+    def __init__(self, client: OMDbClient | None = None, concurrency: int = 8, rate: float | None = None,
+                 burst: int | None = None):
+        if concurrency < 1:
+            raise ValueError("Concurrency must be a positive number.")
+        self.client = client or OMDbClient()
+        self.concurrency = concurrency
+        self.rate_limiter = TokenBucket(rate, burst) if rate else None
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="omdb")
+        self._semaphores = weakref.WeakKeyDictionary()  # event loop -> semaphore
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.close()
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False)
+
+    async def get_title_by_imdbid(self, imdbid: str) -> dict:
+        return await self._call(self.client.get_title_by_imdbid, imdbid)
+
+    async def get_title_by_name(self, title: str) -> dict:
+        return await self._call(self.client.get_title_by_name, title)
+
+    async def search_title(self, substring: str, page: int = 1) -> dict:
+        return await self._call(self.client.search_title, substring, page)
+
+    async def iter_search(self, substring: str, limit: int | None = None,
+                          prefetch: bool = True) -> AsyncIterator[dict]:
+        """
+        Async version of OMDbClient.iter_search: yields search results page by page,
+        requesting the next page in background while the current one is consumed.
+        """
+        page = 1
+        data = await self.search_title(substring, page)
+        yielded = 0
+        next_page = None
+        try:
+            while True:
+                results = data.get('Search', [])
+                last_page = -(-int(data.get('totalResults', 0)) // SEARCH_PAGE_SIZE)
+                more = page < last_page and results and (limit is None or yielded + len(results) < limit)
+
+                # Request next page before handing out current one
+                if more and prefetch:
+                    next_page = asyncio.create_task(self.search_title(substring, page + 1))
+
+                for result in results:
+                    if limit is not None and yielded >= limit:
+                        return
+                    yield result
+                    yielded += 1
+
+                if not more:
+                    return
+                page += 1
+                try:
+                    data = await next_page if next_page else await self.search_title(substring, page)
+                except OMDbNotFoundError:
+                    # Fewer results than 'totalResults' promised
+                    return
+                next_page = None
+        finally:
+            if next_page is not None:
+                next_page.cancel()
+
+    async def gather_titles_by_imdbids(self, imdbids: list[str]) -> list[dict | Exception]:
+        """
+        Look up many titles by imdbID concurrently.
+        :return: list: Result for each imdbID in input order - title dict or the exception raised for it
+        """
+        return await asyncio.gather(*(self.get_title_by_imdbid(imdbid) for imdbid in imdbids),
+                                    return_exceptions=True)
+
+    async def gather_titles_by_names(self, titles: list[str]) -> list[dict | Exception]:
+        """
+        Look up many titles by exact name concurrently.
+        :return: list: Result for each name in input order - title dict or the exception raised for it
+        """
+        return await asyncio.gather(*(self.get_title_by_name(title) for title in titles),
+                                    return_exceptions=True)
+
+    async def _call(self, func, *args):
+        # Wait for a free slot, then for a token, then run blocking request in the thread pool
+        async with self._semaphore():
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire_async()
+            return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        # Semaphores belong to one event loop (sync OMDbClient starts a new loop for every batch)
+        loop = asyncio.get_running_loop()
+        if loop not in self._semaphores:
+            self._semaphores[loop] = asyncio.Semaphore(self.concurrency)
+        return self._semaphores[loop]
@@ -0,0 +1,264 @@
+"""
+Non-interactive bulk import into My Database.
+
+Reads imdbIDs or titles (one per line) from files or stdin ('-'), and files written by Exporter / StreamExporter
+(JSON, YAML, JSON Lines, CSV, optionally gzipped).
+Missing metadata is fetched from OMDb concurrently, titles are inserted in batches, titles already in
+the database are skipped. Progress is saved to a checkpoint file, so an interrupted run can be resumed.
+
+Usage:
+    python -m src.bulk_import ids.txt titles.txt exported.json --rating 7 --checkpoint import.ckpt
+    cat ids.txt | python -m src.bulk_import -
+    python -m src.bulk_import ids.txt --mirror omdb_mirror.sqlite --offline   # no network, see src/omdb_mirror.py
+"""
+import argparse
+import csv
+import gzip
+import json
+import os
+import re
+import sys
+import time
+from typing import Iterable, Iterator
+
+import yaml
+
+from src.dbmanager import DbManager
+from src.media_title import MediaTitle
+from src.omdb_client import OMDbClient, OMDbError
+from src.omdb_mirror import OMDbMirror
+
+IMDBID_RE = re.compile(r"tt\d{7,9}")
+
+
+class Record:
+    """
+    One import entry: imdbID or title to look up in OMDb, or a complete MediaTitle.
+    Entries of exported files that can't be read carry the 'error' instead (counted as failed).
+    """
+    def __init__(self, imdbid: str | None = None, title: str | None = None, media: MediaTitle | None = None,
+                 error: Exception | None = None):
+        self.imdbid = imdbid or (media.imdbid if media else None)
+        self.title = title
+        self.media = media
+        self.error = error
+
+    @property
+    def key(self) -> str:
+        # Checkpoint key
+        return self.imdbid or f"title:{self.title.lower()}"
+
+
+class BulkImporter:
+    """
+    Imports records into Db batch by batch.
+
+    Responsibilities:
+        - Skip records that are already in Db or done in a previous (interrupted) run.
+        - Fetch metadata of imdbIDs/titles from OMDb concurrently.
+        - Insert each batch through DbManager.add_titles and save checkpoint after it.
+        - Count added / skipped / failed records and report throughput.
+    """
+    def __init__(self, dbm: DbManager, client: OMDbClient, my_rating: int | None = None, batch_size: int = 200,
+                 concurrency: int = 8, rate: float | None = None, checkpoint: str | None = None, out=sys.stdout):
+        self.dbm = dbm
+        self.client = client
+        self.my_rating = my_rating
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.rate = rate
+        self.checkpoint = checkpoint
+        self.out = out
+        self.done: set[str] = self._load_checkpoint()
+        self.stats = {"added": 0, "skipped": 0, "failed": 0}
+        self.errors: list[str] = []
+
+    def run(self, records: Iterable[Record]) -> dict:
+        """ Import all records. Returns stats: added / skipped / failed counts, elapsed seconds, titles/sec. """
+        start = time.perf_counter()
+        batch = []
+        for record in records:
+            if record.error is not None:
+                self._fail(record.imdbid or record.title or "record", record.error)
+                continue
+            if record.key in self.done:
+                self.stats["skipped"] += 1
+                continue
+            batch.append(record)
+            if len(batch) == self.batch_size:
+                self._import_batch(batch)
+                self._report(start)
+                batch = []
+        if batch:
+            self._import_batch(batch)
+            self._report(start)
+
+        elapsed = time.perf_counter() - start
+        processed = sum(self.stats.values())
+        return {**self.stats, "elapsed": elapsed, "per_second": processed / elapsed if elapsed else 0.0}
+
+    def _import_batch(self, batch: list[Record]) -> None:
+        # Skip imdbIDs that are already in Db before asking OMDb
+        existing = self.dbm.query_existing_imdbids([r.imdbid for r in batch if r.imdbid])
+        pending = [r for r in batch if r.imdbid not in existing]
+        self.stats["skipped"] += len(batch) - len(pending)
+
+        titles = self._fetch(pending)
+        if self.my_rating is not None:
+            for media in titles.values():
+                media.my_rating = self.my_rating
+
+        inserted = self._insert(list(titles.values()))
+        for imdbid, added in inserted.items():
+            self.stats["added" if added else "skipped"] += 1
+
+        # Only records that are in Db now are done - failed ones are retried by a resumed run
+        self.done.update(r.key for r in batch if r.imdbid in existing)
+        self.done.update(key for key, media in titles.items() if media.imdbid in inserted)
+        self._save_checkpoint()
+
+    def _fetch(self, records: list[Record]) -> dict[str, MediaTitle]:
+        # Returns key -> MediaTitle for records that could be resolved
+        titles = {r.key: r.media for r in records if r.media is not None}
+        by_id = [r for r in records if r.media is None and r.imdbid]
+        by_name = [r for r in records if r.media is None and not r.imdbid]
+        if not by_id and not by_name:
+            return titles
+
+        results = self.client.get_titles_by_imdbids([r.imdbid for r in by_id], self.concurrency, self.rate) \
+            if by_id else []
+        results += self.client.get_titles_by_names([r.title for r in by_name], self.concurrency, self.rate) \
+            if by_name else []
+
+        for record, result in zip(by_id + by_name, results):
+            try:
+                if isinstance(result, Exception):
+                    raise result
+                titles[record.key] = MediaTitle.from_dict(result)
+            except (OMDbError, ValueError) as e:
+                self._fail(record.imdbid or record.title, e)
+        return titles
+
+    def _insert(self, titles: list[MediaTitle]) -> dict[str, bool]:
+        # Insert whole batch; if it fails, insert titles one by one to find the broken ones
+        if not titles:
+            return {}
+        try:
+            return self.dbm.add_titles(titles, batch_size=len(titles))
+        except Exception:
+            result = {}
+            for media in titles:
+                try:
+                    result.update(self.dbm.add_titles([media]))
+                except Exception as e:
+                    self._fail(media.imdbid, e)
+            return result
+
+    def _fail(self, name: str, error: Exception) -> None:
+        self.stats["failed"] += 1
+        self.errors.append(f"{name}: {error}")
+        print(f"Failed: {name}: {error}", file=self.out)
+
+    def _report(self, start: float) -> None:
+        elapsed = time.perf_counter() - start
+        processed = sum(self.stats.values())
+        print(f"Processed {processed}: added {self.stats['added']}, skipped {self.stats['skipped']}, "
+              f"failed {self.stats['failed']} - {processed / elapsed if elapsed else 0:.1f} titles/s", file=self.out)
+
+    def _load_checkpoint(self) -> set[str]:
+        if self.checkpoint and os.path.exists(self.checkpoint):
+            with open(self.checkpoint, "r", encoding="utf-8") as f:
+                return set(json.load(f)["done"])
+        return set()
+
+    def _save_checkpoint(self) -> None:
+        # Written to temp file first, so interrupted write never breaks the checkpoint
+        if not self.checkpoint:
+            return
+        tmp_path = self.checkpoint + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"done": sorted(self.done)}, f)
+        os.replace(tmp_path, self.checkpoint)
+
+
+def read_records(paths: list[str]) -> Iterator[Record]:
+    """ Yield records from text files/stdin (imdbID or title per line) and exported files (streamed). """
+    for path in paths:
+        if path == "-":
+            yield from _read_lines(sys.stdin)
+            continue
+
+        compressed = path.lower().endswith(".gz")
+        ext = os.path.splitext(path[:-3] if compressed else path)[1].lower()
+        opener = gzip.open if compressed else open
+        with opener(path, "rt", encoding="utf-8", newline="") as f:
+            if ext == ".json":
+                yield from _read_exported(json.load(f))
+            elif ext == ".jsonl":
+                yield from _read_exported(json.loads(line) for line in f if line.strip())
+            elif ext in (".yaml", ".yml"):
+                yield from _read_exported(doc for doc in yaml.safe_load_all(f) if doc)
+            elif ext == ".csv":
+                yield from _read_exported(csv.DictReader(f))
+            else:
+                yield from _read_lines(f)
+
+
+def _read_lines(lines: Iterable[str]) -> Iterator[Record]:
+    for line in lines:
+        line = line.strip()
+        # Empty lines and comments
+        if not line or line.startswith("#"):
+            continue
+        yield Record(imdbid=line) if IMDBID_RE.fullmatch(line) else Record(title=line)
+
+
+def _read_exported(data: dict | Iterable[dict]) -> Iterator[Record]:
+    # Exported titles have attribute names as keys; OMDb-style dicts are accepted as well
+    for item in [data] if isinstance(data, dict) else data:
+        try:
+            media = MediaTitle.from_export(item) if "imdbid" in item else MediaTitle.from_dict(item)
+        except Exception as e:
+            # Malformed record - reported as failed, the rest of the file is still imported
+            fields = item if isinstance(item, dict) else {}
+            yield Record(imdbid=fields.get("imdbid") or fields.get("imdbID"),
+                         title=fields.get("title") or fields.get("Title"), error=e)
+            continue
+        yield Record(media=media)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="+", help="files with imdbIDs/titles, Exporter JSON/YAML files or '-'")
+    parser.add_argument("--rating", type=int, choices=range(0, 11), metavar="0-10",
+                        help="my rating for imported titles (default: rating from file or 0)")
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8, help="OMDb requests in flight")
+    parser.add_argument("--rate", type=float, help="max OMDb requests per second")
+    parser.add_argument("--checkpoint", help="file to save progress to / resume from")
+    parser.add_argument("--mirror", default=os.getenv("OMDb_MIRROR_PATH"),
+                        help="local OMDb mirror asked before the API (default: $OMDb_MIRROR_PATH)")
+    parser.add_argument("--offline", action="store_true", help="never call the API, only the mirror")
+    args = parser.parse_args()
+    if args.offline and not args.mirror:
+        parser.error("--offline needs --mirror")
+
+    dbm = DbManager()
+    mirror = OMDbMirror(args.mirror) if args.mirror else None
+    client = OMDbClient(mirror=mirror, offline=args.offline)
+    importer = BulkImporter(dbm, client, my_rating=args.rating, batch_size=args.batch_size,
+                            concurrency=args.concurrency, rate=args.rate, checkpoint=args.checkpoint)
+    try:
+        stats = importer.run(read_records(args.paths))
+    finally:
+        dbm.close()
+        client.close()
+        if mirror is not None:
+            mirror.close()
+
+    print(f"\nDone in {stats['elapsed']:.1f}s ({stats['per_second']:.1f} titles/s): added {stats['added']}, "
+          f"skipped {stats['skipped']}, failed {stats['failed']}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+    """
+    Thread-safe in-memory cache with LRU eviction and optional per-entry TTL.
+    Counts hits and misses.
+    """
+    def __init__(self, maxsize: int = 1024):
+        if maxsize < 1:
+            raise ValueError("Cache size must be a positive number.")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict = OrderedDict()  # key -> (value, expires_at or None)
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and (entry[1] is None or entry[1] > time.time()):
+                self._data.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+
+            # Missing or expired
+            if entry is not None:
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def peek(self, key, default=None):
+        # Like get(), but neither counted in stats nor moved to the end
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and (entry[1] is None or entry[1] > time.time()):
+                return entry[0]
+            return default
+
+    def set(self, key, value, ttl: float | None = None) -> None:
+        expires_at = time.time() + ttl if ttl is not None else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            # Evict least recently used
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    @property
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+        }
+
+
+class SqliteCache:
+    """
+    On-disk key/value cache with per-entry TTL, stored in a single SQLite file.
+    Values must be JSON serializable. Expired entries are dropped on read and purged periodically on write.
+    """
+    PURGE_EVERY = 500  # writes between purges of expired entries
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)"
+        )
+        self._conn.commit()
+        self._writes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str, default=None):
+        with self._lock:
+            row = self._conn.execute("SELECT value, expires_at FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return default
+            if row[1] is not None and row[1] <= time.time():
+                self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                self._conn.commit()
+                return default
+            return json.loads(row[0])
+
+    def set(self, key: str, value, ttl: float | None = None) -> None:
+        expires_at = time.time() + ttl if ttl is not None else None
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), expires_at)
+            )
+            self._writes += 1
+            if self._writes % self.PURGE_EVERY == 0:
+                self._conn.execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),))
+            self._conn.commit()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM cache")
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class ResponseCache:
+    """
+    Two-level cache for API responses: in-memory LRU in front of an optional on-disk SQLite store.
+
+    Responsibilities:
+        - Pick TTL per endpoint, with a separate TTL for negative (e.g. 'not found') responses.
+        - Promote disk hits to memory for the rest of their lifetime.
+        - Count hits and misses.
+    """
+    DEFAULT_TTLS = {
+        "id": 7 * 24 * 3600,    # Lookup by imdbID
+        "title": 24 * 3600,     # Lookup by exact title
+        "search": 6 * 3600,     # Search by substring
+    }
+
+    def __init__(self, maxsize: int = 1024, path: str | None = None, ttls: dict[str, float] | None = None,
+                 default_ttl: float = 24 * 3600, negative_ttl: float = 3600):
+        self.memory = LRUCache(maxsize)
+        self.disk = SqliteCache(path) if path else None
+        self.ttls = {**self.DEFAULT_TTLS, **(ttls or {})}
+        self.default_ttl = default_ttl
+        self.negative_ttl = negative_ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()  # Counters are shared by client threads
+
+    def get(self, key: str):
+        # Entries are stored as (value, expires_at) so disk hits keep their original expiry in memory
+        entry = self.memory.get(key)
+        if entry is None and self.disk is not None:
+            entry = self.disk.get(key)
+            if entry is not None:
+                self.memory.set(key, entry, ttl=entry[1] - time.time())
+
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return entry[0]
+
+    def set(self, endpoint: str, key: str, value, negative: bool = False) -> None:
+        ttl = self.negative_ttl if negative else self.ttls.get(endpoint, self.default_ttl)
+        entry = (value, time.time() + ttl)
+        self.memory.set(key, entry, ttl=ttl)
+        if self.disk is not None:
+            self.disk.set(key, entry, ttl=ttl)
+
+    def clear(self) -> None:
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+    @property
+    def stats(self) -> dict:
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        total = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": hits / total if total else 0.0,
+            "memory_size": len(self.memory),
+            "disk_size": len(self.disk) if self.disk is not None else 0,
+        }
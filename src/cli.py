@@ -2,14 +2,111 @@ import os
 import re
 import sys
 from functools import partial
-from typing import List, Tuple, Callable, Optional
+from itertools import islice
+from typing import List, Tuple, Callable, Optional, Iterable
 
+from src import metrics
+from src.cache import ResponseCache
 from src.dbmanager import DbManager, DbDuplicateMovieError, DbMovieNotFoundError
-from src.exporter import Exporter
+from src.exporter import Exporter, StreamExporter, BatchExporter
 from src.media_title import MediaTitle
 from src.omdb_client import OMDbClient, OMDbError, OMDbNotFoundError
+from src.omdb_mirror import OMDbMirror
+from src.title_query import TitleQuery, ROLES, SORT_KEYS
 
 QUIT_SET = {'q', 'Q', 'exit'}
+PAGE_SIZE = 10  # Search results per page
+
+class ResultPager:
+    """
+    Splits lazily produced search results into pages for the search results screen.
+    Pages already shown are kept, so going back never re-requests them.
+    """
+    def __init__(self, results: Iterable[dict], total: int | None = None, page_size: int = PAGE_SIZE):
+        self._results = iter(results)
+        self.total = total
+        self.page_size = page_size
+        self.pages: List[List[dict]] = []
+        self.index = -1
+        self._exhausted = False
+
+    @property
+    def current(self) -> List[dict]:
+        return self.pages[self.index] if self.index >= 0 else []
+
+    @property
+    def has_prev(self) -> bool:
+        return self.index > 0
+
+    @property
+    def has_next(self) -> bool:
+        if self.index < len(self.pages) - 1:
+            return True
+        if self._exhausted:
+            return False
+        # Known total saves pulling the next page just to find out
+        if self.total is not None:
+            return (self.index + 1) * self.page_size < self.total
+        return self._load_page()
+
+    def next_page(self) -> List[dict]:
+        if self.index == len(self.pages) - 1 and not self._load_page():
+            return self.current
+        self.index += 1
+        return self.current
+
+    def prev_page(self) -> List[dict]:
+        if self.has_prev:
+            self.index -= 1
+        return self.current
+
+    def _load_page(self) -> bool:
+        page = [] if self._exhausted else list(islice(self._results, self.page_size))
+        if len(page) < self.page_size:
+            self._exhausted = True
+        if page:
+            self.pages.append(page)
+        return bool(page)
+
+class KeysetPager:
+    """
+    Pages of Db results requested on demand with keyset pagination (see DbManager.get_title_page).
+    Only the current page is kept; 'fetch_page(after=..., before=..., limit=...)' returns title summaries.
+    """
+    def __init__(self, fetch_page: Callable[..., List[dict]], page_size: int = PAGE_SIZE):
+        self.fetch_page = fetch_page
+        self.page_size = page_size
+        self.total = None  # Unknown - counting would scan all matching rows
+        self.current: List[dict] = []
+        self.index = -1
+        self._has_next = True
+
+    @property
+    def has_prev(self) -> bool:
+        return self.index > 0
+
+    @property
+    def has_next(self) -> bool:
+        return self._has_next
+
+    def next_page(self) -> List[dict]:
+        if not self._has_next:
+            return self.current
+        # One extra row tells if there is a page after this one
+        after = self.current[-1]["Title"] if self.current else None
+        rows = self.fetch_page(after=after, limit=self.page_size + 1)
+        self._has_next = len(rows) > self.page_size
+        if rows or self.index < 0:
+            self.current = rows[:self.page_size]
+            self.index += 1
+        return self.current
+
+    def prev_page(self) -> List[dict]:
+        if self.has_prev:
+            self.current = self.fetch_page(before=self.current[0]["Title"], limit=self.page_size)
+            self.index -= 1
+            self._has_next = True
+        return self.current
 
 class CLI:
     """
@@ -30,6 +127,7 @@ class CLI:
         self.from_db: bool = False  # Navigation purpose
         self.actions: List[Tuple[Callable, str]] = []
         self.print_search_flag = False
+        self.pager: Optional[ResultPager] = None  # Paging of search results
 
         # Menu functions (init later)
         self.functions: List[Tuple[Callable, str, int]] = []  # (func, func_dest, menu_stage)
@@ -37,8 +135,17 @@ class CLI:
     # Init methods
     def init_clients(self) -> None:
         """ Initialize external clients and DB connection. """
-        self.client: OMDbClient = OMDbClient()
-        self.dbm: DbManager = DbManager()
+        # OMDb responses are cached in memory and, if OMDb_CACHE_PATH is set, on disk between runs
+        # Local mirror (OMDb_MIRROR_PATH) is asked first; OMDb_OFFLINE=1 answers from mirror and cache only,
+        # OMDb_MIRROR_COMPLETE=1 lets the mirror answer searches online too
+        mirror = OMDbMirror(os.getenv("OMDb_MIRROR_PATH")) if os.getenv("OMDb_MIRROR_PATH") else None
+        self.client: OMDbClient = OMDbClient(cache=ResponseCache(path=os.getenv("OMDb_CACHE_PATH")), mirror=mirror,
+                                             offline=mirror is not None and os.getenv("OMDb_OFFLINE") == "1",
+                                             mirror_complete=os.getenv("OMDb_MIRROR_COMPLETE") == "1")
+        # Browsing re-reads the same titles and the ones just written - cached for a short time (see DbManager)
+        self.dbm: DbManager = DbManager(cache_size=1024)
+        # Instrumentation is opt-in (MOVIEDB_METRICS=1)
+        metrics.configure_from_env()
 
     def init_functions(self) -> None:
         """ Initialize functions. """
@@ -52,11 +159,18 @@ class CLI:
             (self.db_get_media_by_imdbid, "Get media by imdbID", 4),
             (self.db_show_all_media, "Show all media in My Database", 4),
             (self.db_show_media_by_rating, "Show all high rated media", 4),
+            (self.db_filter_media, "Filter media (genre, country, person, years...)", 4),
+            (self.db_full_text_search, "Full-text search (plot, awards, people)", 4),
+            (self.db_export_all, "Export all media", 4),
+            (self.db_export_filtered, "Export filtered media", 4),
+            (self.db_export_files, "Export all media as separate files", 4),
             (self.media_show, "Show full media info", 6),
             (self.media_update_rating, "Update rating", 6),
             (self.save_json, "Save to JSON", 6),
             (self.save_yaml, "Save to YAML", 6)
         ]
+        if metrics.enabled:
+            self.functions.append((self.show_metrics, "Show metrics", 1))
 
 
     # Menu
@@ -70,9 +184,7 @@ class CLI:
 
         # Format width of menu counter
         results_len = len(self.actions)
-        if results_len < 10: n_width = 1
-        elif results_len < 100: n_width = 2
-        else: n_width = 3
+        n_width = len(str(results_len))
 
         for i, (_, description, _) in enumerate(self.actions, start=1):
             print(f"[{i:>{n_width}}] {description}")
@@ -154,6 +266,8 @@ class CLI:
         """ Stage 2. Search title by name in OMDb and manage errors. """
         print('\n' + '-' * 50 + '\n')
         title_name = input("Enter title: ")
+        # New search - paging of earlier results ends here
+        self.pager = None
 
         try:
             # Trying to get title from OMDb by exact name
@@ -172,6 +286,11 @@ class CLI:
 
             try:
                 data = self.client.search_title(title_name)
+                # Next pages are requested only when user pages forward
+                self.pager = ResultPager(self.client.iter_search(title_name, prefetch=False, first_page=data),
+                                         total=int(data.get("totalResults", 0)))
+                self.pager.next_page()
+
                 # Continue to search results
                 self.stage = 5
                 self.from_db = False
@@ -236,6 +355,8 @@ class CLI:
         """ Stage 4. Search title by name in Db and manage errors. """
         print('\n' + '-' * 50 + '\n')
         title_name = input("\nEnter title: ")
+        # New search - paging of earlier results ends here
+        self.pager = None
 
         try:
             # Trying to get title from OMDb by exact name
@@ -252,20 +373,19 @@ class CLI:
             # If there's no such title, trying to search in Database
             print("\nMedia not found. Continue to search...\n")
 
-            try:
-                data = self.dbm.search_titles_by_name(title_name)
-
-                # Formating data
-                data = {"Search": data}
-
-                # Continue to search results
-                self.stage = 5
-                self.from_db = True
-                self.print_search_results(data)
-
-            except DbMovieNotFoundError:
+            # Only titles of the current page are retrieved
+            pager = KeysetPager(partial(self.dbm.get_title_page, substring=title_name))
+            data = {"Search": pager.next_page()}
+            if not data["Search"]:
                 # If nothing was found either
                 print("\nNothing was found at all. Try to search again...")
+                return
+
+            # Continue to search results
+            self.pager = pager
+            self.stage = 5
+            self.from_db = True
+            self.print_search_results(data)
 
         except Exception as e:
             print(e)
@@ -284,8 +404,9 @@ class CLI:
             self.media = MediaTitle.from_dict(data)
             print(f"\n{self.media}")
 
-            # Update CLI stage
+            # Update CLI stage (search results are left - their paging ends here)
             self.stage = 6
+            self.pager = None
 
         except (ValueError, DbMovieNotFoundError) as e:
             print(e)
@@ -296,12 +417,10 @@ class CLI:
             self.stage = 1
 
     def db_show_all_media(self) -> None:
-        """ Stage 4. Show all media titles from the Db. """
-        # Retrieve all metia titles
-        data = self.dbm.get_all_titles()
-
-        # Formating data
-        data = {"Search": data}
+        """ Stage 4. Show all media titles from the Db, page by page. """
+        # Only titles of the current page are retrieved
+        self.pager = KeysetPager(self.dbm.get_title_page)
+        data = {"Search": self.pager.next_page()}
 
         # Continue to search results
         self.stage = 5
@@ -309,14 +428,112 @@ class CLI:
         self.print_search_results(data)
 
     def db_show_media_by_rating(self) -> None:
-        """ stage 4. Show all media titles from the Db by rating equal or above present. """
+        """ stage 4. Show all media titles from the Db by rating equal or above present, page by page. """
         rating = self._rating_input()
-        data = self.dbm.get_titles_by_rating(rating)
-        data = {"Search": data}
+        self.pager = KeysetPager(partial(self.dbm.get_title_page, my_rating=rating))
+        data = {"Search": self.pager.next_page()}
         self.stage = 5
         self.from_db = True
         self.print_search_results(data)
 
+    def db_filter_media(self) -> None:
+        """ Stage 4. Filter media titles by facets, print facet counts and show results page by page. """
+        print("\nLeave empty to skip a filter.")
+        try:
+            query = self._facet_query_input()
+            result = self.dbm.find_titles(query.limit(PAGE_SIZE))
+        except ValueError as e:
+            print(f"\nInvalid input: {e}")
+            return
+        except Exception as e:
+            print(e)
+            return
+
+        # Facet counts of all matching titles
+        print(f"\nFound: {result['total']}")
+        for name, counts in result["facets"].items():
+            top = ", ".join(f"{value} ({n})" for value, n in islice(counts.items(), 10))
+            print(f"{name.capitalize():<8} {top}")
+        input("\nPress 'enter' to show titles...")
+
+        # Further pages are read without facets
+        query.facets()
+        self.pager = ResultPager(self._iter_found(query, result), total=result["total"])
+        data = {"Search": self.pager.next_page()}
+        self.stage = 5
+        self.from_db = True
+        self.print_search_results(data)
+
+    def _facet_query_input(self) -> TitleQuery:
+        # Ask for every filter, empty input skips it
+        query = TitleQuery()
+        genres = input("Genres (comma-separated): ").strip()
+        if genres:
+            query.genre(*[g.strip() for g in genres.split(",") if g.strip()])
+        countries = input("Countries (comma-separated): ").strip()
+        if countries:
+            query.country(*[c.strip() for c in countries.split(",") if c.strip()])
+        person = input("Person: ").strip()
+        if person:
+            role = input(f"Role ({'/'.join(ROLES)}, default: any): ").strip().lower()
+            query.person(person, role or None)
+        title_type = input("Type (movie/series): ").strip()
+        if title_type:
+            query.type(title_type)
+        year_from = input("Year from: ").strip()
+        year_to = input("Year to: ").strip()
+        query.years(int(year_from) if year_from else None, int(year_to) if year_to else None)
+        imdb_rating = input("Minimal IMDb rating: ").strip()
+        if imdb_rating:
+            query.imdb_rating(float(imdb_rating))
+        my_rating = input("Minimal my rating: ").strip()
+        if my_rating:
+            query.my_rating(int(my_rating))
+        sort = input(f"Sort by ({'/'.join(SORT_KEYS)}, default: title): ").strip().lower()
+        if sort:
+            query.order_by(sort, descending=sort != "title")
+        return query
+
+    def _iter_found(self, query: TitleQuery, first: dict) -> Iterable[dict]:
+        # Titles of the first result, then the following pages by offset
+        yield from first["titles"]
+        offset = len(first["titles"])
+        while offset < first["total"]:
+            titles = self.dbm.find_titles(query.limit(PAGE_SIZE, offset))["titles"]
+            if not titles:
+                return
+            yield from titles
+            offset += len(titles)
+
+    def db_full_text_search(self) -> None:
+        """ Stage 4. Ranked full-text search in My Database, results with highlighted snippets page by page. """
+        text = input("Search for (words or word beginnings): ").strip()
+        try:
+            result = self.dbm.search_full_text(text, limit=PAGE_SIZE)
+        except ValueError as e:
+            print(f"\nInvalid input: {e}")
+            return
+        except Exception as e:
+            print(e)
+            return
+
+        self.pager = ResultPager(self._iter_full_text(text, result), total=result["total"])
+        data = {"Search": self.pager.next_page()}
+        self.stage = 5
+        self.from_db = True
+        self.print_search_results(data)
+
+    def _iter_full_text(self, text: str, first: dict) -> Iterable[dict]:
+        # Titles of the first result, then the following pages by offset
+        yield from first["titles"]
+        offset = len(first["titles"])
+        while offset < first["total"]:
+            titles = self.dbm.search_full_text(text, limit=PAGE_SIZE, offset=offset)["titles"]
+            if not titles:
+                return
+            yield from titles
+            offset += len(titles)
+
     # Universal methods
     def print_search_results(self, data: dict[str, list[dict[str, str]]]) -> None:
         """ Main function for stage 5. Print search results. """
@@ -338,27 +555,46 @@ class CLI:
             year_str = result.get('Year')
             imdb_id_str = result.get('imdbID')
             description = f'{title_str:<50} {year_str:<6} {imdb_id_str}'
+            if result.get('Snippet'):
+                # Full-text search results show where the words were found
+                description += f"\n      {result['Snippet']}"
 
             if self.from_db:
                 self.actions.append((partial(self.db_get_media_by_imdbid, imdb_id_str), description))
             else:
                 self.actions.append((partial(self.client.get_title_by_imdbid, imdb_id_str), description))
 
+        # Page navigation
+        if self.pager is not None:
+            if self.pager.has_prev:
+                self.actions.append((self.search_prev_page, "<< Previous page"))
+            if self.pager.has_next:
+                self.actions.append((self.search_next_page, ">> Next page"))
+
         ### Print menu
         # Format width of menu counter
-        results_len = len(results)
-        if results_len < 10: n_width = 1
-        elif results_len < 100: n_width = 2
-        else: n_width = 3
+        results_len = len(self.actions)
+        n_width = len(str(results_len))
 
         # Print self.action list
         for i, (_, description) in enumerate(self.actions, start=1):
             print(f'[{i:>{n_width}}] {description}')
+        if self.pager is not None:
+            pages = f" of {-(-self.pager.total // self.pager.page_size)}" if self.pager.total else ""
+            print(f'\nPage {self.pager.index + 1}{pages}')
         # Print Go back and exit cases
         print(f'\n[{0:>{n_width}}] Go back to previous menu')
         print(f'[{"q":>{n_width}}] Exit')
         self.print_search_flag = True
 
+    def search_next_page(self) -> None:
+        """ Stage 5. Show next page of search results. """
+        self.print_search_results({"Search": self.pager.next_page()})
+
+    def search_prev_page(self) -> None:
+        """ Stage 5. Show previous page of search results (already loaded). """
+        self.print_search_results({"Search": self.pager.prev_page()})
+
     def media_show(self) -> None:
         """ Stage 6. Print FULL information about actual media title. """
         print('\n' + '-' * 75 + '\n')
@@ -403,6 +639,32 @@ class CLI:
             if stdin in QUIT_SET:
                 self.quit()
 
+    def show_metrics(self) -> None:
+        """ Stage 1. Print collected metrics and optionally save them in Prometheus text format. """
+        snapshot = metrics.registry.snapshot()
+        if not snapshot:
+            print("\nNo metrics collected yet.")
+            return
+
+        print(f"\n{'event':<14} {'labels':<42} {'count':>7} {'total, ms':>10} {'avg, ms':>8} {'max, ms':>8}  counts")
+        for item in snapshot:
+            labels = ", ".join(f"{k}={v}" for k, v in item["labels"].items())
+            counts = ", ".join(f"{field}={item[field]}" for field in metrics.COUNTED_FIELDS if field in item)
+            print(f"{item['event']:<14} {labels:<42} {item['count']:>7} {item['seconds'] * 1000:>10.1f} "
+                  f"{item['seconds'] * 1000 / item['count']:>8.2f} {item['max_seconds'] * 1000:>8.2f}  {counts}")
+        if self.dbm.title_cache is not None:
+            stats = self.dbm.cache_stats
+            print(f"\nTitle cache: {stats['size']} titles, hit ratio {stats['hit_ratio']:.0%}")
+
+        if input("\nSave in Prometheus format? (y/n): ").lower() == 'y':
+            full_path = self._path_handler('prom', 'moviedb_metrics')
+            try:
+                with open(full_path, "w", encoding="utf-8") as f:
+                    f.write(metrics.registry.to_prometheus())
+                print("File has been saved.")
+            except OSError as e:
+                print(f"Failed to save metrics: {e}")
+
     def save_json(self) -> None:
         """ Stage 6. Save media title to JSON. """
         full_path = self._path_handler('json')
@@ -427,6 +689,41 @@ class CLI:
         except OSError as e:
             print(f"Failed to save YAML: {e}")
 
+    def db_export_all(self) -> None:
+        """ Stage 4. Export all media titles from the Db into one file (streamed from Db). """
+        self._export_stream(self.dbm.iter_titles, "moviedb")
+
+    def db_export_filtered(self) -> None:
+        """ Stage 4. Export media titles matching name or rating filter into one file. """
+        choice = input("Filter by (n)ame or (r)ating: ").lower()
+        if choice == 'n':
+            substring = input("Enter part of title: ")
+            self._export_stream(partial(self.dbm.iter_titles, substring=substring), "moviedb_filtered")
+        elif choice == 'r':
+            rating = self._rating_input()
+            self._export_stream(partial(self.dbm.iter_titles, my_rating=rating), "moviedb_filtered")
+        else:
+            print("\nInvalid choice.")
+
+    def db_export_files(self) -> None:
+        """ Stage 4. Export every media title into its own JSON/YAML file (written in parallel processes). """
+        fmt = input(f"Enter format ({'/'.join(BatchExporter.FORMATS)}, default: json): ").strip().lower() or "json"
+        if fmt not in BatchExporter.FORMATS:
+            print("\nUnknown format.")
+            return
+        folder = input("Enter folder path (default: '/app/files/titles'): ").strip() or "/app/files/titles"
+
+        # Existing files are kept, new files get '_1', '_2', ... suffixes instead
+        try:
+            stats = BatchExporter(folder, fmt).write(self.dbm.iter_titles())
+            print(f"{stats['files']} files have been saved to '{folder}' in {stats['elapsed']:.1f}s "
+                  f"({stats['per_second']:.0f} files/s).")
+        except OSError as e:
+            print(f"Failed to export: {e}")
+        except Exception as e:
+            # E.g. a Db record MediaTitle can't be built from
+            print(f"Something went wrong: {e}")
+
     # Navigation methods
     def search_omdb(self) -> None:
         """ Stage 1. Search OMDb. """
@@ -451,6 +748,7 @@ class CLI:
             # From Search Results to OMDb menu or MyDb menu
             self.stage = 4 if self.from_db else 2
             self.from_db = False
+            self.pager = None
         else:
             self.stage = back_menu[self.stage]
 
@@ -481,7 +779,23 @@ class CLI:
                 continue
             return str(rating)
 
-    def _path_handler(self, ext: str) -> str | None:
+    def _export_stream(self, titles_source: Callable, default_name: str) -> None:
+        # Ask for format and path, then write titles from 'titles_source' one by one
+        fmt = input(f"Enter format ({'/'.join(StreamExporter.FORMATS)}, default: jsonl): ").strip().lower() or "jsonl"
+        if fmt not in StreamExporter.FORMATS:
+            print("\nUnknown format.")
+            return
+        compress = input("Compress with gzip? (y/n): ").lower() == 'y'
+        ext = StreamExporter.FORMATS[fmt] + (".gz" if compress else "")
+        full_path = self._path_handler(ext, default_name)
+
+        try:
+            count = StreamExporter(full_path, fmt, compress).write(titles_source())
+            print(f"{count} titles have been saved.")
+        except OSError as e:
+            print(f"Failed to export: {e}")
+
+    def _path_handler(self, ext: str, default_name: str | None = None) -> str | None:
         """
         Handles save path. Ask for save path and filename. Set default filename / folder.
         Check if path exists. Check if filename exists. Rewrites or ask for new filename.
@@ -495,7 +809,7 @@ class CLI:
         while True:
             # Directory
 
-            path = input(f"\nEnter folder path to save the JSON file (default: "'/app/files'"): ").strip()
+            path = input(f"\nEnter folder path to save the {ext.upper()} file (default: "'/app/files'"): ").strip()
             if not path:
                 path = "/app/files"
 
@@ -519,9 +833,9 @@ class CLI:
                     continue
 
             # Filename
-            filename = input(f"Enter filename without extension: (default: media title name): ").strip()
+            filename = input(f"Enter filename without extension: (default: {default_name or 'media title name'}): ").strip()
             if not filename:
-                filename = self.media.title
+                filename = default_name or self.media.title
 
             filename = re.sub(r'[\\/:"*?<>|]+', '_', filename)
 
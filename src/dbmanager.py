@@ -1,12 +1,21 @@
 import os
 import re
+import threading
 import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Iterable, Iterator
 
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import RealDictCursor, execute_values
+from psycopg2.pool import ThreadedConnectionPool
 from dotenv import load_dotenv
 
+from src import metrics
+from src.cache import LRUCache
 from src.media_title import MediaTitle
+from src.title_query import TitleQuery
 
 
 load_dotenv()
@@ -16,91 +25,347 @@ db_password = os.getenv("DB_PASSWORD")
 class DbDuplicateMovieError(Exception): pass
 class DbMovieNotFoundError(Exception): pass
 
+# Aggregated title record. Every read path goes through this statement so all of them return the same shape.
+# It reads the denormalized 'title_documents' table (see refresh_title_documents() in docker/init.sql),
+# so a lookup by imdbID is a single index fetch instead of a join of seven tables.
+# '{where}' is replaced with the filter conditions built by DbManager._title_filters()
+TITLE_SELECT = """SELECT
+    t.title AS "Title",
+    t.year AS "Year",
+    t.poster AS "Poster",
+    t.runtime AS "Runtime",
+    t.plot AS "Plot",
+    t.awards AS "Awards",
+    t.imdbid AS "imdbID",
+    t.imdb_rating AS "imdbRating",
+    t.type AS "Type",
+    t.my_rating AS "MyRating",
+    -- lists of genres, countries and people as comma-separated strings
+    COALESCE(NULLIF(ARRAY_TO_STRING(t.genres, ', '), ''), '{{}}') AS "Genre",
+    COALESCE(NULLIF(ARRAY_TO_STRING(t.countries, ', '), ''), '{{}}') AS "Country",
+    COALESCE(NULLIF(ARRAY_TO_STRING(t.directors, ', '), ''), '{{}}') AS "Director",
+    COALESCE(NULLIF(ARRAY_TO_STRING(t.actors, ', '), ''), '{{}}') AS "Actors",
+    COALESCE(NULLIF(ARRAY_TO_STRING(t.writers, ', '), ''), '{{}}') AS "Writer"
+    FROM title_documents t
+    WHERE {where}
+    ORDER BY t.title_id
+"""
+
+# Title summary for list views: only columns of 'titles' itself, no joins and no aggregation
+SUMMARY_COLUMNS = """t.title AS "Title", t.year AS "Year", t.imdbid AS "imdbID",
+    t.imdb_rating AS "imdbRating", t.my_rating AS "MyRating"
+"""
+# Columns that can be refreshed from OMDb (see src/enrichment.py): column -> OMDb field
+ENRICHABLE_COLUMNS = {"imdb_rating": "imdbRating", "poster": "Poster", "plot": "Plot", "awards": "Awards",
+                      "runtime": "Runtime"}
+# Titles whose OMDb fetch failed wait this long before the next stale read, doubled with every failure in a row
+SYNC_RETRY_BACKOFF = timedelta(hours=1)
+SYNC_RETRY_MAX_BACKOFF = timedelta(days=30)
+
+SUMMARY_SELECT = f"""SELECT {SUMMARY_COLUMNS} FROM titles t WHERE {{where}} ORDER BY t.title_id"""
+
+# Ranked full-text search (title_documents.search_vector, see docker/migrations/004_full_text_search.sql).
+# Only the requested page is joined back and highlighted - ts_headline is the expensive part.
+FULL_TEXT_SELECT = f"""WITH query AS (SELECT to_tsquery('english', %(query)s) AS q),
+matched AS (
+    SELECT d.title_id, ts_rank_cd(d.search_vector, query.q) AS rank, COUNT(*) OVER () AS total
+    FROM title_documents d, query
+    WHERE d.search_vector @@ query.q
+    ORDER BY rank DESC, d.title
+    LIMIT %(limit)s OFFSET %(offset)s
+)
+SELECT {SUMMARY_COLUMNS.strip()}, m.rank AS "Rank", m.total,
+    ts_headline('english',
+        CONCAT_WS(' | ', t.plot, ARRAY_TO_STRING(t.directors || t.actors || t.writers, ', '), t.awards),
+        query.q, 'StartSel=<<, StopSel=>>, MaxWords=18, MinWords=6, MaxFragments=2, FragmentDelimiter=" ... "'
+    ) AS "Snippet"
+FROM matched m JOIN title_documents t USING (title_id), query
+ORDER BY m.rank DESC, t.title"""
+
+
+class InstrumentedCursor(RealDictCursor):
+    """ RealDictCursor that records duration and row count of every statement (used while metrics are enabled). """
+    def execute(self, query, vars=None):
+        start = time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        finally:
+            metrics.db_round_trip()
+            metrics.record("db_query", start, statement=statement_label(query), rows=max(self.rowcount, 0))
+
+
+def statement_label(query) -> str:
+    # Low-cardinality name of a statement: command and first table, e.g. 'select title_documents'
+    text = query.decode("utf-8", "replace") if isinstance(query, bytes) else str(query)
+    command = text.split(None, 1)[0].lower() if text.strip() else ""
+    table = re.search(r"\b(?:FROM|INTO|UPDATE)\s+(\w+)", text[:2000], re.IGNORECASE)
+    return f"{command} {table.group(1).lower()}" if table else command
+
+
 class DbManager:
     """
     DbManagement — manages the movie database, handling connections, queries, and CRUD operations.
     Provides methods to add, fetch, search, and filter movies while ensuring transactional safety.
+
+    Connection modes:
+        - Single (default): one connection shared by all calls, serialized with a lock (title streams open their own).
+        - Pooled (max_connections is set): calls borrow connections from a thread-safe pool, so one DbManager
+          can be shared by several threads. Calls wait for a free connection when the pool is exhausted.
+    Every call runs on its own cursor in its own transaction. Connections idle longer than
+    health_check_interval seconds are pinged before use, and broken connections are replaced.
+
+    Aggregated records fetched by imdbID can be kept in a bounded LRU cache ('cache_size' titles, off by default).
+    Writes made through this DbManager (add_title(s), update_rating) update or invalidate cached records;
+    writes of other processes are seen once the record expires ('cache_ttl' seconds).
+    While src.metrics is enabled, public calls (round trips, duration) and every statement are recorded.
     """
 
-    def __init__(self, database = "moviedb", host = "db", port = "5432", user = db_user, password = db_password):
-        self.conn = psycopg2.connect(
+    def __init__(self, database = "moviedb", host = "db", port = "5432", user = db_user, password = db_password,
+                 min_connections: int = 1, max_connections: int | None = None, health_check_interval: float = 30,
+                 cache_size: int = 0, cache_ttl: float | None = 60):
+        self.dsn = dict(
             database = database,
             host = host,
             port = port,
             user = user,
             password = password
         )
-        self.cur = self.conn.cursor(cursor_factory = RealDictCursor)
-
+        self.health_check_interval = health_check_interval
+        self._last_used: dict[int, float] = {}  # id(connection) -> time of last successful use
+        self.title_cache = LRUCache(cache_size) if cache_size else None  # imdbID -> aggregated record
+        self.cache_ttl = cache_ttl
+        # Bumped by every invalidation: a record read before a write must not be cached after it
+        self._cache_version = 0
+        self._cache_lock = threading.Lock()
+
+        if max_connections:
+            # Pooled mode
+            if not 0 <= min_connections <= max_connections:
+                raise ValueError("Expected 0 <= min_connections <= max_connections.")
+            self.pool = ThreadedConnectionPool(min_connections, max_connections, **self.dsn)
+            self._slots = threading.BoundedSemaphore(max_connections)
+            self.conn = None
+            self.cur = None
+        else:
+            # Single connection mode
+            self.pool = None
+            self._lock = threading.RLock()
+            self.conn = psycopg2.connect(**self.dsn)
+            self.cur = self.conn.cursor(cursor_factory = RealDictCursor)
+            self._last_used[id(self.conn)] = time.monotonic()
+
+    @metrics.db_call
     def add_title(self, title: MediaTitle, my_rating: str) -> bool:
-        # Checking for existing title
-        if self.query_record_exist_imdbid(title.imdbid):
+        # Adding title to Db (existing title is reported by the insert itself)
+        if not self.query_add_title(title, my_rating):
             raise DbDuplicateMovieError(f"Movie {title.title} already exists in Db")
+        self._invalidate(title.imdbid)
+        return True
 
-        # Adding title to Db
-        query = self.query_add_title(title, my_rating)
-        return query
-
+    @metrics.db_call
+    def add_titles(self, titles: Iterable[MediaTitle], batch_size: int = 500) -> dict[str, bool]:
+        """
+        Bulk add titles to Db. Every batch is written with set-based inserts in one transaction.
+        User rating of each title is taken from MediaTitle.my_rating.
+        :return: dict[str, bool]: imdbID -> True if title was added, False if it already exists in Db
+        """
+        if batch_size < 1:
+            raise ValueError("Batch size must be a positive number.")
+
+        result = {}
+        batch = []
+        for title in titles:
+            batch.append((title, title.my_rating))
+            if len(batch) == batch_size:
+                result.update(self.query_add_titles(batch))
+                batch = []
+        if batch:
+            result.update(self.query_add_titles(batch))
+
+        for imdbid, added in result.items():
+            if added:
+                self._invalidate(imdbid)
+        return result
+
+    @metrics.db_call
     def get_title_by_imdbid(self, imdbid) -> dict[str, str] | None :
         # Format checking
         if not re.fullmatch(r"tt\d{7,9}", imdbid):
             raise ValueError("Invalid IMDb ID format. Expected format: 'tt123456789'")
 
-        # Checking if movie exists
-        if self.query_record_exist_imdbid(imdbid):
-            return self.query_get_title_by_imdbid(imdbid)
+        # Cache lookup (copy is returned, so callers can't change cached record)
+        if self.title_cache is not None:
+            title = self.title_cache.get(imdbid)
+            if title is not None:
+                return dict(title)
+        version = self._cache_version
 
-        else:
+        # Fetching title (existence check included - no row means no title)
+        title = self.query_get_title_by_imdbid(imdbid)
+        if title is None:
             raise DbMovieNotFoundError(f"Title with IMDbID {imdbid} not found.")
-
+        if self.title_cache is not None:
+            with self._cache_lock:
+                # Skipped if a write went through meanwhile - the record may be older than that write
+                if self._cache_version == version:
+                    self.title_cache.set(imdbid, dict(title), ttl=self.cache_ttl)
+        return title
+
+    @metrics.db_call
     def get_title_by_name(self, title_name) -> dict[str, str] | None:
-        imdbid = self.query_get_title_by_name(title_name)
-        if imdbid:
-            return self.get_title_by_imdbid(imdbid)
+        titles = self.query_get_titles(title_name=title_name)
+        if titles:
+            return titles[0]
         else:
             raise DbMovieNotFoundError(f"Title with name {title_name} not found.")
 
-    def get_titles_by_rating(self, my_rating: str) -> list[dict[str, str]]:
+    @metrics.db_call
+    def get_titles_by_imdbids(self, imdbids: list[str]) -> list[dict[str, str]]:
+        """
+        Get list of titles from Db by their imdbIDs. Unknown imdbIDs are skipped.
+        :return: list[dict]: List of aggregated titles
+        """
+        # Format checking
+        for imdbid in imdbids:
+            if not re.fullmatch(r"tt\d{7,9}", imdbid):
+                raise ValueError(f"Invalid IMDb ID format: '{imdbid}'. Expected format: 'tt123456789'")
+
+        return self.query_get_titles(imdbids=imdbids) if imdbids else []
+
+    @metrics.db_call
+    def get_titles_by_rating(self, my_rating: str, summary: bool = False) -> list[dict[str, str]]:
         """
         Get list of MediaTitles from Db that has my_rating equal to or greater than presented
+        :param summary: Return only summary columns (Title, Year, imdbID, imdbRating, MyRating)
         :return: list[MediaTitle]: List of MediaTitle objects
          or above presented
         """
-        # Getting list of imdbIDs
-        query = self.query_get_titles_by_rating(my_rating)
+        return self.query_get_titles(my_rating=my_rating, summary=summary)
 
-        # Returning list of MediaTitles
-        return [self.get_title_by_imdbid(imdbid) for imdbid in query] if query else []
-
-    def get_all_titles(self) -> list[dict[str, str]]:
+    @metrics.db_call
+    def get_all_titles(self, summary: bool = False) -> list[dict[str, str]]:
         """
         Get all titles from Db
+        :param summary: Return only summary columns (Title, Year, imdbID, imdbRating, MyRating)
         :return: list[MediaTitle]: List of MediaTitle objects
         """
-        # Getting list of imdbIDs
-        query = self.query_get_all_titles()
-
-        # Returning list of MediaTitles
-        return [self.get_title_by_imdbid(imdbid) for imdbid in query] if query else []
+        return self.query_get_titles(summary=summary)
 
-    def search_titles_by_name(self, substring: str) -> list[dict[str, str]]:
+    @metrics.db_call
+    def search_titles_by_name(self, substring: str, summary: bool = False) -> list[dict[str, str]]:
         """
         Search titles by partial name.
+        :param summary: Return only summary columns (Title, Year, imdbID, imdbRating, MyRating)
         :return: list[MediaTitle]: List of MediaTitle objects
         """
-        # Getting list of imdbIDs that match the pattern 'substring'
-        query = self.query_search_titles_by_name(substring)
+        return self.query_get_titles(substring=substring, summary=summary)
+
+    @metrics.db_call
+    def get_title_page(self, after: str | None = None, before: str | None = None, limit: int = 10,
+                       my_rating: str | None = None, substring: str | None = None) -> list[dict[str, str]]:
+        """
+        One page of title summaries (see SUMMARY_COLUMNS) ordered by title, with keyset pagination:
+        'after' / 'before' is the title of the last / first row of the neighbouring page.
+        :return: list[dict]: Up to 'limit' summaries
+        """
+        if after is not None and before is not None:
+            raise ValueError("Expected only one of 'after' and 'before'.")
+        return self.query_get_title_page(after, before, limit, my_rating, substring)
+
+    @metrics.db_call
+    def find_titles(self, query: TitleQuery) -> dict:
+        """
+        Faceted search. Filters, sorting, page and facets come from TitleQuery; everything is read in one statement.
+        :return: dict: 'titles' - page of summaries, 'total' - number of all matching titles,
+         'facets' - facet name -> {value: number of matching titles}, most frequent first
+        """
+        return self.query_find_titles(query)
+
+    @metrics.db_call
+    def search_full_text(self, text: str, limit: int = 20, offset: int = 0) -> dict:
+        """
+        Full-text search in titles, plots, awards and names of people. Every word must match, as a word prefix
+        ('heis' finds 'heist'); English stemming and stop words apply.
+        :return: dict: 'titles' - page of summaries with 'Rank' and highlighted 'Snippet' (matches in <<...>>),
+         best ranked first, 'total' - number of all matching titles
+        """
+        query = self.to_prefix_tsquery(text)
+        if not query:
+            raise ValueError("Search text must contain at least one word.")
+        return self.query_search_full_text(query, limit, offset)
+
+    @metrics.db_call
+    def get_enrichable_page(self, after: str | None = None, limit: int = 500,
+                            only_missing: bool = False) -> list[dict]:
+        """
+        Page of imdbIDs with their ENRICHABLE_COLUMNS, ordered by imdbID (keyset pagination, 'after' is the last
+        imdbID of the previous page). Every page is a short transaction, so writes can go on between pages.
+        :param only_missing: Only titles with an empty or 'N/A' poster, plot, awards or runtime
+        """
+        return self.query_get_enrichable_page(after, limit, only_missing)
 
-        # Returning list of MediaTitles
-        return [self.get_title_by_imdbid(imdbid) for imdbid in query] if query else []
+    @metrics.db_call
+    def get_stale_page(self, synced_before: datetime, after: tuple[datetime | None, str] | None = None,
+                       limit: int = 500) -> list[dict]:
+        """
+        Page of titles last synced from OMDb before 'synced_before' (or never), stalest first, as
+        get_enrichable_page rows plus 'synced_at' (None if never synced).
+        Titles whose last fetch failed are left out until their retry backoff (SYNC_RETRY_BACKOFF) has passed.
+        'after' is (synced_at, imdbID) of the last row of the previous page.
+        """
+        return self.query_get_stale_page(synced_before, after, limit)
 
+    @metrics.db_call
+    def update_title_fields(self, updates: dict[str, dict], synced: dict[str, datetime] | None = None,
+                            failed: dict[str, datetime] | None = None) -> int:
+        """
+        Write new values of ENRICHABLE_COLUMNS for many titles with one grouped UPDATE, and refresh their documents.
+        Rows whose values are the same already are not written.
+        :param updates: imdbID -> {column: new value}; missing columns keep their values
+        :param synced: imdbID -> time its OMDb data was fetched (saved in 'title_sync', same transaction)
+        :param failed: imdbID -> time its OMDb fetch failed (counted in 'title_sync', delays the next attempt)
+        :return: int: Number of changed titles
+        """
+        for imdbid, values in updates.items():
+            unknown = set(values) - set(ENRICHABLE_COLUMNS)
+            if unknown:
+                raise ValueError(f"Columns can't be updated: {', '.join(sorted(unknown))}")
+        if not updates and not synced and not failed:
+            return 0
+
+        updated = self.query_update_title_fields(updates, synced or {}, failed or {})
+        for imdbid in updated:
+            self._invalidate(imdbid)
+        return len(updated)
+
+    @metrics.db_call
     def update_rating(self, imdbid: str, rating: str):
         # Format checking
         if not re.fullmatch(r"tt\d{7,9}", imdbid):
             raise ValueError("Invalid IMDb ID format. Expected value: 'tt0000000'")
 
-        # Updating rating in Db
-        return self.query_update_rating(imdbid, rating)
+        # Updating rating in Db, then in cached record (if any)
+        updated = self.query_update_rating(imdbid, rating)
+        if self.title_cache is not None:
+            with self._cache_lock:
+                self._cache_version += 1
+                title = self.title_cache.peek(imdbid) if updated else None
+                if title is not None:
+                    self.title_cache.set(imdbid, {**title, "MyRating": int(rating)}, ttl=self.cache_ttl)
+                else:
+                    self.title_cache.delete(imdbid)
+        return updated
+
+    @property
+    def cache_stats(self) -> dict:
+        """ Title cache hits, misses, hit ratio and size (empty dict if cache is disabled). """
+        return self.title_cache.stats if self.title_cache is not None else {}
+
+    def _invalidate(self, imdbid: str) -> None:
+        if self.title_cache is not None:
+            with self._cache_lock:
+                self._cache_version += 1
+                self.title_cache.delete(imdbid)
 
     # def delete_title(self, title):
     #     """
@@ -110,195 +375,411 @@ class DbManager:
     #     pass
 
     def query_add_title(self, title: MediaTitle, my_rating: str) -> bool:
-        # Movie/Series checking - additional types could be implemented in the future
-        t_type = 1 if title.title_type == "movie" else 2
+        # Returns FALSE if title already exists in Db
+        return self.query_add_titles([(title, my_rating)])[title.imdbid]
 
-        # Db INSERT
-        try:
+    def query_add_titles(self, batch: list[tuple[MediaTitle, str]]) -> dict[str, bool]:
+        """
+        Insert batch of (MediaTitle, my_rating) pairs in one transaction.
+        Titles that conflict with existing ones (same imdbID or title name) are skipped and reported as False.
+        """
+        # Repeated imdbIDs inside the batch - first one wins
+        unique = {}
+        for title, my_rating in batch:
+            unique.setdefault(title.imdbid, (title, my_rating))
+        status = dict.fromkeys(unique, False)
+        if not unique:
+            return status
+
+        # Db INSERT (any exception -> rollback whole batch)
+        with self._transaction() as cur:
             # INSERT into 'titles' table
-            self.cur.execute(
-                """INSERT INTO titles (title, year, runtime, poster, plot, awards, imdb_rating, imdbID, type_id, my_rating) 
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s) RETURNING title_id""",
-                (title.title, title.year, title.runtime, title.poster, title.plot, title.awards,
-                 title.imdb_rating, title.imdbid, t_type, my_rating)
+            # Movie/Series checking - additional types could be implemented in the future
+            rows = execute_values(
+                cur,
+                """INSERT INTO titles (title, year, runtime, poster, plot, awards, imdb_rating, imdbID, type_id, my_rating)
+                VALUES %s ON CONFLICT DO NOTHING RETURNING title_id, imdbid""",
+                [(title.title, title.year, title.runtime, title.poster, title.plot, title.awards, title.imdb_rating,
+                  title.imdbid, 1 if title.title_type == "movie" else 2, my_rating)
+                 for title, my_rating in unique.values()],
+                page_size=len(unique),
+                fetch=True
             )
-            title_id = self.cur.fetchone()['title_id']
-
-            # INSERT into 'people' table
-            # ACTORS
-            actors = []
-            for actor in title.actors:
-                self.cur.execute("SELECT person_id FROM people WHERE name = %s;", (actor,))
-                row = self.cur.fetchone()
-                if row is not None:
-                    person_id = row['person_id']
-                else:
-                    self.cur.execute("INSERT INTO people (name) VALUES (%s) RETURNING person_id", (actor,))
-                    person_id = self.cur.fetchone()['person_id']
-                actors.append(person_id)
-
-            # WRITERS / CREATORS
-            writers = []
-            for writer in title.writers:
-                self.cur.execute("SELECT person_id FROM people WHERE name = %s;", (writer,))
-                row = self.cur.fetchone()
-                if row is not None:
-                    person_id = row['person_id']
-                else:
-                    self.cur.execute("INSERT INTO people (name) VALUES (%s) RETURNING person_id", (writer,))
-                    person_id = self.cur.fetchone()['person_id']
-                writers.append(person_id)
-
-            # DIRECTORS
-            # I think that it's possible that some title would have more than one director so...
-            directors = []
-            if title.director != "N/A":
-                for director in title.director:
-                    self.cur.execute("SELECT person_id FROM people WHERE name = %s;", (director,))
-                    row = self.cur.fetchone()
-                    if row is not None:
-                        person_id = row['person_id']
-                    else:
-                        self.cur.execute("INSERT INTO people (name) VALUES (%s) RETURNING person_id", (director,))
-                        person_id = self.cur.fetchone()['person_id']
-                    directors.append(person_id)
+            added = {row['imdbid']: row['title_id'] for row in rows}
+            titles = [(added[imdbid], title) for imdbid, (title, _) in unique.items() if imdbid in added]
 
             # INSERT into 'title_roles' table
-            # ACTORS
-            for person_id in actors:
-                self.cur.execute("INSERT INTO title_roles (title_id, person_id, role) VALUES (%s, %s, %s)",
-                                 (title_id, person_id, "actor"))
-
-            # WRITERS / CREATORS
-            role = "writer" if t_type == 1 else "creator"
-            for person_id in writers:
-                self.cur.execute("INSERT INTO title_roles (title_id, person_id, role) VALUES (%s, %s, %s)",
-                                 (title_id, person_id, role))
-
-            # DIRECTORS
-            if directors:
-                for person_id in directors:
-                    self.cur.execute("INSERT INTO title_roles (title_id, person_id, role) VALUES (%s, %s, %s)",
-                                     (title_id, person_id, "director"))
-
-            # INSERT into 'genres' table
-            genres = []
-            for genre in title.genre:
-                self.cur.execute("SELECT genre_id FROM genres WHERE name = %s;", (genre,))
-                row = self.cur.fetchone()
-                if row is not None:
-                    genre_id = row['genre_id']
-                else:
-                    self.cur.execute("INSERT INTO genres (name) VALUES (%s) RETURNING genre_id", (genre,))
-                    genre_id = self.cur.fetchone()['genre_id']
-                genres.append(genre_id)
+            # Writers of series are stored as creators
+            # I think that it's possible that some title would have more than one director so...
+            roles = set()
+            for title_id, title in titles:
+                writer_role = "writer" if title.title_type == "movie" else "creator"
+                roles.update((title_id, name, "actor") for name in title.actors)
+                roles.update((title_id, name, writer_role) for name in title.writers)
+                if title.director != ["N/A"]:
+                    roles.update((title_id, name, "director") for name in title.director)
+
+            people = self._upsert_names(cur, "people", "person_id", {name for _, name, _ in roles})
+            self._insert_links(
+                cur,
+                "INSERT INTO title_roles (title_id, person_id, role) VALUES %s ON CONFLICT DO NOTHING",
+                [(title_id, people[name], role) for title_id, name, role in roles],
+                "(%s, %s, %s::role_type)"
+            )
 
             # INSERT into 'title_genres' table
-            for genre in genres:
-                self.cur.execute("INSERT INTO title_genres (title_id, genre_id) VALUES (%s, %s)", (title_id, genre,))
-
-            # INSERT into 'countries' table
-            countries = []
-            for country in title.country:
-                self.cur.execute("SELECT country_id FROM countries WHERE name = %s;", (country,))
-                row = self.cur.fetchone()
-                if row is not None:
-                    country_id = row['country_id']
-                else:
-                    self.cur.execute("INSERT INTO countries (name) VALUES (%s) RETURNING country_id", (country,))
-                    country_id = self.cur.fetchone()['country_id']
-                countries.append(country_id)
+            title_genres = {(title_id, genre) for title_id, title in titles for genre in title.genre}
+            genres = self._upsert_names(cur, "genres", "genre_id", {genre for _, genre in title_genres})
+            self._insert_links(
+                cur,
+                "INSERT INTO title_genres (title_id, genre_id) VALUES %s ON CONFLICT DO NOTHING",
+                [(title_id, genres[genre]) for title_id, genre in title_genres]
+            )
 
             # INSERT into 'title_countries' table
-            for country in countries:
-                self.cur.execute("INSERT INTO title_countries (title_id, country_id) VALUES (%s, %s)",
-                                 (title_id, country))
-
-            # If everything is fine...
-            self.conn.commit()
-            return True
+            title_countries = {(title_id, country) for title_id, title in titles for country in title.country}
+            countries = self._upsert_names(cur, "countries", "country_id", {country for _, country in title_countries})
+            self._insert_links(
+                cur,
+                "INSERT INTO title_countries (title_id, country_id) VALUES %s ON CONFLICT DO NOTHING",
+                [(title_id, countries[country]) for title_id, country in title_countries]
+            )
 
-        except Exception as e:
-            # If any exception -> rollback
-            self.conn.rollback()
-            raise e
-
-    def query_get_titles_by_rating(self, my_rating: str) -> list[str]:
-        self.cur.execute("SELECT imdbid from titles WHERE my_rating >= %s", (my_rating,))
-        rows = self.cur.fetchall()
-        return [row["imdbid"] for row in rows]
-
-    def query_get_all_titles(self) -> list[str]:
-        self.cur.execute("SELECT imdbid FROM titles")
-        rows = self.cur.fetchall()
-        return [row["imdbid"] for row in rows]
-
-    def query_get_title_by_name(self, title_name: str) -> str | None:
-        # Returns imdbID if it finds title or None if it's not
-        self.cur.execute("SELECT imdbid FROM titles WHERE LOWER(title) = LOWER(%s);", (title_name,))
-        rows = self.cur.fetchall()
+            # Read model of added titles
+            if added:
+                cur.execute("SELECT refresh_title_documents(%s);", (list(added.values()),))
+
+        status.update(dict.fromkeys(added, True))
+        return status
+
+    @staticmethod
+    def _upsert_names(cur, table: str, id_column: str, names: set[str]) -> dict[str, int]:
+        # Inserts missing names into 'people' / 'genres' / 'countries' and returns name -> id for all of them
+        if not names:
+            return {}
+        # Sorted names keep lock order stable between concurrent batches
+        names = sorted(names)
+        cur.execute(
+            f"""WITH inserted AS (
+                    INSERT INTO {table} (name) SELECT UNNEST(%s::text[])
+                    ON CONFLICT (name) DO NOTHING
+                    RETURNING {id_column}, name
+                )
+                SELECT {id_column}, name FROM inserted
+                UNION ALL
+                SELECT {id_column}, name FROM {table} WHERE name = ANY(%s::text[]);""",
+            (names, names)
+        )
+        ids = {row['name']: row[id_column] for row in cur.fetchall()}
+        # Names committed by a concurrent batch while this statement ran are skipped by DO NOTHING and invisible
+        # to its snapshot; a new statement sees them (no write needed, unlike DO UPDATE)
+        missing = [name for name in names if name not in ids]
+        if missing:
+            cur.execute(f"SELECT {id_column}, name FROM {table} WHERE name = ANY(%s::text[]);", (missing,))
+            ids.update((row['name'], row[id_column]) for row in cur.fetchall())
+        return ids
+
+    @staticmethod
+    def _insert_links(cur, query: str, rows: list[tuple], template: str | None = None) -> None:
+        # Writes all link rows of a batch with one statement
         if rows:
-            return rows[0]["imdbid"]
-        else: return None
-
-    def query_get_title_by_imdbid(self, imdbid) -> dict:
-        self.cur.execute("""SELECT
-                    t.title AS "Title", 
-                    t.year AS "Year", 
-                    t.poster AS "Poster", 
-                    t.runtime AS "Runtime", 
-                    t.plot AS "Plot", 
-                    t.awards AS "Awards", 
-                    t.imdbid AS "imdbID", 
-                    t.imdb_rating AS "imdbRating", 
-                    ty.name AS "Type", 
-                    t.my_rating AS "MyRating",
-                    -- s.status_id AS "Status", 
-                    -- list of genres as comma-separated string
-                    COALESCE(STRING_AGG(DISTINCT g.name, ', '), '{}') AS "Genre",
-                    -- list of countries as comma-separated string
-                    COALESCE(STRING_AGG(DISTINCT c.name, ', '), '{}') AS "Country",
-                    -- lists of directors as comma-separated string
-                    COALESCE(STRING_AGG(DISTINCT p.name, ', ') FILTER (WHERE tr.role = 'director'), '{}') AS "Director",
-                    -- lists of actors as comma-separated string
-                    COALESCE(STRING_AGG(DISTINCT p.name, ', ') FILTER (WHERE tr.role = 'actor'), '{}') AS "Actors",
-                    -- lists of writers as comma-separated string
-                    COALESCE(STRING_AGG(DISTINCT p.name, ', ') FILTER (WHERE tr.role IN ('writer', 'creator')), '{}') AS "Writer"
-                    FROM titles t
-                        JOIN types ty ON t.type_id = ty.type_id 
-                     -- JOIN statuses s ON t.status_id = s.status_id
-                        JOIN title_genres tg ON t.title_id = tg.title_id
-                        JOIN genres g ON tg.genre_id = g.genre_id
-                        JOIN title_countries tc ON t.title_id = tc.title_id
-                        JOIN countries c ON tc.country_id = c.country_id
-                        JOIN title_roles tr ON t.title_id = tr.title_id
-                        JOIN people p ON tr.person_id = p.person_id
-                    WHERE t.imdbid = %s
-                    GROUP BY t.title, t.year, t.runtime, t.poster, t.plot, t.awards, t.imdb_rating, t.imdbID, ty.name, t.my_rating; --s.name 
-                    """, (imdbid,))
-        return dict(self.cur.fetchone())
-
-    def query_search_titles_by_name(self, substring) -> list[str]:
-        self.cur.execute("SELECT imdbid FROM titles WHERE title ILIKE %s;", (f"%{substring}%",))
-        rows = self.cur.fetchall()
-        return [row["imdbid"] for row in rows]
+            execute_values(cur, query, sorted(rows), template=template, page_size=len(rows))
 
-    def query_update_rating(self, imdbid: str, rating: str) -> bool:
-        try:
-            self.cur.execute("UPDATE titles SET my_rating = %s WHERE imdbid = %s;", (rating, imdbid))
-            self.conn.commit()
-            return self.cur.rowcount == 1
+    def query_get_title_by_imdbid(self, imdbid) -> dict | None:
+        # Returns aggregated title or None if it's not found
+        titles = self.query_get_titles(imdbids=[imdbid])
+        return titles[0] if titles else None
 
-        except Exception as e:
-            # If any exception -> rollback
-            self.conn.rollback()
-            raise e
+    def query_get_titles(self, imdbids: list[str] | None = None, my_rating: str | None = None,
+                         substring: str | None = None, title_name: str | None = None,
+                         summary: bool = False) -> list[dict]:
+        """
+        Fetch fully aggregated titles in one statement. Filters are combined with AND, no filters means all titles.
+        With 'summary' only columns of 'titles' needed by list views are read (no joins).
+        :return: list[dict]: Titles in the same shape as query_get_title_by_imdbid (or summaries)
+        """
+        where, params = self._title_filters(imdbids, my_rating, substring, title_name)
+        with self._transaction() as cur:
+            cur.execute((SUMMARY_SELECT if summary else TITLE_SELECT).format(where=where), params)
+            return [dict(row) for row in cur.fetchall()]
+
+    def query_get_title_page(self, after: str | None, before: str | None, limit: int,
+                             my_rating: str | None = None, substring: str | None = None) -> list[dict]:
+        # Keyset pagination on the unique 'title' column (uses its index, no OFFSET scans)
+        where, params = self._title_filters(my_rating=my_rating, substring=substring)
+        order = "ASC"
+        if after is not None:
+            where += " AND t.title > %s"
+            params.append(after)
+        elif before is not None:
+            # Previous page is read backwards and turned around
+            where += " AND t.title < %s"
+            params.append(before)
+            order = "DESC"
+
+        with self._transaction() as cur:
+            cur.execute(f"""SELECT {SUMMARY_COLUMNS}
+                            FROM titles t WHERE {where} ORDER BY t.title {order} LIMIT %s;""", (*params, limit))
+            rows = [dict(row) for row in cur.fetchall()]
+        return rows[::-1] if order == "DESC" else rows
+
+    def query_find_titles(self, query: TitleQuery) -> dict:
+        sql, params = query.compile()
+        with self._transaction() as cur:
+            cur.execute(sql, params)
+            return dict(cur.fetchone())
+
+    def iter_titles(self, imdbids: list[str] | None = None, my_rating: str | None = None,
+                    substring: str | None = None, title_name: str | None = None,
+                    itersize: int = 1000) -> Iterator[dict]:
+        """
+        Stream fully aggregated titles (same filters and shape as query_get_titles) through a server-side cursor.
+        Rows are fetched 'itersize' at a time, so memory use doesn't depend on library size.
+        Holds one connection until the generator is exhausted or closed (its own one in single connection mode).
+        """
+        where, params = self._title_filters(imdbids, my_rating, substring, title_name)
+        with self._transaction(name = f"titles_{uuid.uuid4().hex}", itersize = itersize) as cur:
+            cur.execute(TITLE_SELECT.format(where=where), params)
+            for row in cur:
+                yield dict(row)
+
+    def query_search_full_text(self, query: str, limit: int, offset: int) -> dict:
+        with self._transaction() as cur:
+            cur.execute(FULL_TEXT_SELECT, {"query": query, "limit": limit, "offset": offset})
+            rows = [dict(row) for row in cur.fetchall()]
+        total = rows[0].pop("total") if rows else 0
+        for row in rows[1:]:
+            del row["total"]
+        if not rows and offset:
+            # Page past the end - total has to be counted separately
+            with self._transaction() as cur:
+                cur.execute("""SELECT COUNT(*) AS total FROM title_documents
+                               WHERE search_vector @@ to_tsquery('english', %s)""", (query,))
+                total = cur.fetchone()["total"]
+        return {"total": total, "titles": rows}
+
+    @staticmethod
+    def to_prefix_tsquery(text: str) -> str:
+        # Words of the text as tsquery: every word must match as a prefix ('word1:* & word2:*')
+        return " & ".join(f"{word}:*" for word in re.findall(r"[^\W_]+", text.lower()))
 
-    def query_record_exist_imdbid(self, imdbid:str) -> bool:
-        # Returns TRUE if movie exists
-        self.cur.execute("SELECT 1 FROM titles WHERE imdbID = %s;", (imdbid,))
-        return self.cur.fetchone() is not None
+    def query_update_rating(self, imdbid: str, rating: str) -> bool:
+        # If any exception -> rollback
+        with self._transaction() as cur:
+            cur.execute("UPDATE titles SET my_rating = %s WHERE imdbid = %s;", (rating, imdbid))
+            if cur.rowcount != 1:
+                return False
+            cur.execute("UPDATE title_documents SET my_rating = %s WHERE imdbid = %s;", (rating, imdbid))
+            return True
+
+    def query_get_enrichable_page(self, after: str | None, limit: int, only_missing: bool) -> list[dict]:
+        conditions, params = [], []
+        if after is not None:
+            conditions.append("imdbid > %s")
+            params.append(after)
+        if only_missing:
+            conditions.append("(" + " OR ".join(f"COALESCE({column}, 'N/A') IN ('', 'N/A')"
+                                                for column in ENRICHABLE_COLUMNS if column != "imdb_rating") + ")")
+        where = " AND ".join(conditions) or "TRUE"
+        with self._transaction() as cur:
+            cur.execute(f"""SELECT imdbid, {', '.join(ENRICHABLE_COLUMNS)} FROM titles
+                            WHERE {where} ORDER BY imdbid LIMIT %s;""", (*params, limit))
+            return [dict(row) for row in cur.fetchall()]
+
+    def query_get_stale_page(self, synced_before: datetime, after: tuple[datetime | None, str] | None,
+                             limit: int) -> list[dict]:
+        # Keyset pagination on (synced_at, imdbid); never synced titles sort first as '-infinity'.
+        # Failed titles wait SYNC_RETRY_BACKOFF * 2^(failures - 1), at most SYNC_RETRY_MAX_BACKOFF
+        where = ("COALESCE(s.synced_at, '-infinity') < %s AND (s.failures IS NULL OR s.failures = 0"
+                 " OR s.attempted_at + LEAST(%s * power(2, s.failures - 1), %s) <= now())")
+        params = [synced_before, SYNC_RETRY_BACKOFF, SYNC_RETRY_MAX_BACKOFF]
+        if after is not None:
+            where += (" AND (COALESCE(s.synced_at, '-infinity'), t.imdbid)"
+                      " > (COALESCE(%s, '-infinity'::TIMESTAMPTZ), %s)")
+            params += list(after)
+        with self._transaction() as cur:
+            cur.execute(f"""SELECT t.imdbid, {', '.join(f't.{c}' for c in ENRICHABLE_COLUMNS)}, s.synced_at
+                            FROM titles t LEFT JOIN title_sync s ON s.title_id = t.title_id
+                            WHERE {where}
+                            ORDER BY COALESCE(s.synced_at, '-infinity'), t.imdbid LIMIT %s;""", (*params, limit))
+            return [dict(row) for row in cur.fetchall()]
+
+    def query_update_title_fields(self, updates: dict[str, dict], synced: dict[str, datetime],
+                                  failed: dict[str, datetime]) -> list[str]:
+        # One UPDATE ... FROM (VALUES ...) for all titles; NULL keeps the current value.
+        # Rows that would get the values they already have are filtered out - no dead tuples, WAL or refresh for them.
+        # Rows are sorted by imdbID, so concurrent writers lock them in the same order
+        columns = list(ENRICHABLE_COLUMNS)
+        rows = [(imdbid, *(values.get(column) for column in columns)) for imdbid, values in sorted(updates.items())]
+        template = "(%s, " + ", ".join("%s::NUMERIC" if c == "imdb_rating" else "%s" for c in columns) + ")"
+        new_values = [f"COALESCE(v.{c}, t.{c})" for c in columns]
+        updated = []
+        with self._transaction() as cur:
+            if rows:
+                updated = execute_values(
+                    cur,
+                    f"""UPDATE titles t SET {', '.join(f"{c} = {value}" for c, value in zip(columns, new_values))}
+                        FROM (VALUES %s) AS v(imdbid, {', '.join(columns)})
+                        WHERE t.imdbid = v.imdbid
+                            AND ({', '.join(f't.{c}' for c in columns)}) IS DISTINCT FROM ({', '.join(new_values)})
+                        RETURNING t.title_id, t.imdbid""",
+                    rows, template=template, page_size=len(rows), fetch=True
+                )
+            if updated:
+                cur.execute("SELECT refresh_title_documents(%s);", ([row["title_id"] for row in updated],))
+            if synced:
+                execute_values(
+                    cur,
+                    """INSERT INTO title_sync (title_id, synced_at, attempted_at)
+                       SELECT t.title_id, v.synced_at, v.synced_at FROM (VALUES %s) AS v(imdbid, synced_at)
+                           JOIN titles t ON t.imdbid = v.imdbid
+                       ON CONFLICT (title_id) DO UPDATE
+                           SET synced_at = EXCLUDED.synced_at, attempted_at = EXCLUDED.attempted_at, failures = 0""",
+                    sorted(synced.items()), template="(%s, %s::TIMESTAMPTZ)", page_size=len(synced)
+                )
+            if failed:
+                # Last successful sync time is kept - the title stays stale, only its retry is delayed
+                execute_values(
+                    cur,
+                    """INSERT INTO title_sync (title_id, attempted_at, failures)
+                       SELECT t.title_id, v.attempted_at, 1 FROM (VALUES %s) AS v(imdbid, attempted_at)
+                           JOIN titles t ON t.imdbid = v.imdbid
+                       ON CONFLICT (title_id) DO UPDATE
+                           SET attempted_at = EXCLUDED.attempted_at, failures = title_sync.failures + 1""",
+                    sorted(failed.items()), template="(%s, %s::TIMESTAMPTZ)", page_size=len(failed)
+                )
+        return [row["imdbid"] for row in updated]
+
+    def query_existing_imdbids(self, imdbids: list[str]) -> set[str]:
+        # Returns imdbIDs from the list that are already in Db
+        with self._transaction() as cur:
+            cur.execute("SELECT imdbid FROM titles WHERE imdbid = ANY(%s);", (list(imdbids),))
+            return {row["imdbid"] for row in cur.fetchall()}
+
+    @staticmethod
+    def _title_filters(imdbids: list[str] | None = None, my_rating: str | None = None,
+                       substring: str | None = None, title_name: str | None = None) -> tuple[str, list]:
+        # Builds WHERE conditions (for TITLE_SELECT) and their parameters
+        conditions, params = [], []
+        if imdbids is not None:
+            conditions.append("t.imdbid = ANY(%s)")
+            params.append(list(imdbids))
+        if my_rating is not None:
+            conditions.append("t.my_rating >= %s")
+            params.append(my_rating)
+        if substring is not None:
+            conditions.append("t.title ILIKE %s")
+            params.append(f"%{substring}%")
+        if title_name is not None:
+            conditions.append("LOWER(t.title) = LOWER(%s)")
+            params.append(title_name)
+
+        return " AND ".join(conditions) or "TRUE", params
+
+    def ping(self) -> bool:
+        """ Health check. Returns TRUE if Db answers (broken connection is replaced on the way). """
+        try:
+            with self._transaction() as cur:
+                cur.execute("SELECT 1;")
+                return True
+        except psycopg2.Error:
+            return False
+
+    # Connection handling
+    @contextmanager
+    def _transaction(self, name: str | None = None, itersize: int = 1000):
+        """
+        Borrow a connection and yield a new cursor on it ('name' makes it a server-side cursor).
+        Commits when the block finishes, rolls back on any exception.
+        In single connection mode a server-side cursor gets a connection of its own: calls made while a title
+        stream is open run and commit on the shared connection as usual, instead of waiting for the stream.
+        """
+        stream = self.pool is None and name is not None
+        conn = psycopg2.connect(**self.dsn) if stream else self._acquire()
+        try:
+            cursor_factory = InstrumentedCursor if metrics.enabled else RealDictCursor
+            with conn.cursor(name = name, cursor_factory = cursor_factory) as cur:
+                if name:
+                    cur.itersize = itersize
+                yield cur
+            conn.commit()
+            if not stream:
+                self._last_used[id(conn)] = time.monotonic()
+        except BaseException:
+            # Lost connection can't be rolled back - it's dropped in _release()
+            if not conn.closed:
+                conn.rollback()
+            raise
+        finally:
+            if stream:
+                conn.close()
+            else:
+                self._release(conn)
+
+    def _acquire(self):
+        # Returns a healthy connection (waits for a free one in pooled mode)
+        if self.pool is None:
+            self._lock.acquire()
+            try:
+                if not self._is_healthy(self.conn):
+                    self._reconnect()
+                return self.conn
+            except BaseException:
+                self._lock.release()
+                raise
+
+        self._slots.acquire()
+        try:
+            while True:
+                conn = self.pool.getconn()
+                if self._is_healthy(conn):
+                    return conn
+                # Dead connection (e.g. Db container restarted) -> drop it, pool opens a new one
+                self._last_used.pop(id(conn), None)
+                self.pool.putconn(conn, close=True)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def _release(self, conn) -> None:
+        if self.pool is None:
+            self._lock.release()
+            return
+
+        if conn.closed:
+            self._last_used.pop(id(conn), None)
+        self.pool.putconn(conn, close=bool(conn.closed))
+        self._slots.release()
+
+    def _is_healthy(self, conn) -> bool:
+        # Connections used recently are trusted, idle ones are pinged
+        if conn.closed:
+            return False
+        last_used = self._last_used.get(id(conn))
+        if last_used is not None and time.monotonic() - last_used < self.health_check_interval:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1;")
+        except psycopg2.Error:
+            return False
+        self._last_used[id(conn)] = time.monotonic()
+        return True
+
+    def _reconnect(self) -> None:
+        # Single connection mode only
+        try:
+            self.cur.close()
+            self.conn.close()
+        except psycopg2.Error:
+            pass
+        self._last_used.pop(id(self.conn), None)
+        self.conn = psycopg2.connect(**self.dsn)
+        self.cur = self.conn.cursor(cursor_factory = RealDictCursor)
 
     def close(self):
-        self.cur.close()
-        self.conn.close()
\ No newline at end of file
+        if self.pool is not None:
+            self.pool.closeall()
+        else:
+            self.cur.close()
+            self.conn.close()
\ No newline at end of file
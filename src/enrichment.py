@@ -0,0 +1,303 @@
+"""
+Refresh titles in My Database from OMDb: IMDb ratings, posters, plots, awards and runtimes.
+
+Pipeline of three stages connected by bounded queues:
+    reader  - reads imdbIDs and current values from Db page by page (keyset pagination)
+    fetchers - pool of threads asking the OMDb API for every title (rate limited, mirror and cache are skipped),
+               finding the changed fields
+    writer  - collects changes and writes them in grouped UPDATEs through DbManager.update_title_fields
+Full queues stop the stage in front of them, so memory use stays flat and the API rate decides the throughput.
+
+Every fetched title gets its sync time saved (table 'title_sync'). Incremental mode (--stale-days) refreshes
+only titles not synced for that long, stalest (or never synced) first, and --quota caps the titles per run -
+e.g. a daily job that stays within the API key's request limit. Failed fetches are saved too: such titles are
+retried only after a growing backoff, so they don't take the quota of every run.
+
+Usage:
+    python -m src.enrichment --workers 8 --rate 5
+    python -m src.enrichment --only-missing --fields poster,plot --mirror omdb_mirror.sqlite
+    python -m src.enrichment --fields imdb_rating --stale-days 30 --quota 900
+"""
+import argparse
+import os
+import queue
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal, InvalidOperation
+
+from src.dbmanager import DbManager, ENRICHABLE_COLUMNS
+from src.omdb_client import OMDbClient
+from src.omdb_mirror import OMDbMirror
+from src.rate_limiter import TokenBucket
+
+_DONE = object()  # End of stream marker
+
+
+class EnrichmentPipeline:
+    """
+    Concurrent refresh of title fields from OMDb.
+
+    Responsibilities:
+        - Read titles from Db in pages while fetchers work (bounded queue - the reader waits when it's full).
+        - Fetch titles with 'workers' threads, at most 'rate' requests per second (token bucket).
+        - Keep fields OMDb has no value for ('N/A'), write only the changed ones, 'batch_size' titles per UPDATE.
+        - Save sync time of every fetched title (and failed attempts); in incremental mode read only stale titles,
+          stalest first, up to a quota.
+        - Count checked / changed / unchanged / failed titles and changes per field, report progress.
+    """
+    def __init__(self, dbm: DbManager, client: OMDbClient, fields: tuple[str, ...] = tuple(ENRICHABLE_COLUMNS),
+                 workers: int = 8, rate: float | None = None, batch_size: int = 100, queue_size: int | None = None,
+                 progress_interval: float = 5.0, out=sys.stdout):
+        unknown = set(fields) - set(ENRICHABLE_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+        if workers < 1 or batch_size < 1:
+            raise ValueError("Workers and batch size must be positive numbers.")
+        self.dbm = dbm
+        self.client = client
+        self.fields = tuple(fields)
+        self.workers = workers
+        self.rate_limiter = TokenBucket(rate) if rate else None
+        self.batch_size = batch_size
+        self.progress_interval = progress_interval
+        self.out = out
+        # Room for a few batches in flight: enough to keep every stage busy, small enough to bound memory
+        size = queue_size or max(batch_size, workers) * 2
+        self._titles: queue.Queue = queue.Queue(maxsize=size)
+        self._results: queue.Queue = queue.Queue(maxsize=size)
+        self._stop = threading.Event()
+        self._errors: list[BaseException] = []  # Errors of the reader thread
+        self.stats = {"checked": 0, "changed": 0, "unchanged": 0, "failed": 0}
+        self.changed_fields: Counter = Counter()
+        self.errors: list[str] = []
+
+    def run(self, only_missing: bool = False, stale_after: float | None = None, quota: int | None = None) -> dict:
+        """
+        Refresh all titles (or those with missing values). Returns stats: checked / changed / unchanged / failed
+        counts, 'fields' (changes per field), elapsed seconds and titles/sec.
+        :param stale_after: Incremental mode - only titles not synced in the last 'stale_after' seconds, stalest first
+        :param quota: Max number of titles to check
+        """
+        if quota is not None and quota < 0:
+            raise ValueError("Quota must not be negative.")
+        if only_missing and stale_after is not None:
+            raise ValueError("Missing values and stale titles can't be refreshed in one run.")
+        start = time.perf_counter()
+        if stale_after is not None:
+            reader, args = self._read_stale, (datetime.now(timezone.utc) - timedelta(seconds=stale_after), quota)
+        else:
+            reader, args = self._read, (only_missing, quota)
+        threads = [threading.Thread(target=reader, args=args, name="enrich-reader", daemon=True)]
+        threads += [threading.Thread(target=self._fetch, name=f"enrich-fetch-{i}", daemon=True)
+                    for i in range(self.workers)]
+        for thread in threads:
+            thread.start()
+        try:
+            self._write(start)
+        finally:
+            # Writer finished or failed - let the other stages leave their blocking puts
+            self._stop.set()
+            for thread in threads:
+                thread.join()
+        if self._errors:
+            raise self._errors[0]
+
+        elapsed = time.perf_counter() - start
+        return {**self.stats, "fields": dict(self.changed_fields), "elapsed": elapsed,
+                "per_second": self.stats["checked"] / elapsed if elapsed else 0.0}
+
+    # Stages
+    def _read(self, only_missing: bool, quota: int | None) -> None:
+        self._read_pages(lambda after, limit: self.dbm.get_enrichable_page(after, limit, only_missing),
+                         lambda row: row["imdbid"], quota)
+
+    def _read_stale(self, synced_before: datetime, quota: int | None) -> None:
+        # Titles synced during this run are newer than 'synced_before', so they are never read twice
+        self._read_pages(lambda after, limit: self.dbm.get_stale_page(synced_before, after, limit),
+                         lambda row: (row["synced_at"], row["imdbid"]), quota)
+
+    def _read_pages(self, read_page, page_key, quota: int | None) -> None:
+        try:
+            after, remaining = None, quota
+            while not self._stop.is_set() and remaining != 0:
+                limit = self.batch_size if remaining is None else min(self.batch_size, remaining)
+                page = read_page(after, limit)
+                for row in page:
+                    if not self._put(self._titles, row):
+                        return
+                if remaining is not None:
+                    remaining -= len(page)
+                if len(page) < limit:
+                    break
+                after = page_key(page[-1])
+        except BaseException as e:
+            self._errors.append(e)
+            self._stop.set()
+        finally:
+            # One marker per fetcher (skipped when stopping - fetchers watch the stop flag then)
+            for _ in range(self.workers):
+                if not self._put(self._titles, _DONE):
+                    break
+
+    def _fetch(self) -> None:
+        try:
+            while True:
+                row = self._get(self._titles)
+                if row is _DONE or row is None:
+                    return
+                if self.rate_limiter is not None:
+                    self.rate_limiter.acquire()
+                try:
+                    # Stored copies (mirror, cache) are what is being refreshed - always ask the API
+                    data = self.client.get_title_by_imdbid(row["imdbid"], fresh=True)
+                    result = (row["imdbid"], self._changes(row, data), datetime.now(timezone.utc), None)
+                except Exception as e:
+                    # Counted as failed title; errors of other stages stop the pipeline instead
+                    result = (row["imdbid"], None, datetime.now(timezone.utc), e)
+                if not self._put(self._results, result):
+                    return
+        finally:
+            self._put(self._results, _DONE)
+
+    def _write(self, start: float) -> None:
+        pending: dict[str, dict] = {}  # imdbID -> changed fields
+        synced: dict[str, datetime] = {}  # imdbID -> fetch time, changed or not
+        failed: dict[str, datetime] = {}  # imdbID -> time of the failed fetch
+        running = self.workers
+        last_report = time.perf_counter()
+        while running:
+            try:
+                item = self._results.get(timeout=0.5)
+            except queue.Empty:
+                if self._stop.is_set():
+                    break
+                # Slow API - write what is collected, so progress is never held back for long
+                self._flush(pending, synced, failed)
+                continue
+            if item is _DONE:
+                running -= 1
+                continue
+
+            imdbid, changes, fetched_at, error = item
+            self.stats["checked"] += 1
+            if error is not None:
+                self._fail(imdbid, error)
+                failed[imdbid] = fetched_at
+            else:
+                synced[imdbid] = fetched_at
+                if changes:
+                    pending[imdbid] = changes
+            if len(synced) + len(failed) >= self.batch_size:
+                self._flush(pending, synced, failed)
+            if time.perf_counter() - last_report >= self.progress_interval:
+                self._report(start)
+                last_report = time.perf_counter()
+        self._flush(pending, synced, failed)
+        self._report(start)
+
+    def _flush(self, pending: dict[str, dict], synced: dict[str, datetime], failed: dict[str, datetime]) -> None:
+        if not synced and not failed:
+            return
+        # Db writes only rows that really differ - its count is the number of changed titles
+        changed = self.dbm.update_title_fields(pending, synced, failed)
+        self.stats["changed"] += changed
+        self.stats["unchanged"] += len(synced) - changed
+        for changes in pending.values():
+            self.changed_fields.update(changes.keys())
+        pending.clear()
+        synced.clear()
+        failed.clear()
+
+    # Helpers
+    def _changes(self, row: dict, data: dict) -> dict:
+        # Fields with a new value. 'N/A' from OMDb never replaces a value we have
+        changes = {}
+        for column in self.fields:
+            value = data.get(ENRICHABLE_COLUMNS[column])
+            if value in (None, "", "N/A"):
+                continue
+            if column == "imdb_rating":
+                try:
+                    value = Decimal(value)
+                except InvalidOperation:
+                    continue
+                current = Decimal(row[column]) if row[column] is not None else None
+            else:
+                current = row[column]
+            if value != current:
+                changes[column] = value
+        return changes
+
+    def _put(self, q: queue.Queue, item) -> bool:
+        # Blocking put that gives up when the pipeline is stopping
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.2)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q: queue.Queue):
+        # Blocking get that returns None when the pipeline is stopping
+        while not self._stop.is_set():
+            try:
+                return q.get(timeout=0.2)
+            except queue.Empty:
+                continue
+        return None
+
+    def _fail(self, imdbid: str, error: Exception) -> None:
+        self.stats["failed"] += 1
+        self.errors.append(f"{imdbid}: {error}")
+        print(f"Failed: {imdbid}: {error}", file=self.out)
+
+    def _report(self, start: float) -> None:
+        elapsed = time.perf_counter() - start
+        checked = self.stats["checked"]
+        print(f"Checked {checked}: changed {self.stats['changed']}, unchanged {self.stats['unchanged']}, "
+              f"failed {self.stats['failed']} - {checked / elapsed if elapsed else 0:.1f} titles/s "
+              f"(queued: {self._titles.qsize()} to fetch, {self._results.qsize()} to write)", file=self.out)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fields", default=",".join(ENRICHABLE_COLUMNS),
+                        help=f"comma-separated fields to refresh (default: all of {', '.join(ENRICHABLE_COLUMNS)})")
+    parser.add_argument("--only-missing", action="store_true", help="only titles with empty / 'N/A' values")
+    parser.add_argument("--workers", type=int, default=8, help="OMDb requests in flight")
+    parser.add_argument("--rate", type=float, help="max OMDb requests per second")
+    parser.add_argument("--stale-days", type=float,
+                        help="incremental mode: only titles not synced for this many days, stalest first")
+    parser.add_argument("--quota", type=int, help="max titles checked in this run")
+    parser.add_argument("--batch-size", type=int, default=100, help="titles per UPDATE")
+    parser.add_argument("--mirror", default=os.getenv("OMDb_MIRROR_PATH"),
+                        help="local OMDb mirror to update with fetched records (default: $OMDb_MIRROR_PATH)")
+    args = parser.parse_args()
+    if args.only_missing and args.stale_days is not None:
+        parser.error("--only-missing can't be combined with --stale-days")
+
+    dbm = DbManager()
+    mirror = OMDbMirror(args.mirror) if args.mirror else None
+    client = OMDbClient(pool_size=args.workers, mirror=mirror)
+    try:
+        pipeline = EnrichmentPipeline(dbm, client, fields=tuple(f.strip() for f in args.fields.split(",") if f.strip()),
+                                      workers=args.workers, rate=args.rate, batch_size=args.batch_size)
+        stale_after = args.stale_days * 24 * 3600 if args.stale_days is not None else None
+        stats = pipeline.run(only_missing=args.only_missing, stale_after=stale_after, quota=args.quota)
+    finally:
+        dbm.close()
+        client.close()
+        if mirror is not None:
+            mirror.close()
+
+    fields = ", ".join(f"{name} {n}" for name, n in sorted(stats["fields"].items())) or "none"
+    print(f"\nDone in {stats['elapsed']:.1f}s ({stats['per_second']:.1f} titles/s): "
+          f"{stats['checked']} checked / {stats['changed']} changed (fields: {fields}), failed {stats['failed']}.")
+
+
+if __name__ == "__main__":
+    main()
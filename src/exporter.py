@@ -1,11 +1,21 @@
+import csv
+import gzip
 import json
 import os
 import re
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable
 
 import yaml
 
+from src import metrics
 from src.media_title import MediaTitle
 
+# libyaml emitter if PyYAML was built with it (same output, several times faster than the pure Python one)
+YAML_DUMPER = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+
 class Exporter:
     """
     Handles exporting MediaTitle objects to various file formats.
@@ -20,18 +30,176 @@ class Exporter:
 
     def to_json(self) -> bool:
         # Write JSON file
+        start = metrics.start()
         with open (self.path, "w", encoding="utf-8") as f:
             json.dump(self._to_dict(), f, ensure_ascii=False, indent=4)
-            return True
+        _record_export(start, "json", self.path, 1)
+        return True
 
     def to_yaml(self) -> bool:
         # Write YAML file
+        start = metrics.start()
         with open (self.path, "w", encoding="utf-8") as f:
-            yaml.safe_dump(self._to_dict(), f, allow_unicode=True, sort_keys=False)
-            return True
+            yaml.dump(self._to_dict(), f, Dumper=YAML_DUMPER, allow_unicode=True, sort_keys=False)
+        _record_export(start, "yaml", self.path, 1)
+        return True
 
     def _to_dict(self):
         # Convert MediaTitle to dict
-        media_title_dict = vars(self.media_title)
-        media_title_dict["imdb_rating"] = str(media_title_dict["imdb_rating"])
-        return media_title_dict
\ No newline at end of file
+        return title_to_dict(self.media_title)
+
+
+class StreamExporter:
+    """
+    Exports many titles into one file, writing them one by one (memory use doesn't depend on number of titles).
+
+    Responsibilities:
+        - Accept any iterable of MediaTitle objects or title dicts from DbManager / OMDb.
+        - Write JSON Lines, CSV or multi-document YAML stream, optionally gzip-compressed.
+    """
+    FORMATS = {"jsonl": "jsonl", "csv": "csv", "yaml": "yaml"}  # format -> file extension
+    LIST_FIELDS = ("director", "writers", "genre", "actors", "country")
+
+    def __init__(self, path: str, fmt: str, compress: bool = False):
+        if fmt not in self.FORMATS:
+            raise ValueError(f"Unknown export format '{fmt}'. Expected one of: {', '.join(self.FORMATS)}")
+        self.path = path
+        self.fmt = fmt
+        self.compress = compress
+
+    def write(self, titles: Iterable[MediaTitle | dict]) -> int:
+        """ Write all titles. Returns number of written titles. """
+        start = metrics.start()
+        count = 0
+        with self._open() as f:
+            writer = None
+            for title in titles:
+                media = MediaTitle.from_dict(title) if isinstance(title, dict) else title
+                data = title_to_dict(media)
+
+                if self.fmt == "jsonl":
+                    f.write(json.dumps(data, ensure_ascii=False) + "\n")
+                elif self.fmt == "csv":
+                    if writer is None:
+                        writer = csv.DictWriter(f, fieldnames=list(data))
+                        writer.writeheader()
+                    writer.writerow({k: ", ".join(v) if k in self.LIST_FIELDS else v for k, v in data.items()})
+                else:
+                    yaml.dump(data, f, Dumper=YAML_DUMPER, allow_unicode=True, sort_keys=False, explicit_start=True)
+                count += 1
+        _record_export(start, self.fmt + (".gz" if self.compress else ""), self.path, count)
+        return count
+
+    def _open(self):
+        if self.compress:
+            return gzip.open(self.path, "wt", encoding="utf-8", newline="")
+        return open(self.path, "w", encoding="utf-8", newline="")
+
+
+class BatchExporter:
+    """
+    Exports every title into its own JSON or YAML file, serializing them in a process pool.
+
+    Responsibilities:
+        - Name files after titles (same sanitizing as CLI._path_handler) and resolve name collisions without asking:
+          existing files and names taken earlier in the batch get '_1', '_2', ... like the CLI 'copy' option.
+        - Write files in worker processes, each one to a temp file first and renamed into place (no partial files).
+        - Count written files and report files/sec.
+    """
+    FORMATS = ("json", "yaml")
+
+    def __init__(self, folder: str, fmt: str, workers: int | None = None, chunk_size: int = 100):
+        if fmt not in self.FORMATS:
+            raise ValueError(f"Unknown export format '{fmt}'. Expected one of: {', '.join(self.FORMATS)}")
+        if chunk_size < 1:
+            raise ValueError("Chunk size must be a positive number.")
+        self.folder = folder
+        self.fmt = fmt
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self._taken: set[str] = set()  # file names used in this batch
+
+    def write(self, titles: Iterable[MediaTitle | dict]) -> dict:
+        """
+        Write one file per title. Titles are read lazily and sent to workers in chunks.
+        :return: dict: 'files' - number of written files, 'bytes', 'elapsed' seconds and 'per_second' (files/sec)
+        """
+        start = time.perf_counter()
+        os.makedirs(self.folder, exist_ok=True)
+        files = size = 0
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            pending = []
+            for chunk in self._chunks(titles):
+                pending.append(executor.submit(_write_files, self.fmt, chunk))
+                # A few chunks per worker in flight - enough to keep workers busy, memory stays bounded
+                if len(pending) >= self.workers * 2:
+                    written, written_bytes = pending.pop(0).result()
+                    files, size = files + written, size + written_bytes
+            for future in pending:
+                written, written_bytes = future.result()
+                files, size = files + written, size + written_bytes
+
+        elapsed = time.perf_counter() - start
+        metrics.record("export", start, format=f"{self.fmt}-files", titles=files, bytes=size)
+        return {"files": files, "bytes": size, "elapsed": elapsed, "per_second": files / elapsed if elapsed else 0.0}
+
+    def _chunks(self, titles: Iterable[MediaTitle | dict]):
+        # (path, data) pairs in chunks; names are resolved here, in one process, so workers never collide
+        chunk = []
+        for title in titles:
+            media = MediaTitle.from_dict(title) if isinstance(title, dict) else title
+            chunk.append((self._free_path(media.title), title_to_dict(media)))
+            if len(chunk) == self.chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def _free_path(self, title: str) -> str:
+        name = re.sub(r'[\\/:"*?<>|]+', '_', title) or "title"
+        candidate, counter = name, 1
+        while candidate in self._taken or os.path.exists(os.path.join(self.folder, f"{candidate}.{self.fmt}")):
+            candidate = f"{name}_{counter}"
+            counter += 1
+        self._taken.add(candidate)
+        return os.path.join(self.folder, f"{candidate}.{self.fmt}")
+
+
+def _write_files(fmt: str, items: list[tuple[str, dict]]) -> tuple[int, int]:
+    # Runs in a worker process. Returns number of written files and their total size
+    size = 0
+    # mkstemp creates files readable by the owner only - give them the mode open() would (0666 minus umask).
+    # The umask can only be read by setting it; worker processes run no other threads
+    umask = os.umask(0o022)
+    os.umask(umask)
+    mode = 0o666 & ~umask
+    for path, data in items:
+        if fmt == "json":
+            content = json.dumps(data, ensure_ascii=False, indent=4)
+        else:
+            content = yaml.dump(data, Dumper=YAML_DUMPER, allow_unicode=True, sort_keys=False)
+        encoded = content.encode("utf-8")
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".export-", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                os.fchmod(f.fileno(), mode)
+                f.write(encoded)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        size += len(encoded)
+    return len(items), size
+
+
+def _record_export(start: float | None, fmt: str, path: str, titles: int) -> None:
+    # Bytes written (compressed size for .gz) and duration - only while metrics are enabled
+    if start is not None:
+        metrics.record("export", start, format=fmt, titles=titles, bytes=os.path.getsize(path))
+
+
+def title_to_dict(media_title: MediaTitle) -> dict:
+    # Convert MediaTitle to serializable dict (copy - MediaTitle itself is not changed)
+    media_title_dict = media_title.to_dict()
+    media_title_dict["imdb_rating"] = str(media_title_dict["imdb_rating"])
+    return media_title_dict
\ No newline at end of file
@@ -1,5 +1,16 @@
+import sys
+
+
 class MediaTitle:
-    """Class represents a media title (movie, series, etc.) with attributes, and methods for JSON/YAML serialization."""
+    """
+    Class represents a media title (movie, series, etc.) with attributes, and methods for JSON/YAML serialization.
+
+    Memory layout: attributes live in __slots__ (no per-instance __dict__), and names of people, genres and
+    countries plus short repeated values (year, runtime, type) are interned, so a large library keeps
+    one copy of strings like "Drama" or "United States".
+    """
+    __slots__ = ("title", "year", "director", "writers", "poster", "genre", "runtime", "actors", "plot", "awards",
+                 "country", "imdbid", "imdb_rating", "title_type", "my_rating")
 
     def __init__(self, title, year, director, writers, poster, genre, runtime, actors, plot, awards, country, imdbid,
                  imdb_rating, title_type, my_rating=None):
@@ -11,19 +22,19 @@ class MediaTitle:
             raise ValueError(f"Missing required fields: {', '.join(missing)}")
 
         self.title = title
-        self.year = year
+        self.year = self._intern(year)
         self.director = self._list_parsing(director)
         self.writers = self._list_parsing(writers)
         self.poster = poster
         self.genre = self._list_parsing(genre)
-        self.runtime = runtime
+        self.runtime = self._intern(runtime)
         self.actors = self._list_parsing(actors)
         self.plot = plot
-        self.awards = awards
+        self.awards = self._intern(awards)
         self.country = self._list_parsing(country)
         self.imdbid = imdbid
-        self.imdb_rating = imdb_rating
-        self.title_type = title_type
+        self.imdb_rating = self._intern(imdb_rating)
+        self.title_type = self._intern(title_type)
         self.my_rating = my_rating or 0
 
     @classmethod
@@ -47,9 +58,25 @@ class MediaTitle:
             my_rating=data.get("MyRating"),
         )
 
+    @classmethod
+    def from_export(cls, data: dict):
+        # Creating an instance from dict written by Exporter (attribute names as keys, lists already split)
+        return cls(**{name: data.get(name) for name in cls.__slots__})
+
+    def to_dict(self) -> dict:
+        # Attributes as dict (same keys from_export expects)
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @staticmethod
+    def _list_parsing(string: str | list) -> list:
+        # Names are interned - the same person / genre / country shares one string in all titles
+        items = string if isinstance(string, list) else string.split(", ")
+        return [sys.intern(item) for item in items]
+
     @staticmethod
-    def _list_parsing(string: str) -> list:
-        return string.split(", ")
+    def _intern(value):
+        # Short values repeat a lot across titles ("2010", "90 min", "movie", "N/A")
+        return sys.intern(value) if isinstance(value, str) and len(value) <= 32 else value
 
     def __str__ (self):
         return f"'{self.title}' {self.year}"
@@ -0,0 +1,163 @@
+"""
+Opt-in instrumentation: in-process metrics registry and structured (JSON) logs.
+
+Disabled by default. Enable with metrics.enable() or the MOVIEDB_METRICS=1 environment variable
+(MOVIEDB_METRICS_LOG=1 also writes one JSON log line per event to stderr).
+While disabled every hook is a single flag check, so instrumented code runs at full speed.
+
+Hooks in the code:
+    start = metrics.start()                        # None while disabled
+    ...
+    metrics.record("omdb_request", start, endpoint="id", status=200)
+
+Events are kept as summaries (count, sum and max of durations) plus counters for numeric fields
+(e.g. rows, bytes), per event name and label set.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from functools import wraps
+
+logger = logging.getLogger("moviedb.metrics")
+
+enabled = False
+
+# Numeric fields of events that are summed up as counters (everything else becomes a label)
+COUNTED_FIELDS = ("rows", "round_trips", "bytes", "titles", "retries")
+
+
+class MetricsRegistry:
+    """
+    Thread-safe store of event summaries.
+
+    Responsibilities:
+        - Aggregate events by name and labels: count, total/max duration and counted fields.
+        - Return a snapshot as plain dicts or as Prometheus text exposition format.
+    """
+    def __init__(self, prefix: str = "moviedb"):
+        self.prefix = prefix
+        self._data: dict[tuple, dict] = {}  # (event, labels) -> summary
+        self._lock = threading.Lock()
+
+    def observe(self, event: str, duration: float | None = None, labels: dict | None = None,
+                counts: dict | None = None) -> None:
+        key = (event, tuple(sorted((labels or {}).items())))
+        with self._lock:
+            summary = self._data.get(key)
+            if summary is None:
+                summary = self._data[key] = {"count": 0, "seconds": 0.0, "max_seconds": 0.0}
+            summary["count"] += 1
+            if duration is not None:
+                summary["seconds"] += duration
+                summary["max_seconds"] = max(summary["max_seconds"], duration)
+            for name, value in (counts or {}).items():
+                summary[name] = summary.get(name, 0) + value
+
+    def snapshot(self) -> list[dict]:
+        """ List of summaries: {'event', 'labels', 'count', 'seconds', 'max_seconds', <counted fields>}. """
+        with self._lock:
+            return [{"event": event, "labels": dict(labels), **summary}
+                    for (event, labels), summary in sorted(self._data.items())]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def to_prometheus(self) -> str:
+        """ Snapshot in Prometheus text format: <event>_total, <event>_seconds_sum/_max, <event>_<field>_total. """
+        # Samples of one metric must stay together: metric -> (type, samples)
+        families: dict[str, tuple[str, list[str]]] = {}
+        for item in self.snapshot():
+            name = f"{self.prefix}_{item['event']}"
+            labels = ",".join(f'{key}="{_escape(value)}"' for key, value in item["labels"].items())
+            labels = f"{{{labels}}}" if labels else ""
+            series = [(f"{name}_total", "counter", item["count"]),
+                      (f"{name}_seconds_sum", "counter", item["seconds"]),
+                      (f"{name}_seconds_max", "gauge", item["max_seconds"])]
+            series += [(f"{name}_{field}_total", "counter", item[field]) for field in COUNTED_FIELDS if field in item]
+            for metric, kind, value in series:
+                families.setdefault(metric, (kind, []))[1].append(f"{metric}{labels} {value}")
+
+        lines = []
+        for metric, (kind, samples) in families.items():
+            lines.append(f"# TYPE {metric} {kind}")
+            lines += samples
+        return "\n".join(lines) + "\n" if lines else ""
+
+
+registry = MetricsRegistry()
+
+
+def enable(log: bool = False) -> None:
+    """ Turn instrumentation on. With 'log' every event is also logged as JSON line (logger 'moviedb.metrics'). """
+    global enabled
+    enabled = True
+    if log and not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.DEBUG)
+
+
+def disable() -> None:
+    global enabled
+    enabled = False
+
+
+def configure_from_env() -> None:
+    if os.getenv("MOVIEDB_METRICS") == "1":
+        enable(log=os.getenv("MOVIEDB_METRICS_LOG") == "1")
+
+
+def start() -> float | None:
+    """ Start time of a timed event, or None while instrumentation is disabled. """
+    return time.perf_counter() if enabled else None
+
+
+def record(event: str, start: float | None = None, **fields) -> None:
+    """
+    Record an event (no-op while disabled). Duration is measured from 'start' (see start()).
+    Fields listed in COUNTED_FIELDS are summed up, the others are labels (keep their values low-cardinality).
+    """
+    if not enabled:
+        return
+    duration = time.perf_counter() - start if start is not None else None
+    counts = {k: v for k, v in fields.items() if k in COUNTED_FIELDS and v is not None}
+    labels = {k: v for k, v in fields.items() if k not in COUNTED_FIELDS}
+    registry.observe(event, duration, labels, counts)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(json.dumps({"ts": time.time(), "event": event, "seconds": duration, **fields}, default=str))
+
+
+# Round trips made inside the current DbManager call (per thread)
+_call = threading.local()
+
+
+def db_call(method):
+    """ Decorator for public DbManager methods: times the call and counts its queries (round trips). """
+    @wraps(method)
+    def wrapper(*args, **kwargs):
+        if not enabled:
+            return method(*args, **kwargs)
+        outer = getattr(_call, "round_trips", None)
+        _call.round_trips = 0
+        started = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            round_trips = _call.round_trips
+            _call.round_trips = outer if outer is None else outer + round_trips
+            record("db_call", started, method=method.__name__, round_trips=round_trips)
+    return wrapper
+
+
+def db_round_trip() -> None:
+    # Called by the instrumented cursor for every statement sent to Db
+    if getattr(_call, "round_trips", None) is not None:
+        _call.round_trips += 1
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
@@ -1,9 +1,23 @@
+import asyncio
+import json
+import random
 import re
 import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+from typing import Iterator
 
 import requests
+from requests.adapters import HTTPAdapter
 from dotenv import load_dotenv
 
+from src import metrics
+from src.cache import ResponseCache
+from src.omdb_mirror import OMDbMirror
+
 class OMDbError(Exception): pass
 class OMDbInvalidKeyError(OMDbError): pass
 class OMDbNotFoundError(OMDbError): pass
@@ -12,6 +26,7 @@ class OMDbConnectionError(OMDbError): pass
 
 load_dotenv()
 API_KEY = os.getenv('OMDb_API_KEY')
+SEARCH_PAGE_SIZE = 10  # Results per OMDb search page
 
 class OMDbClient:
     """
@@ -21,13 +36,64 @@ class OMDbClient:
         - Send search queries to OMDb and return a list of matching movies.
         - Retrieve detailed information for a specific movie by IMDb ID.
         - Handle API keys, request parameters, and basic error checking.
+        - Serve repeated lookups from an optional response cache ('Movie not found!' answers included).
+        - Answer title lookups from an optional local mirror (src.omdb_mirror) before asking the API,
+          and add fetched titles to it.
+        - Reuse keep-alive connections and retry transient failures (timeouts, 429 and 5xx) with backoff.
+
+    'transport' is any object with requests-like 'get(url, params=..., timeout=...)'.
+    By default it's a requests.Session with a connection pool of 'pool_size' connections.
+    Retries wait 'Retry-After' seconds if the API sends it, otherwise exponential backoff with full jitter.
+    Per-request latency and retry counts are kept in 'history' (latest requests) and totals in 'stats'.
+    With 'offline' the API is never called: lookups the mirror and cache can't answer raise OMDbNotFoundError.
+    Searches are answered by the mirror only offline or with 'mirror_complete' (mirror holds every title);
+    otherwise a partial mirror would hide titles and give wrong totals, so they go to the API.
+    Requests and cache hits/misses are also recorded in src.metrics when it is enabled.
     """
-    def __init__(self, api_key: str = API_KEY):
+    # Query parameter -> endpoint name (used for per-endpoint cache TTLs)
+    ENDPOINTS = {'i': 'id', 't': 'title', 's': 'search'}
+    # HTTP statuses worth retrying
+    RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+    def __init__(self, api_key: str = API_KEY, cache: ResponseCache | None = None, transport=None,
+                 base_url: str = 'https://www.omdbapi.com/', pool_size: int = 10, timeout: float = 10,
+                 retries: int = 3, backoff: float = 0.5, max_backoff: float = 30, history_size: int = 100,
+                 mirror: OMDbMirror | None = None, offline: bool = False, mirror_complete: bool = False):
         self.api_key = api_key
-        self.base_url = 'https://www.omdbapi.com/'
+        self.base_url = base_url
+        self.cache = cache
+        self.mirror = mirror
+        self.offline = offline
+        self.mirror_complete = mirror_complete
+        self.transport = transport or self._make_session(pool_size)
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+        # Request statistics
+        self.history: deque[dict] = deque(maxlen=history_size)
+        self.stats = {'requests': 0, 'retries': 0, 'failures': 0, 'latency': 0.0}
+        self._stats_lock = threading.Lock()
 
+    @staticmethod
+    def _make_session(pool_size: int) -> requests.Session:
+        # Keep-alive session. Retries are handled by OMDbClient itself
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
 
-    def get_title_by_imdbid(self, imdbid: str) -> dict:
+    def close(self) -> None:
+        if isinstance(self.transport, requests.Session):
+            self.transport.close()
+
+    def get_title_by_imdbid(self, imdbid: str, fresh: bool = False) -> dict:
+        """
+        Full title record. With 'fresh' the mirror and cache are skipped - the record comes from the API
+        and replaces the stored copies (used by refreshes of stored titles).
+        """
         # Format checking
         if not re.fullmatch(r"tt\d{7,9}", imdbid):
             raise ValueError("Invalid IMDb ID format. Expected format: 'tt1234567'")
@@ -38,7 +104,7 @@ class OMDbClient:
             'i': imdbid,
         }
 
-        return self._request(params)
+        return self._request(params, fresh)
 
     def get_title_by_name(self, title: str) -> dict:
         # Query parameters
@@ -49,26 +115,209 @@ class OMDbClient:
 
         return self._request(params)
 
-    def search_title(self, substring: str) -> dict:
+    def search_title(self, substring: str, page: int = 1) -> dict:
         # Query parameters
         params = {
             'apikey': self.api_key,
             's': substring,
         }
+        # OMDb returns 10 results per page
+        if page != 1:
+            params['page'] = page
 
         return self._request(params)
 
-    def _request(self, params: dict) -> dict:
-        # Send request
-        response = requests.get(self.base_url, params=params, timeout=10)
+    def iter_search(self, substring: str, limit: int | None = None, prefetch: bool = True,
+                    first_page: dict | None = None) -> Iterator[dict]:
+        """
+        Lazily yield all search results (short title dicts) page by page, up to 'totalResults' or 'limit'.
+        With 'prefetch' the next page is requested in background while the current one is consumed.
+        :param first_page: Already fetched response for page 1 (saves a request)
+        Raises OMDbNotFoundError if there are no results at all.
+        """
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="omdb-search")
+        try:
+            page = 1
+            data = first_page or self.search_title(substring, page)
+            yielded = 0
+            while True:
+                results = data.get('Search', [])
+                last_page = -(-int(data.get('totalResults', 0)) // SEARCH_PAGE_SIZE)
+                more = page < last_page and results and (limit is None or yielded + len(results) < limit)
+
+                # Request next page before handing out current one
+                next_page = executor.submit(self.search_title, substring, page + 1) if more and prefetch else None
+
+                for result in results:
+                    if limit is not None and yielded >= limit:
+                        return
+                    yield result
+                    yielded += 1
+
+                if not more:
+                    return
+                page += 1
+                try:
+                    data = next_page.result() if next_page else self.search_title(substring, page)
+                except OMDbNotFoundError:
+                    # Fewer results than 'totalResults' promised
+                    return
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def get_titles_by_imdbids(self, imdbids: list[str], concurrency: int = 8,
+                              rate: float | None = None) -> list[dict | Exception]:
+        """
+        Batch lookup by imdbIDs. Runs concurrently through AsyncOMDbClient.
+        :param rate: Max requests per second (None - unlimited)
+        :return: list: Result for each imdbID in input order - title dict or the exception raised for it
+        """
+        return self._run_batch("gather_titles_by_imdbids", imdbids, concurrency, rate)
+
+    def get_titles_by_names(self, titles: list[str], concurrency: int = 8,
+                            rate: float | None = None) -> list[dict | Exception]:
+        """
+        Batch lookup by exact names. Runs concurrently through AsyncOMDbClient.
+        :param rate: Max requests per second (None - unlimited)
+        :return: list: Result for each name in input order - title dict or the exception raised for it
+        """
+        return self._run_batch("gather_titles_by_names", titles, concurrency, rate)
+
+    def _run_batch(self, method: str, values: list[str], concurrency: int, rate: float | None) -> list:
+        # Imported here - async client is built on top of this module
+        from src.async_omdb_client import AsyncOMDbClient
+
+        async def run():
+            async with AsyncOMDbClient(self, concurrency=concurrency, rate=rate) as client:
+                return await getattr(client, method)(values)
+
+        return asyncio.run(run())
+
+    def _request(self, params: dict, fresh: bool = False) -> dict:
+        if fresh and self.offline:
+            raise OMDbError("Fresh data can't be requested in offline mode")
+
+        # Local mirror lookup
+        if self.mirror is not None and not fresh:
+            data = self._mirror_lookup(params)
+            if data is not None:
+                return data
+
+        # Cache lookup
+        endpoint, key = self._cache_key(params)
+        if self.cache is not None and not fresh:
+            data = self.cache.get(key)
+            metrics.record("omdb_cache", endpoint=endpoint, result="miss" if data is None else "hit")
+            if data is not None:
+                return data if data.get('Response') == 'True' else self._handle_error(data)
+
+        if self.offline:
+            raise OMDbNotFoundError("Movie not found! (offline mode, not in local mirror)")
+
+        # Send request (with retries)
+        response = self._send(params)
 
         # HTTP status check
         if response.status_code != 200:
             raise OMDbConnectionError(f"OMDb API returned {response.status_code}")
         data = response.json()
+
+        # Cache successful and 'not found' responses (never errors like invalid key)
+        if self.cache is not None:
+            if data.get('Response') == 'True':
+                self.cache.set(endpoint, key, data)
+            elif "Movie not found!" in data.get('Error', ''):
+                self.cache.set(endpoint, key, data, negative=True)
+        # Full title records go to the mirror too
+        if self.mirror is not None and endpoint in ('id', 'title') and data.get('Response') == 'True':
+            self.mirror.add(data)
+
         # Response flag check
         return data if data.get('Response') == 'True' else self._handle_error(data)
 
+    def _mirror_lookup(self, params: dict) -> dict | None:
+        # Mirror answer in OMDb format, or None to ask further (mirror misses are never 'not found')
+        if 'i' in params:
+            endpoint, data = 'id', self.mirror.get_by_imdbid(params['i'])
+        elif 't' in params:
+            endpoint, data = 'title', self.mirror.get_by_title(params['t'])
+        elif 's' in params:
+            if not (self.offline or self.mirror_complete):
+                return None
+            endpoint, data = 'search', self.mirror.search(params['s'], int(params.get('page', 1)))
+        else:
+            return None
+        metrics.record("omdb_mirror", endpoint=endpoint, result="miss" if data is None else "hit")
+        return data
+
+    def _send(self, params: dict) -> requests.Response:
+        # GET with retries of timeouts, connection errors and retryable statuses
+        endpoint = next((name for param, name in self.ENDPOINTS.items() if param in params), 'other')
+        start = time.perf_counter()
+        retries = 0
+        while True:
+            try:
+                response = self.transport.get(self.base_url, params=params, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if retries >= self.retries:
+                    self._record(endpoint, None, start, retries)
+                    raise OMDbConnectionError(f"OMDb API is unreachable: {e}") from e
+                delay = self._backoff_delay(retries)
+            else:
+                delay = None
+                if response.status_code in self.RETRY_STATUSES and retries < self.retries:
+                    delay = self._retry_after(response)
+                    if delay is None:
+                        delay = self._backoff_delay(retries)
+                    elif delay > self.max_backoff:
+                        # API asks to wait longer than we are willing to - give up now
+                        delay = None
+                if delay is None:
+                    self._record(endpoint, response.status_code, start, retries)
+                    return response
+
+            time.sleep(delay)
+            retries += 1
+
+    def _backoff_delay(self, retries: int) -> float:
+        # Exponential backoff with full jitter
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** retries))
+
+    @staticmethod
+    def _retry_after(response) -> float | None:
+        # 'Retry-After' header in seconds or as HTTP date
+        value = response.headers.get('Retry-After') if getattr(response, 'headers', None) else None
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+    def _record(self, endpoint: str, status: int | None, start: float, retries: int) -> None:
+        latency = time.perf_counter() - start
+        with self._stats_lock:
+            self.history.append({'endpoint': endpoint, 'status': status, 'latency': latency, 'retries': retries})
+            self.stats['requests'] += 1
+            self.stats['retries'] += retries
+            self.stats['latency'] += latency
+            if status != 200:
+                self.stats['failures'] += 1
+        metrics.record("omdb_request", start, endpoint=endpoint, status=status, retries=retries)
+
+    def _cache_key(self, params: dict) -> tuple[str, str]:
+        # Endpoint name and cache key (API key excluded, title/search text is case-insensitive for OMDb)
+        query = {k: v for k, v in params.items() if k != 'apikey'}
+        endpoint = next((name for param, name in self.ENDPOINTS.items() if param in query), 'other')
+        for param in ('t', 's'):
+            if param in query:
+                query[param] = str(query[param]).strip().lower()
+        return endpoint, json.dumps(sorted(query.items()), ensure_ascii=False)
+
     def _handle_error(self, data) -> None:
         msg = data.get('Error', 'Unknown error')
         if "Invalid API key!" in msg:
@@ -0,0 +1,177 @@
+"""
+Offline OMDb mirror: full OMDb title records in a local SQLite file.
+
+OMDbClient consults the mirror before the live API (see OMDbClient 'mirror' and 'offline'), and adds every
+full record it gets from the API to it. The mirror can also be seeded from the on-disk response cache
+(OMDb_CACHE_PATH) or from dumps of OMDb records (JSON array or JSON Lines, optionally gzipped).
+
+Usage:
+    python -m src.omdb_mirror mirror.sqlite --cache omdb_cache.sqlite --dump titles.jsonl.gz
+"""
+import argparse
+import gzip
+import itertools
+import json
+import sqlite3
+import threading
+import time
+from typing import Iterable, Iterator
+
+SEARCH_PAGE_SIZE = 10  # Same as OMDb
+SHORT_FIELDS = ("Title", "Year", "imdbID", "Type", "Poster")  # Fields of OMDb search results
+
+
+class OMDbMirror:
+    """
+    Local store of OMDb title records, answering the same lookups as OMDb.
+
+    Responsibilities:
+        - Store full OMDb records (Response 'True', with imdbID) keyed by imdbID.
+        - Look up by imdbID and by exact title (case-insensitive, indexed).
+        - Substring search with OMDb-shaped, paged answers, backed by FTS5 trigram index
+          (LIKE scan if SQLite has no trigram tokenizer or the substring is shorter than 3 characters).
+        - Seed from OMDb response cache files and record dumps.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("""CREATE TABLE IF NOT EXISTS titles (
+                imdbid TEXT PRIMARY KEY, title TEXT NOT NULL, title_key TEXT NOT NULL, data TEXT NOT NULL,
+                updated_at REAL NOT NULL)""")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS titles_title_key_idx ON titles (title_key)")
+            try:
+                self._conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS titles_fts USING fts5(title, tokenize='trigram')")
+                self.fts = True
+            except sqlite3.OperationalError:
+                # SQLite older than 3.34 - substring search falls back to LIKE
+                self.fts = False
+
+    def get_by_imdbid(self, imdbid: str) -> dict | None:
+        return self._one("SELECT data FROM titles WHERE imdbid = ?", (imdbid,))
+
+    def get_by_title(self, title: str) -> dict | None:
+        # Several titles with the same name - the most recently added one
+        return self._one("SELECT data FROM titles WHERE title_key = ? ORDER BY updated_at DESC LIMIT 1",
+                         (self._key(title),))
+
+    def search(self, substring: str, page: int = 1) -> dict | None:
+        """ OMDb-shaped search answer ('Search', 'totalResults', 'Response') or None if nothing matches. """
+        substring = substring.strip()
+        if not substring:
+            return None
+        if self.fts and len(substring) >= 3:
+            source = "titles t JOIN titles_fts f ON f.rowid = t.rowid WHERE titles_fts MATCH ?"
+            param = '"' + substring.replace('"', '""') + '"'
+        else:
+            source = "titles t WHERE t.title_key LIKE ? ESCAPE '\\'"
+            param = "%" + self._key(substring).replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+        with self._lock:
+            total = self._conn.execute(f"SELECT COUNT(*) FROM {source}", (param,)).fetchone()[0]
+            rows = self._conn.execute(f"SELECT t.data FROM {source} ORDER BY t.title_key, t.imdbid LIMIT ? OFFSET ?",
+                                      (param, SEARCH_PAGE_SIZE, (page - 1) * SEARCH_PAGE_SIZE)).fetchall()
+        if not rows:
+            return None
+        results = [{field: data.get(field, "N/A") for field in SHORT_FIELDS} for data in map(json.loads, (r[0] for r in rows))]
+        return {"Search": results, "totalResults": str(total), "Response": "True"}
+
+    def add(self, data: dict) -> bool:
+        """ Store a full OMDb record. Returns False for anything else (errors, search answers). """
+        return self.add_many([data]) == 1
+
+    def add_many(self, records: Iterable[dict]) -> int:
+        """ Store full OMDb records (replacing older versions). Returns number of stored records. """
+        count = 0
+        with self._lock, self._conn:
+            for data in records:
+                if not self._is_full_record(data):
+                    continue
+                self._conn.execute(
+                    """INSERT INTO titles (imdbid, title, title_key, data, updated_at) VALUES (?, ?, ?, ?, ?)
+                       ON CONFLICT (imdbid) DO UPDATE SET title = excluded.title, title_key = excluded.title_key,
+                       data = excluded.data, updated_at = excluded.updated_at""",
+                    (data["imdbID"], data["Title"], self._key(data["Title"]), json.dumps(data, ensure_ascii=False),
+                     time.time())
+                )
+                if self.fts:
+                    rowid = self._conn.execute("SELECT rowid FROM titles WHERE imdbid = ?", (data["imdbID"],)).fetchone()[0]
+                    self._conn.execute("DELETE FROM titles_fts WHERE rowid = ?", (rowid,))
+                    self._conn.execute("INSERT INTO titles_fts (rowid, title) VALUES (?, ?)", (rowid, data["Title"]))
+                count += 1
+        return count
+
+    def seed_from_cache(self, path: str) -> int:
+        """ Copy full records from an OMDb response cache file (SqliteCache of ResponseCache). """
+        conn = sqlite3.connect(path)
+        try:
+            # Cached values are [response, expires_at]; expired responses are still valid metadata
+            rows = conn.execute("SELECT value FROM cache").fetchall()
+        finally:
+            conn.close()
+        return self.add_many(entry[0] for entry in (json.loads(row[0]) for row in rows)
+                             if isinstance(entry, list) and isinstance(entry[0], dict))
+
+    def seed_from_dump(self, path: str) -> int:
+        """ Import OMDb records from a JSON array / JSON Lines file (.gz is decompressed on the fly). """
+        return self.add_many(read_dump(path))
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM titles").fetchone()[0]
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def _one(self, query: str, params: tuple) -> dict | None:
+        with self._lock:
+            row = self._conn.execute(query, params).fetchone()
+        return json.loads(row[0]) if row else None
+
+    @staticmethod
+    def _key(title: str) -> str:
+        # Titles are compared the way OMDb does: case-insensitive, surrounding spaces ignored
+        return title.strip().lower()
+
+    @staticmethod
+    def _is_full_record(data) -> bool:
+        return (isinstance(data, dict) and data.get("Response", "True") == "True" and bool(data.get("imdbID"))
+                and bool(data.get("Title")) and "Search" not in data and "Plot" in data)
+
+
+def read_dump(path: str) -> Iterator[dict]:
+    opener = gzip.open if path.lower().endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        first = f.read(1)
+        while first.isspace():
+            first = f.read(1)
+        if first == "[":
+            yield from json.loads(first + f.read())
+        else:
+            # Lazily chained - large (gzipped) dumps are read line by line
+            for line in itertools.chain((first + f.readline(),), f):
+                if line.strip():
+                    yield json.loads(line)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("mirror", help="mirror file (created if missing)")
+    parser.add_argument("--cache", action="append", default=[], help="OMDb response cache file (OMDb_CACHE_PATH)")
+    parser.add_argument("--dump", action="append", default=[], help="JSON / JSON Lines file with OMDb records")
+    args = parser.parse_args()
+
+    mirror = OMDbMirror(args.mirror)
+    try:
+        for path in args.cache:
+            print(f"{path}: {mirror.seed_from_cache(path)} titles")
+        for path in args.dump:
+            print(f"{path}: {mirror.seed_from_dump(path)} titles")
+        print(f"Mirror holds {len(mirror)} titles.")
+    finally:
+        mirror.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+import asyncio
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket rate limiter.
+    Allows 'rate' operations per second on average with bursts of up to 'capacity' operations (no bursts by default).
+    Works for threads (acquire) and coroutines (acquire_async).
+    """
+    def __init__(self, rate: float, capacity: int | None = None):
+        if rate <= 0:
+            raise ValueError("Rate must be a positive number.")
+        self.rate = rate
+        self.capacity = capacity or 1
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """ Take one token. Returns number of seconds to wait before it may be used. """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # Token debt is allowed - later callers wait for earlier reservations to be paid off
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def acquire(self) -> None:
+        delay = self.reserve()
+        if delay:
+            time.sleep(delay)
+
+    async def acquire_async(self) -> None:
+        delay = self.reserve()
+        if delay:
+            await asyncio.sleep(delay)
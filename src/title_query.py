@@ -0,0 +1,152 @@
+from typing import Iterable
+
+
+# Facet name -> (value expression, joins from 'matched m'); values are counted per matching title
+FACETS = {
+    "genre": ("g.name", "JOIN title_genres tg ON tg.title_id = m.title_id JOIN genres g ON g.genre_id = tg.genre_id"),
+    "country": ("c.name", "JOIN title_countries tc ON tc.title_id = m.title_id "
+                          "JOIN countries c ON c.country_id = tc.country_id"),
+    "type": ("ty.name", "JOIN types ty ON ty.type_id = m.type_id"),
+    "decade": ("(m.year / 10 * 10)::text || 's'", ""),
+}
+
+# Sort key -> column of 'matched m'
+SORT_KEYS = {
+    "title": "m.title",
+    "year": "m.year",
+    "imdb_rating": "m.imdb_rating",
+    "my_rating": "m.my_rating",
+}
+
+# Role filter -> role_type values (series have creators instead of writers)
+ROLES = {
+    "actor": ("actor",),
+    "director": ("director",),
+    "writer": ("writer", "creator"),
+}
+
+
+class TitleQuery:
+    """
+    Composable filter for titles in Db (see DbManager.find_titles).
+
+    Responsibilities:
+        - Collect filters: genre, country, person (optionally in a role), type, year range, IMDb rating range,
+          my rating and title substring. Filters are combined with AND, values of one filter with OR.
+        - Keep sorting, limit/offset and requested facets.
+        - Compile everything into one SQL statement returning the page of title summaries,
+          the number of all matching titles and facet counts (titles per genre, decade, ...).
+
+    Every method returns the query itself, so calls can be chained:
+        TitleQuery().genre("Drama").years(1990, 1999).order_by("imdb_rating", descending=True).limit(20)
+    Names (genres, countries, people, types) are matched case-insensitively.
+    """
+    def __init__(self):
+        self.conditions: list[str] = []
+        self.params: list = []
+        self.sort: list[str] = []
+        self.limit_value = 10
+        self.offset_value = 0
+        self.facet_names: list[str] = list(FACETS)
+
+    def genre(self, *names: str) -> "TitleQuery":
+        return self._link("title_genres", "genre_id", "genres", names)
+
+    def country(self, *names: str) -> "TitleQuery":
+        return self._link("title_countries", "country_id", "countries", names)
+
+    def person(self, name: str, role: str | None = None) -> "TitleQuery":
+        if role is not None and role not in ROLES:
+            raise ValueError(f"Unknown role '{role}'. Expected one of: {', '.join(ROLES)}")
+        condition = ("EXISTS (SELECT 1 FROM title_roles tr JOIN people p ON p.person_id = tr.person_id "
+                     "WHERE tr.title_id = t.title_id AND LOWER(p.name) = LOWER(%s)")
+        self.params.append(name)
+        if role is not None:
+            condition += " AND tr.role::text = ANY(%s)"
+            self.params.append(list(ROLES[role]))
+        self.conditions.append(condition + ")")
+        return self
+
+    def type(self, name: str) -> "TitleQuery":
+        self.conditions.append("t.type_id IN (SELECT type_id FROM types WHERE LOWER(name) = LOWER(%s))")
+        self.params.append(name)
+        return self
+
+    def years(self, start: int | None = None, end: int | None = None) -> "TitleQuery":
+        return self._range("t.year", start, end)
+
+    def imdb_rating(self, minimum: float | None = None, maximum: float | None = None) -> "TitleQuery":
+        return self._range("t.imdb_rating", minimum, maximum)
+
+    def my_rating(self, minimum: int | str) -> "TitleQuery":
+        return self._range("t.my_rating", minimum, None)
+
+    def title(self, substring: str) -> "TitleQuery":
+        self.conditions.append("t.title ILIKE %s")
+        self.params.append(f"%{substring}%")
+        return self
+
+    def order_by(self, key: str, descending: bool = False) -> "TitleQuery":
+        if key not in SORT_KEYS:
+            raise ValueError(f"Unknown sort key '{key}'. Expected one of: {', '.join(SORT_KEYS)}")
+        self.sort.append(f"{SORT_KEYS[key]} {'DESC NULLS LAST' if descending else 'ASC'}")
+        return self
+
+    def limit(self, limit: int, offset: int = 0) -> "TitleQuery":
+        if limit < 0 or offset < 0:
+            raise ValueError("Limit and offset must not be negative.")
+        self.limit_value = limit
+        self.offset_value = offset
+        return self
+
+    def facets(self, *names: str) -> "TitleQuery":
+        unknown = set(names) - set(FACETS)
+        if unknown:
+            raise ValueError(f"Unknown facets: {', '.join(sorted(unknown))}. Expected: {', '.join(FACETS)}")
+        self.facet_names = list(names)
+        return self
+
+    def compile(self) -> tuple[str, list]:
+        """ SQL statement and its parameters. The single result row has 'total', 'titles' and 'facets'. """
+        where = " AND ".join(self.conditions) or "TRUE"
+        # Title id keeps the order stable between pages
+        order = ", ".join(self.sort + ["m.title_id"])
+        facets = ", ".join(
+            f"""'{name}', (SELECT COALESCE(json_object_agg(value, n ORDER BY n DESC, value), '{{}}')
+                FROM (SELECT {value} AS value, COUNT(*) AS n FROM matched m {joins} GROUP BY 1) f)"""
+            for name, (value, joins) in ((name, FACETS[name]) for name in self.facet_names)
+        )
+        sql = f"""WITH matched AS (
+                SELECT t.title_id, t.title, t.year, t.imdbid, t.imdb_rating, t.my_rating, t.type_id
+                FROM titles t WHERE {where}
+            ), page AS (
+                SELECT m.*, ROW_NUMBER() OVER (ORDER BY {order}) AS n
+                FROM matched m ORDER BY {order} LIMIT %s OFFSET %s
+            )
+            SELECT
+                (SELECT COUNT(*) FROM matched) AS total,
+                (SELECT COALESCE(json_agg(json_build_object(
+                    'Title', p.title, 'Year', p.year, 'imdbID', p.imdbid,
+                    'imdbRating', p.imdb_rating, 'MyRating', p.my_rating) ORDER BY p.n), '[]')
+                 FROM page p) AS titles,
+                json_build_object({facets}) AS facets;"""
+        return sql, [*self.params, self.limit_value, self.offset_value]
+
+    def _link(self, link_table: str, id_column: str, table: str, names: Iterable[str]) -> "TitleQuery":
+        # Title has any of the names in a many-to-many table (genres, countries)
+        names = [name.lower() for name in names]
+        if not names:
+            raise ValueError("At least one name is expected.")
+        self.conditions.append(f"EXISTS (SELECT 1 FROM {link_table} l WHERE l.title_id = t.title_id AND l.{id_column} "
+                               f"IN (SELECT {id_column} FROM {table} WHERE LOWER(name) = ANY(%s)))")
+        self.params.append(names)
+        return self
+
+    def _range(self, column: str, minimum, maximum) -> "TitleQuery":
+        if minimum is not None:
+            self.conditions.append(f"{column} >= %s")
+            self.params.append(minimum)
+        if maximum is not None:
+            self.conditions.append(f"{column} <= %s")
+            self.params.append(maximum)
+        return self
@@ -0,0 +1,38 @@
+import json
+from pathlib import Path
+
+import pytest
+
+
+class FakeResponse:
+    def __init__(self, data: dict, status_code: int = 200):
+        self.data = data
+        self.status_code = status_code
+
+    def json(self):
+        return self.data
+
+
+class FakeTransport:
+    """ Fake HTTP transport. Answers from a dict {query param value: response data} and counts calls. """
+    def __init__(self, answers: dict):
+        self.answers = answers
+        self.calls = 0
+
+    def get(self, url, params=None, timeout=None):
+        self.calls += 1
+        value = params.get('i') or params.get('t') or params.get('s')
+        return FakeResponse(self.answers.get(value, {"Response": "False", "Error": "Movie not found!"}))
+
+
+# FIXTURES
+@pytest.fixture
+def movie():
+    path = Path(__file__).parent / "test_unit" / "test_movie.json"
+    with path.open('r', encoding="utf-8") as f:
+        return json.load(f)
+
+@pytest.fixture
+def fake_transport():
+    # FakeTransport class: fake_transport({query param value: response data})
+    return FakeTransport
@@ -0,0 +1,115 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # Default backlog (5) drops connections of concurrent clients, which then wait a second for TCP retransmit
+    request_queue_size = 64
+
+
+class OMDbStubServer:
+    """
+    Local stand-in for the OMDb API, served over HTTP from a background thread.
+
+    Answers 'i', 't' and 's' (with 'page') queries from a list of title dicts in OMDb format.
+    Counts requests and the highest number of requests in flight. 'delay' slows every answer down,
+    'fail_with' holds HTTP status codes (or (status, headers) tuples) returned to the next requests instead of data.
+    """
+    PAGE_SIZE = 10
+
+    def __init__(self, titles: list[dict], api_key: str = "test", delay: float = 0.0):
+        self.titles = titles
+        self.api_key = api_key
+        self.delay = delay
+        self.fail_with: list = []
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        self._server = _Server(("127.0.0.1", 0), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def answer(self, query: dict) -> dict:
+        """ OMDb answer for query parameters. """
+        if query.get("apikey") != self.api_key:
+            return {"Response": "False", "Error": "Invalid API key!"}
+
+        if "i" in query:
+            found = [t for t in self.titles if t["imdbID"] == query["i"]]
+            if not query["i"].startswith("tt"):
+                return {"Response": "False", "Error": "Incorrect IMDb ID."}
+        elif "t" in query:
+            found = [t for t in self.titles if t["Title"].lower() == query["t"].strip().lower()]
+        elif "s" in query:
+            matches = [t for t in self.titles if query["s"].strip().lower() in t["Title"].lower()]
+            page = int(query.get("page", 1))
+            found = matches[(page - 1) * self.PAGE_SIZE: page * self.PAGE_SIZE]
+            if found:
+                short = [{k: t[k] for k in ("Title", "Year", "imdbID", "Type", "Poster")} for t in found]
+                return {"Search": short, "totalResults": str(len(matches)), "Response": "True"}
+        else:
+            return {"Response": "False", "Error": "Incorrect IMDb ID."}
+
+        if not found:
+            return {"Response": "False", "Error": "Movie not found!"}
+        return {**found[0], "Response": "True"}
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with stub._lock:
+                    stub.requests += 1
+                    stub.in_flight += 1
+                    stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+                    failure = stub.fail_with.pop(0) if stub.fail_with else None
+                try:
+                    if stub.delay:
+                        time.sleep(stub.delay)
+                    if failure is not None:
+                        status, headers = failure if isinstance(failure, tuple) else (failure, {})
+                        self.send_response(status)
+                        for name, value in headers.items():
+                            self.send_header(name, value)
+                        self.send_header("Content-Length", "0")
+                        self.end_headers()
+                        return
+
+                    query = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+                    body = json.dumps(stub.answer(query)).encode("utf-8")
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/json; charset=utf-8")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                finally:
+                    with stub._lock:
+                        stub.in_flight -= 1
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+def make_titles(count: int, base: dict) -> list[dict]:
+    """ 'count' synthetic titles built from one OMDb title dict. """
+    return [{**base, "Title": f"{base['Title']} {i}", "imdbID": f"tt{9000000 + i:07d}"} for i in range(count)]
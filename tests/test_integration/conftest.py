@@ -0,0 +1,15 @@
+import pytest
+
+from src.dbmanager import DbManager
+
+
+# FIXTURES
+@pytest.fixture(scope='module')
+def dbm():
+    # Connecting to Test Db
+    dbm = DbManager(database="moviedb_test", host="db_test", port="5432", user="admin", password="admin")
+    # Cleaning all tables
+    dbm.cur.execute("TRUNCATE TABLE titles, people, genres, countries RESTART IDENTITY CASCADE")
+    dbm.conn.commit()
+    yield dbm
+    dbm.close()
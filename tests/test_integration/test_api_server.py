@@ -0,0 +1,113 @@
+import asyncio
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import requests
+
+from src.api_server import ApiServer
+from src.dbmanager import DbManager
+from src.media_title import MediaTitle
+from tests.omdb_stub import make_titles
+
+
+@pytest.fixture(scope='module')
+def base_url():
+    # Test Db with 25 titles, API server running in a background event loop
+    dbm = DbManager(database="moviedb_test", host="db_test", port="5432", user="admin", password="admin",
+                    max_connections=4)
+    with dbm._transaction() as cur:
+        cur.execute("TRUNCATE TABLE titles, people, genres, countries RESTART IDENTITY CASCADE")
+    with open("tests/test_unit/test_movie.json", "r") as file:
+        titles = [MediaTitle.from_dict(t) for t in make_titles(25, {**json.load(file), "Title": "Api Title"})]
+    for i, media in enumerate(titles):
+        media.my_rating = i % 11
+    dbm.add_titles(titles)
+
+    loop = asyncio.new_event_loop()
+    server = ApiServer(dbm, port=0)
+    loop.run_until_complete(server.start())
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.port}"
+
+    asyncio.run_coroutine_threadsafe(server.close(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    dbm.close()
+
+def test_title_lookup_and_etag(base_url):
+    response = requests.get(f"{base_url}/titles/tt9000003")
+    assert response.status_code == 200
+    assert response.json()["Title"] == "Api Title 3"
+    assert response.json()["Director"] == "Christopher Nolan"
+
+    # Unchanged title - 304 without body
+    etag = response.headers["ETag"]
+    response = requests.get(f"{base_url}/titles/tt9000003", headers={"If-None-Match": etag})
+    assert response.status_code == 304 and response.content == b""
+
+    assert requests.get(f"{base_url}/titles/tt0000001").status_code == 404
+    assert requests.get(f"{base_url}/titles/abc").status_code == 400
+    assert requests.get(f"{base_url}/nothing").status_code == 404
+    assert requests.get(f"{base_url}/health").json() == {"status": "ok"}
+
+def test_titles_pages(base_url):
+    # Pages follow 'next' links to the end and 'prev' back
+    with requests.Session() as session:
+        pages, url = [], "/titles?q=api&limit=10"
+        while url:
+            page = session.get(base_url + url).json()
+            pages.append(page)
+            url = page["next"]
+        assert [len(p["titles"]) for p in pages] == [10, 10, 5]
+        assert pages[0]["prev"] is None
+        assert set(pages[0]["titles"][0]) == {"Title", "Year", "imdbID", "imdbRating", "MyRating"}
+
+        back = session.get(base_url + pages[2]["prev"]).json()
+        assert back["titles"] == pages[1]["titles"]
+        assert back["next"] == pages[1]["next"]
+
+    rated = requests.get(f"{base_url}/titles?min_rating=9&limit=100").json()["titles"]
+    assert all(t["MyRating"] >= 9 for t in rated) and len(rated) == 4
+    assert requests.get(f"{base_url}/titles?limit=1000").status_code == 400
+
+def test_export_stream(base_url):
+    response = requests.get(f"{base_url}/export?min_rating=5", stream=True)
+    assert response.headers["Transfer-Encoding"] == "chunked"
+    lines = [json.loads(line) for line in response.iter_lines() if line]
+    assert len(lines) == 12
+    assert all(line["my_rating"] >= 5 for line in lines)
+    assert lines[0]["director"] == ["Christopher Nolan"]
+
+def test_concurrent_readers(base_url):
+    # Many clients at once share the small connection pool
+    def read(i):
+        with requests.Session() as session:
+            return [session.get(f"{base_url}/titles/tt{9000000 + (i + j) % 25:07d}").status_code for j in range(5)]
+
+    with ThreadPoolExecutor(max_workers=50) as executor:
+        statuses = [status for result in executor.map(read, range(100)) for status in result]
+    assert statuses == [200] * 500
+
+def test_broken_export_is_logged(base_url, monkeypatch, caplog):
+    # Error after the stream has started closes the connection and is logged, not swallowed
+    def broken(title):
+        raise RuntimeError("broken record")
+    monkeypatch.setattr("src.api_server.title_to_dict", broken)
+    with pytest.raises(requests.exceptions.RequestException):
+        response = requests.get(f"{base_url}/export", stream=True)
+        list(response.iter_lines())
+    assert any(record.name == "moviedb.api" and "broken record" in str(record.exc_info[1])
+               for record in caplog.records)
+
+def test_internal_error_is_generic(base_url, monkeypatch, caplog):
+    # Exception text goes to the server log only
+    def broken(self, *args, **kwargs):
+        raise RuntimeError("connection to server at 10.0.0.5 failed")
+    monkeypatch.setattr("src.api_server.ApiServer._route", broken)
+    response = requests.get(f"{base_url}/titles/tt9000003")
+    assert response.status_code == 500
+    assert response.json() == {"error": "Internal error"}
+    assert any(record.name == "moviedb.api" and "10.0.0.5" in str(record.exc_info[1]) for record in caplog.records)
@@ -0,0 +1,78 @@
+import io
+import json
+
+import pytest
+
+from src.bulk_import import BulkImporter, Record, read_records
+from src.exporter import Exporter, title_to_dict
+from src.media_title import MediaTitle
+from src.omdb_client import OMDbClient
+from tests.omdb_stub import OMDbStubServer, make_titles
+
+
+@pytest.fixture(scope='module')
+def titles():
+    with open("tests/test_unit/test_movie.json", "r") as file:
+        return make_titles(5, {**json.load(file), "Title": "Imported Title"})
+
+@pytest.fixture
+def stub(titles):
+    with OMDbStubServer(titles) as server:
+        yield server
+
+
+def test_bulk_import_with_resume(dbm, stub, titles, tmp_path):
+    client = OMDbClient(api_key="test", base_url=stub.url)
+    checkpoint = str(tmp_path / "import.ckpt")
+
+    # imdbIDs, a title and a missing imdbID
+    source = tmp_path / "ids.txt"
+    source.write_text("# my list\n" + "\n".join([t["imdbID"] for t in titles[:3]] + [titles[3]["Title"], "tt0000001"]))
+
+    importer = BulkImporter(dbm, client, my_rating=7, batch_size=2, checkpoint=checkpoint, out=io.StringIO())
+    stats = importer.run(read_records([str(source)]))
+    assert (stats["added"], stats["skipped"], stats["failed"]) == (4, 0, 1)
+    assert dbm.get_title_by_imdbid(titles[3]["imdbID"])["MyRating"] == 7
+
+    # Resumed run skips imported records without asking OMDb, the failed one is retried
+    requests_before = stub.requests
+    importer = BulkImporter(dbm, client, checkpoint=checkpoint, out=io.StringIO())
+    stats = importer.run(read_records([str(source)]))
+    assert (stats["added"], stats["skipped"], stats["failed"]) == (0, 4, 1)
+    assert stub.requests == requests_before + 1
+
+    # Existing titles are skipped without checkpoint too
+    importer = BulkImporter(dbm, client, out=io.StringIO())
+    stats = importer.run([Record(imdbid=titles[0]["imdbID"])])
+    assert stats["skipped"] == 1
+    assert stub.requests == requests_before + 1
+
+def test_bulk_import_exported_file(dbm, stub, titles, tmp_path):
+    # File written by Exporter is imported without OMDb
+    media = MediaTitle.from_dict(titles[4])
+    media.my_rating = 9
+    path = str(tmp_path / "title.yaml")
+    Exporter(media, path).to_yaml()
+
+    importer = BulkImporter(dbm, OMDbClient(api_key="test", base_url=stub.url), out=io.StringIO())
+    stats = importer.run(read_records([path]))
+    assert stats["added"] == 1
+    assert stub.requests == 0
+    assert dbm.get_title_by_imdbid(titles[4]["imdbID"])["MyRating"] == 9
+
+def test_bulk_import_skips_malformed_records(dbm, stub, titles, tmp_path):
+    # Broken line of a JSON Lines export is counted as failed, the rest is imported and checkpointed
+    good = [{**title_to_dict(MediaTitle.from_dict(t)), "my_rating": 5} for t in titles[:2]]
+    path = tmp_path / "titles.jsonl"
+    path.write_text("\n".join(json.dumps(line) for line in [good[0], {"imdbid": "tt0000404", "year": None}, good[1]]),
+                    encoding="utf-8")
+    dbm.cur.execute("TRUNCATE TABLE titles, people, genres, countries RESTART IDENTITY CASCADE")
+    dbm.conn.commit()
+
+    checkpoint = str(tmp_path / "import.ckpt")
+    importer = BulkImporter(dbm, OMDbClient(api_key="test", base_url=stub.url), checkpoint=checkpoint,
+                            out=io.StringIO())
+    stats = importer.run(read_records([str(path)]))
+    assert (stats["added"], stats["failed"]) == (2, 1)
+    assert importer.errors[0].startswith("tt0000404: ")
+    assert importer.done == {titles[0]["imdbID"], titles[1]["imdbID"]}
@@ -1,19 +1,10 @@
-import pytest, json
+import pytest, json, time
 
 from src.dbmanager import DbManager
 from src.media_title import MediaTitle
+from src.title_query import TitleQuery
 
 
-@pytest.fixture(scope='module')
-def dbm():
-    # Connecting to Test Db
-    dbm = DbManager(database="moviedb_test", host="db_test", port="5432", user="admin", password="admin")
-    # Cleaning all tables
-    dbm.cur.execute("TRUNCATE TABLE titles, people, genres, countries RESTART IDENTITY CASCADE")
-    yield dbm
-    # Closing connection
-    dbm.conn.close()
-
 def test_db_connection(dbm):
     assert dbm.conn.closed == 0
     dbm.cur.execute("SELECT 1 AS value;")
@@ -36,3 +27,250 @@ def test_add_title(dbm, get_media_title):
     query = dbm.cur.fetchall()
     for el in query:
         assert el['name'].lower() in[x.lower() for x in ['Leonardo DiCaprio', 'Joseph Gordon-Levitt', 'Elliot Page']]
+
+def test_bulk_fetch_same_shape(dbm, get_media_title):
+    # Single-title read and bulk reads return the same aggregated record
+    single = dbm.get_title_by_imdbid('tt1375666')
+    assert single['Genre'] == 'Action, Adventure, Sci-Fi'
+    assert single['Director'] == 'Christopher Nolan'
+
+    assert dbm.get_all_titles() == [single]
+    assert dbm.search_titles_by_name('incep') == [single]
+    assert dbm.get_titles_by_rating('10') == [single]
+    assert dbm.get_titles_by_rating('11') == []
+    assert dbm.get_titles_by_imdbids(['tt1375666', 'tt0000001']) == [single]
+    assert dbm.get_title_by_name('INCEPTION') == single
+
+def test_summary_projection(dbm, get_media_title):
+    # Summary mode returns only listing columns, the rest stays in the full record
+    single = dbm.get_title_by_imdbid('tt1375666')
+    summary = {key: single[key] for key in ('Title', 'Year', 'imdbID', 'imdbRating', 'MyRating')}
+
+    assert dbm.get_all_titles(summary=True) == [summary]
+    assert dbm.search_titles_by_name('incep', summary=True) == [summary]
+    assert dbm.get_titles_by_rating('10', summary=True) == [summary]
+    assert dbm.get_titles_by_rating('11', summary=True) == []
+
+def test_title_cache_skips_records_read_before_write(dbm):
+    # Record fetched while a write goes through is not cached - it may be older than the write
+    cached = DbManager(database="moviedb_test", host="db_test", port="5432", user="admin", password="admin",
+                       cache_size=8, cache_ttl=0.5)
+    query = cached.query_get_title_by_imdbid
+    def racing_query(imdbid):
+        title = query(imdbid)
+        cached._invalidate(imdbid)  # e.g. another thread's write-through
+        return title
+    try:
+        cached.query_get_title_by_imdbid = racing_query
+        cached.get_title_by_imdbid('tt1375666')
+        assert cached.cache_stats['size'] == 0
+
+        # Records expire, so writes of other processes are seen
+        cached.query_get_title_by_imdbid = query
+        cached.get_title_by_imdbid('tt1375666')
+        assert cached.cache_stats['size'] == 1
+        time.sleep(0.6)
+        cached.get_title_by_imdbid('tt1375666')
+        assert cached.cache_stats['hits'] == 0
+    finally:
+        cached.close()
+
+def test_title_cache_write_through(dbm):
+    # Repeated reads are served from cache, rating update is written through to cached record
+    cached = DbManager(database="moviedb_test", host="db_test", port="5432", user="admin", password="admin",
+                       cache_size=8)
+    try:
+        first = cached.get_title_by_imdbid('tt1375666')
+        assert cached.get_title_by_imdbid('tt1375666') == first
+        assert cached.cache_stats['hits'] == 1 and cached.cache_stats['size'] == 1
+
+        assert cached.update_rating('tt1375666', '7')
+        assert cached.get_title_by_imdbid('tt1375666')['MyRating'] == 7
+        assert cached.cache_stats['hits'] == 2
+        assert cached.query_get_title_by_imdbid('tt1375666') == cached.get_title_by_imdbid('tt1375666')
+        cached.update_rating('tt1375666', '10')
+    finally:
+        cached.close()
+    # Cache is opt-in
+    assert dbm.title_cache is None and dbm.cache_stats == {}
+
+def test_add_titles_bulk(dbm, get_media_title):
+    # Existing title is reported as duplicate, new ones are added in one batch
+    with open ("tests/test_unit/test_movie.json", "r") as file:
+        data = json.load(file)
+    sequel = MediaTitle.from_dict({**data, "Title": "Inception 2", "imdbID": "tt1375667", "Actors": "Elliot Page, Tom Hardy"})
+    prequel = MediaTitle.from_dict({**data, "Title": "Inception 0", "imdbID": "tt1375668", "Country": "France"})
+
+    result = dbm.add_titles([get_media_title, sequel, prequel], batch_size=2)
+    assert result == {'tt1375666': False, 'tt1375667': True, 'tt1375668': True}
+
+    assert dbm.get_title_by_imdbid('tt1375667')['Actors'] == 'Elliot Page, Tom Hardy'
+    assert dbm.get_title_by_imdbid('tt1375668')['Country'] == 'France'
+
+    # People are shared between titles, not duplicated
+    dbm.cur.execute("SELECT COUNT(*) AS n FROM people WHERE name = %s;", ('Elliot Page',))
+    assert dbm.cur.fetchone()['n'] == 1
+
+def test_title_documents_refreshed(dbm):
+    # Read model is written together with titles and follows rating updates
+    dbm.cur.execute("SELECT genres, actors, writers, type FROM title_documents WHERE imdbid = %s;", ('tt1375667',))
+    document = dbm.cur.fetchone()
+    assert document['genres'] == ['Action', 'Adventure', 'Sci-Fi']
+    assert document['actors'] == ['Elliot Page', 'Tom Hardy']
+    assert document['type'] == 'movie'
+
+    assert dbm.update_rating('tt1375667', '3')
+    dbm.cur.execute("SELECT my_rating FROM title_documents WHERE imdbid = %s;", ('tt1375667',))
+    assert dbm.cur.fetchone()['my_rating'] == 3
+    assert dbm.query_get_title_by_imdbid('tt1375667')['MyRating'] == 3
+    assert not dbm.update_rating('tt0000001', '3')
+
+def test_pooled_mode_threads(dbm):
+    # Pooled DbManager shared by more threads than it has connections
+    from concurrent.futures import ThreadPoolExecutor
+
+    pooled = DbManager(database="moviedb_test", host="db_test", port="5432", user="admin", password="admin",
+                       min_connections=1, max_connections=2)
+    try:
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(lambda _: pooled.get_title_by_imdbid('tt1375666'), range(32)))
+        assert all(result['Title'] == 'Inception' for result in results)
+        assert pooled.ping()
+    finally:
+        pooled.close()
+
+def test_reconnect_after_connection_loss(dbm):
+    # Broken connection is replaced on the next call
+    single = DbManager(database="moviedb_test", host="db_test", port="5432", user="admin", password="admin",
+                       health_check_interval=0)
+    try:
+        single.conn.close()
+        assert single.get_title_by_imdbid('tt1375666')['Title'] == 'Inception'
+    finally:
+        single.close()
+
+def test_iter_titles_server_side(dbm):
+    # Streamed titles are the same as fetched ones, other calls work while the stream is open
+    streamed = []
+    for title in dbm.iter_titles(itersize=1):
+        streamed.append(title)
+        assert dbm.get_title_by_imdbid(title['imdbID']) == title
+    assert streamed == dbm.get_all_titles()
+    assert len(streamed) == 3
+
+    assert [t['imdbID'] for t in dbm.iter_titles(substring='inception 2')] == ['tt1375667']
+
+    # Writes made while a stream is open are committed at once, a failed one doesn't break the next ones
+    import psycopg2
+    rating = dbm.get_title_by_imdbid('tt1375666')['MyRating']
+    stream = dbm.iter_titles()
+    next(stream)
+    assert dbm.update_rating('tt1375666', '4')
+    with pytest.raises(psycopg2.Error):
+        with dbm._transaction() as cur:
+            cur.execute("SELECT 1 / 0;")
+    other = psycopg2.connect(database="moviedb_test", host="db_test", port="5432", user="admin", password="admin")
+    try:
+        with other.cursor() as cur:
+            cur.execute("SELECT my_rating FROM titles WHERE imdbid = 'tt1375666';")
+            assert cur.fetchone()[0] == 4
+    finally:
+        other.close()
+    assert len(list(stream)) == 2
+    dbm.update_rating('tt1375666', str(rating))
+
+    # Closed stream releases connection
+    stream = dbm.iter_titles()
+    next(stream)
+    stream.close()
+    assert dbm.ping()
+
+def test_title_page_keyset(dbm):
+    # Pages follow title order in both directions
+    first = dbm.get_title_page(limit=2)
+    assert [t['Title'] for t in first] == ['Inception', 'Inception 0']
+    assert set(first[0]) == {'Title', 'Year', 'imdbID', 'imdbRating', 'MyRating'}
+
+    second = dbm.get_title_page(after=first[-1]['Title'], limit=2)
+    assert [t['Title'] for t in second] == ['Inception 2']
+    assert dbm.get_title_page(before=second[0]['Title'], limit=2) == first
+
+    assert [t['Title'] for t in dbm.get_title_page(substring=' 2', limit=5)] == ['Inception 2']
+
+def test_find_titles_facets(dbm):
+    # Filtered page, total and facet counts come from one statement
+    result = dbm.find_titles(TitleQuery().person('elliot page', 'actor').order_by('title', descending=True).limit(1))
+    assert result['total'] == 3
+    assert [t['Title'] for t in result['titles']] == ['Inception 2']
+    assert result['facets']['genre'] == {'Action': 3, 'Adventure': 3, 'Sci-Fi': 3}
+    assert result['facets']['decade'] == {'2010s': 3}
+
+    result = dbm.find_titles(TitleQuery().country('FRANCE').years(2000, 2020).facets('country'))
+    assert [t['imdbID'] for t in result['titles']] == ['tt1375668']
+    assert result['facets'] == {'country': {'France': 1}}
+    assert dbm.find_titles(TitleQuery().person('Tom Hardy', 'director'))['total'] == 0
+
+def test_search_full_text(dbm):
+    # Prefix words in plot, people and awards; ranked page with highlighted snippets
+    result = dbm.search_full_text('dream shar', limit=2)
+    assert result['total'] == 3
+    assert [t['Title'] for t in result['titles']] == ['Inception', 'Inception 0']
+    assert '<<dream>>' in result['titles'][0]['Snippet']
+    assert set(result['titles'][0]) == {'Title', 'Year', 'imdbID', 'imdbRating', 'MyRating', 'Rank', 'Snippet'}
+
+    assert dbm.search_full_text('dream shar', limit=2, offset=2)['titles'][0]['Title'] == 'Inception 2'
+    assert dbm.search_full_text('dream', offset=10) == {'total': 3, 'titles': []}
+    assert '<<Gordon>>' in dbm.search_full_text('gordon-lev')['titles'][0]['Snippet']
+    assert dbm.search_full_text('oscars')['total'] == 3
+    assert dbm.search_full_text('dream heist') == {'total': 0, 'titles': []}
+    with pytest.raises(ValueError):
+        dbm.search_full_text(' -- ')
+
+def test_metrics_round_trips(dbm):
+    # Enabled metrics record public calls with their round trips and every statement
+    from src import metrics
+    cached = DbManager(database="moviedb_test", host="db_test", port="5432", user="admin", password="admin",
+                       cache_size=8)
+    metrics.registry.reset()
+    metrics.enable()
+    try:
+        cached.get_title_by_imdbid('tt1375668')
+        cached.get_title_by_imdbid('tt1375668')  # cached - no round trip
+    finally:
+        metrics.disable()
+        cached.close()
+    snapshot = {item['event']: item for item in metrics.registry.snapshot()}
+    metrics.registry.reset()
+
+    assert snapshot['db_call']['labels'] == {'method': 'get_title_by_imdbid'}
+    assert snapshot['db_call']['count'] == 2 and snapshot['db_call']['round_trips'] == 1
+    assert snapshot['db_query']['labels'] == {'statement': 'select title_documents'}
+    assert snapshot['db_query']['rows'] == 1
+
+def test_add_titles_concurrent_names(dbm, get_media_title):
+    # Genre committed by another transaction while the batch waits on it is still resolved to its id
+    import threading
+    import psycopg2
+
+    other = psycopg2.connect(database="moviedb_test", host="db_test", port="5432", user="admin", password="admin")
+    try:
+        with other.cursor() as cur:
+            cur.execute("INSERT INTO genres (name) VALUES ('Race Genre');")
+        media = MediaTitle.from_export({**get_media_title.to_dict(), "imdbid": "tt1375699", "title": "Race Title",
+                                        "genre": ["Race Genre"]})
+        result = {}
+        writer = threading.Thread(target=lambda: result.update(dbm.add_titles([media])))
+        writer.start()
+        writer.join(0.5)  # Blocked by the uncommitted genre
+        other.commit()
+        writer.join()
+        assert result == {"tt1375699": True}
+        assert dbm.get_title_by_imdbid("tt1375699")["Genre"] == "Race Genre"
+    finally:
+        with other.cursor() as cur:
+            for table in ("title_roles", "title_genres", "title_countries", "titles"):
+                cur.execute(f"DELETE FROM {table} WHERE title_id IN "
+                            f"(SELECT title_id FROM titles WHERE imdbid = 'tt1375699');")
+            cur.execute("DELETE FROM genres WHERE name = 'Race Genre';")
+        other.commit()
+        other.close()
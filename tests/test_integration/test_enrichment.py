@@ -0,0 +1,140 @@
+import io
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+from src.enrichment import EnrichmentPipeline
+from src.media_title import MediaTitle
+from src.omdb_client import OMDbClient
+from src.omdb_mirror import OMDbMirror
+from tests.omdb_stub import OMDbStubServer, make_titles
+
+
+@pytest.fixture(scope='module')
+def titles():
+    with open("tests/test_unit/test_movie.json", "r") as file:
+        return make_titles(12, {**json.load(file), "Title": "Enriched Title"})
+
+@pytest.fixture
+def library(dbm, titles):
+    # Library is stale: old ratings for even titles, no posters for the first four
+    dbm.cur.execute("TRUNCATE TABLE titles, people, genres, countries RESTART IDENTITY CASCADE")
+    dbm.conn.commit()
+    stale = [{**t, "imdbRating": "1.0" if i % 2 == 0 else t["imdbRating"], "Poster": "N/A" if i < 4 else t["Poster"]}
+             for i, t in enumerate(titles)]
+    dbm.add_titles([MediaTitle.from_dict(t) for t in stale])
+    return stale
+
+
+def test_enrichment_updates_changed_fields(dbm, titles, library):
+    # OMDb knows all titles but the last one, and has no awards for them ('N/A' never overwrites)
+    answers = [{**t, "Awards": "N/A"} for t in titles[:-1]]
+    with OMDbStubServer(answers, delay=0.05) as stub:
+        client = OMDbClient(api_key="test", base_url=stub.url)
+        dbm.get_title_by_imdbid(titles[0]["imdbID"])  # cached record must not go stale
+        pipeline = EnrichmentPipeline(dbm, client, workers=6, batch_size=4, out=io.StringIO())
+        stats = pipeline.run()
+
+    assert (stats["checked"], stats["changed"], stats["unchanged"], stats["failed"]) == (12, 8, 3, 1)
+    assert stats["fields"] == {"imdb_rating": 6, "poster": 4}
+    # Requests ran concurrently
+    assert stub.max_in_flight > 1
+
+    title = dbm.get_title_by_imdbid(titles[0]["imdbID"])
+    assert str(title["imdbRating"]) == titles[0]["imdbRating"]
+    assert title["Poster"] == titles[0]["Poster"]
+    assert title["Awards"] == titles[0]["Awards"]
+    assert dbm.get_title_by_imdbid(titles[1]["imdbID"])["Poster"] == titles[1]["Poster"]
+
+def test_enrichment_skips_stored_copies(dbm, titles, library, tmp_path):
+    # Mirror and cache hold the stale records - refresh still asks the API and updates the mirror
+    mirror = OMDbMirror(str(tmp_path / "mirror.sqlite"))
+    mirror.add_many(library)
+    with OMDbStubServer(titles) as stub:
+        client = OMDbClient(api_key="test", base_url=stub.url, mirror=mirror)
+        stats = EnrichmentPipeline(dbm, client, fields=("imdb_rating",), out=io.StringIO()).run()
+        assert stub.requests == 12
+    assert stats["changed"] == 6
+    assert mirror.get_by_imdbid(titles[0]["imdbID"])["imdbRating"] == titles[0]["imdbRating"]
+    mirror.close()
+
+def test_enrichment_only_missing(dbm, titles, library):
+    with OMDbStubServer(titles) as stub:
+        client = OMDbClient(api_key="test", base_url=stub.url)
+        pipeline = EnrichmentPipeline(dbm, client, fields=("poster",), workers=2, rate=100, out=io.StringIO())
+        stats = pipeline.run(only_missing=True)
+        assert stub.requests == 4
+
+    assert (stats["checked"], stats["changed"]) == (4, 4)
+    # Ratings were not asked for
+    assert str(dbm.get_title_by_imdbid(titles[0]["imdbID"])["imdbRating"]) == "1.0"
+    assert dbm.get_enrichable_page(only_missing=True) == []
+
+def test_enrichment_invalid_fields(dbm):
+    with pytest.raises(ValueError):
+        EnrichmentPipeline(dbm, OMDbClient(api_key="test"), fields=("title",))
+    with pytest.raises(ValueError):
+        dbm.update_title_fields({"tt1375666": {"my_rating": 5}})
+
+def test_incremental_refresh(dbm, titles, library):
+    # Titles synced an hour ago, except the first three (never synced)
+    dbm.cur.execute("""INSERT INTO title_sync (title_id, synced_at, attempted_at)
+                       SELECT title_id, synced_at, synced_at FROM (
+                           SELECT title_id, now() - (title_id || ' minutes')::INTERVAL - INTERVAL '1 hour' AS synced_at
+                           FROM titles WHERE imdbid > %s) AS s""", (titles[2]["imdbID"],))
+    dbm.conn.commit()
+    with OMDbStubServer(titles) as stub:
+        client = OMDbClient(api_key="test", base_url=stub.url)
+        # Never synced first, then the longest ago synced: 0, 1, 2, then 11, 10
+        pipeline = EnrichmentPipeline(dbm, client, fields=("imdb_rating",), workers=3, batch_size=2,
+                                      out=io.StringIO())
+        stats = pipeline.run(stale_after=600, quota=5)
+        assert (stats["checked"], stats["changed"], stats["unchanged"]) == (5, 3, 2)
+        dbm.cur.execute("""SELECT t.imdbid FROM title_sync s JOIN titles t USING (title_id)
+                           WHERE s.synced_at > now() - INTERVAL '10 minutes' ORDER BY t.imdbid""")
+        assert [row["imdbid"] for row in dbm.cur.fetchall()] == sorted(titles[i]["imdbID"] for i in (0, 1, 2, 10, 11))
+        dbm.conn.commit()
+
+        # Next run continues with the rest; synced titles are not stale any more
+        stats = EnrichmentPipeline(dbm, client, fields=("imdb_rating",), out=io.StringIO()).run(stale_after=600)
+        assert stats["checked"] == 7
+        assert EnrichmentPipeline(dbm, client, out=io.StringIO()).run(stale_after=600)["checked"] == 0
+
+def test_incremental_refresh_backs_off_failures(dbm, titles, library):
+    # OMDb doesn't know the first title - its failures are saved and it waits instead of taking the quota
+    with OMDbStubServer(titles[1:]) as stub:
+        client = OMDbClient(api_key="test", base_url=stub.url)
+        stats = EnrichmentPipeline(dbm, client, fields=("imdb_rating",), out=io.StringIO()).run(stale_after=600, quota=3)
+        assert (stats["checked"], stats["failed"]) == (3, 1)
+        stats = EnrichmentPipeline(dbm, client, fields=("imdb_rating",), out=io.StringIO()).run(stale_after=600, quota=3)
+        assert (stats["checked"], stats["failed"]) == (3, 0)
+        assert stub.requests == 6
+
+    dbm.cur.execute("""SELECT s.synced_at, s.failures FROM title_sync s JOIN titles t USING (title_id)
+                       WHERE t.imdbid = %s""", (titles[0]["imdbID"],))
+    assert dict(dbm.cur.fetchone()) == {"synced_at": None, "failures": 1}
+    # Backoff passed - retried first; success resets the count
+    dbm.cur.execute("UPDATE title_sync SET attempted_at = now() - INTERVAL '2 hours'")
+    dbm.conn.commit()
+    assert dbm.get_stale_page(datetime.now(timezone.utc), limit=1)[0]["imdbid"] == titles[0]["imdbID"]
+    dbm.update_title_fields({}, synced={titles[0]["imdbID"]: datetime.now(timezone.utc)})
+    dbm.cur.execute("""SELECT s.failures FROM title_sync s JOIN titles t USING (title_id)
+                       WHERE t.imdbid = %s""", (titles[0]["imdbID"],))
+    assert dbm.cur.fetchone()["failures"] == 0
+    dbm.conn.commit()
+
+def test_conditional_update(dbm, titles, library):
+    # Values that are already stored are not written again, sync time is saved anyway
+    imdbid = titles[1]["imdbID"]
+    dbm.cur.execute("SELECT xmin::TEXT AS version FROM titles WHERE imdbid = %s", (imdbid,))
+    version = dbm.cur.fetchone()["version"]
+    dbm.conn.commit()
+
+    assert dbm.update_title_fields({imdbid: {"imdb_rating": titles[1]["imdbRating"]}},
+                                   synced={imdbid: datetime.now(timezone.utc)}) == 0
+    dbm.cur.execute("""SELECT t.xmin::TEXT AS version, s.synced_at FROM titles t
+                       JOIN title_sync s USING (title_id) WHERE t.imdbid = %s""", (imdbid,))
+    row = dbm.cur.fetchone()
+    dbm.conn.commit()
+    assert row["version"] == version and row["synced_at"] is not None
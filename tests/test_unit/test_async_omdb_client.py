@@ -0,0 +1,75 @@
+import asyncio
+import json
+import time
+from pathlib import Path
+
+import pytest
+
+from src.async_omdb_client import AsyncOMDbClient
+from src.omdb_client import OMDbClient, OMDbNotFoundError, OMDbInvalidKeyError
+from src.rate_limiter import TokenBucket
+from tests.omdb_stub import OMDbStubServer, make_titles
+
+
+# FIXTURES
+@pytest.fixture(scope="module")
+def titles():
+    path = Path(__file__).parent / "test_movie.json"
+    with path.open('r', encoding="utf-8") as f:
+        return make_titles(20, json.load(f))
+
+@pytest.fixture
+def stub(titles):
+    with OMDbStubServer(titles, delay=0.05) as server:
+        yield server
+
+
+# TESTS
+def test_gather_bounded_concurrency(stub, titles):
+    """ All lookups succeed in input order, never more than 'concurrency' requests in flight. """
+    client = OMDbClient(api_key="test", base_url=stub.url)
+    imdbids = [t["imdbID"] for t in titles]
+
+    async def run():
+        async with AsyncOMDbClient(client, concurrency=5) as async_client:
+            return await async_client.gather_titles_by_imdbids(imdbids)
+
+    start = time.perf_counter()
+    results = asyncio.run(run())
+    elapsed = time.perf_counter() - start
+
+    assert [r["imdbID"] for r in results] == imdbids
+    assert stub.max_in_flight <= 5
+    # 20 requests * 50ms one after another would take 1s
+    assert elapsed < 0.8
+
+def test_gather_returns_errors_per_title(stub, titles):
+    """ Failed lookups are returned as the usual OMDb exceptions. """
+    client = OMDbClient(api_key="test", base_url=stub.url)
+    results = client.get_titles_by_imdbids([titles[0]["imdbID"], "tt0000001", "bad_id"])
+
+    assert results[0]["Title"] == titles[0]["Title"]
+    assert isinstance(results[1], OMDbNotFoundError)
+    assert isinstance(results[2], ValueError)
+
+    bad_key = OMDbClient(api_key="wrong", base_url=stub.url)
+    assert isinstance(bad_key.get_titles_by_names([titles[0]["Title"]])[0], OMDbInvalidKeyError)
+
+def test_token_bucket_rate():
+    """ Bucket lets a burst through, then spaces out the rest. """
+    bucket = TokenBucket(rate=20, capacity=2)
+    delays = [bucket.reserve() for _ in range(4)]
+
+    assert delays[:2] == [0.0, 0.0]
+    assert delays[2] == pytest.approx(0.05, abs=0.01)
+    assert delays[3] == pytest.approx(0.10, abs=0.01)
+
+def test_rate_limited_batch(stub, titles):
+    """ Batch respects requests-per-second limit. """
+    client = OMDbClient(api_key="test", base_url=stub.url)
+    stub.delay = 0
+
+    start = time.perf_counter()
+    client.get_titles_by_imdbids([t["imdbID"] for t in titles[:6]], rate=20)
+    # 1 token available at start, 5 more at 20 per second
+    assert time.perf_counter() - start >= 0.2
@@ -7,7 +7,7 @@ from unittest.mock import MagicMock, patch
 
 import pytest
 
-from src.cli import CLI
+from src.cli import CLI, ResultPager
 from src.dbmanager import DbMovieNotFoundError
 from src.media_title import MediaTitle
 from src.omdb_client import OMDbNotFoundError
@@ -282,6 +282,8 @@ def test_omdb_not_found_error(cli_mock, fake_list):
 
     cli.client.get_title_by_name.assert_called_once_with("Some Title")
     cli.client.search_title.assert_called_once_with("Some Title")  # type: ignore
+    # Next pages only on demand
+    cli.client.iter_search.assert_called_once_with("Some Title", prefetch=False, first_page=fake_list)
     cli.print_search_results.assert_called_once_with(fake_list)
     assert cli.stage == 5
     assert cli.from_db is False
@@ -291,14 +293,159 @@ def test_db_movie_not_found_error(cli_mock, fake_list):
 
     # Mocks and data
     cli.dbm.get_title_by_name = MagicMock(side_effect=DbMovieNotFoundError)
-    cli.dbm.search_titles_by_name.return_value = fake_list["Search"]
+    cli.dbm.get_title_page.return_value = fake_list["Search"]
     cli.print_search_results = MagicMock()
 
     with patch("builtins.input", return_value="Another Title"):
         cli.db_get_media_by_title()
 
     cli.dbm.get_title_by_name.assert_called_once_with("Another Title")
-    cli.dbm.search_titles_by_name.assert_called_once_with("Another Title")  # type: ignore
+    # Only the first page is read
+    cli.dbm.get_title_page.assert_called_once_with(substring="Another Title", after=None, limit=11)
     cli.print_search_results.assert_called_once()
     assert cli.stage == 5
     assert cli.from_db is True
+
+def test_db_fallback_after_browsing(cli_mock, capsys):
+    """ Results -> title -> main menu -> Db name fallback: no paging left over from the earlier results. """
+    cli = cli_mock
+    library = [{"Title": f"Title {i:02d}", "Year": "2000", "imdbID": f"tt{i:07d}"} for i in range(23)]
+    found = [{"Title": "Heist", "Year": "1995", "imdbID": "tt0000099"}]
+
+    def get_title_page(after=None, before=None, limit=10, substring=None):
+        titles = found if substring else library
+        if before is not None:
+            return [t for t in titles if t["Title"] < before][-limit:]
+        return [t for t in titles if after is None or t["Title"] > after][:limit]
+
+    cli.dbm.get_title_page = MagicMock(side_effect=get_title_page)
+    cli.dbm.get_title_by_imdbid.return_value = {**library[0], "Genre": "Drama"}
+    cli.dbm.get_title_by_name = MagicMock(side_effect=DbMovieNotFoundError)
+    cli.go_back = CLI.go_back.__get__(cli)
+
+    cli.db_show_all_media()  # Stage 5, more pages
+    with patch("src.cli.MediaTitle.from_dict", return_value=MagicMock()):
+        cli.actions[0][0]()  # Stage 6
+    assert cli.stage == 6 and cli.pager is None
+    cli.go_back()  # Stage 1
+    assert cli.stage == 1
+    capsys.readouterr()
+
+    with patch("builtins.input", return_value="heis"):
+        cli.db_get_media_by_title()
+    out = capsys.readouterr().out
+    assert cli.stage == 5
+    assert [description for _, description in cli.actions] == [f"{'Heist':<50} {'1995':<6} tt0000099"]
+    assert "Next page" not in out and "Page 1" in out
+    assert [t["Title"] for t in cli.pager.current] == ["Heist"]
+
+def test_search_results_paging(cli_mock, fake_list):
+    """ Search results are paged, earlier pages are not requested again. """
+    cli = cli_mock
+    cli.from_db = False
+    requested = []
+
+    def results():
+        for i in range(25):
+            requested.append(i)
+            yield {"Title": f"Title {i}", "Year": "2000", "imdbID": f"tt{i:07d}"}
+
+    cli.pager = ResultPager(results(), total=25)
+    cli.print_search_results({"Search": cli.pager.next_page()})
+    # 10 results + next page
+    assert len(cli.actions) == 11
+    assert cli.actions[-1][0] == cli.search_next_page
+    assert len(requested) == 10
+
+    cli.search_next_page()
+    cli.search_next_page()
+    assert len(cli.pager.current) == 5
+    # prev page + 5 results, no next page on the last one
+    assert len(cli.actions) == 6
+    assert cli.actions[-1][0] == cli.search_prev_page
+
+    cli.search_prev_page()
+    assert cli.pager.current[0]["Title"] == "Title 10"
+    assert len(requested) == 25
+
+def test_db_results_keyset_paging(cli_mock):
+    """ Db results are requested page by page, full title is loaded only on selection. """
+    cli = cli_mock
+    library = [{"Title": f"Title {i:02d}", "Year": "2000", "imdbID": f"tt{i:07d}"} for i in range(23)]
+
+    def get_title_page(after=None, before=None, limit=10):
+        if before is not None:
+            return [t for t in library if t["Title"] < before][-limit:]
+        return [t for t in library if after is None or t["Title"] > after][:limit]
+
+    cli.dbm.get_title_page = MagicMock(side_effect=get_title_page)
+    cli.db_show_all_media()
+    assert cli.stage == 5
+    assert len(cli.actions) == 11
+    assert cli.actions[0][0].func == cli.db_get_media_by_imdbid
+    cli.dbm.get_title_by_imdbid.assert_not_called()
+
+    cli.search_next_page()
+    cli.search_next_page()
+    assert [t["Title"] for t in cli.pager.current] == ["Title 20", "Title 21", "Title 22"]
+    assert not cli.pager.has_next
+
+    cli.search_prev_page()
+    assert cli.pager.current[0]["Title"] == "Title 10"
+    assert cli.pager.has_next
+    assert cli.dbm.get_title_page.call_count == 4
+
+def test_db_filter_media_facets(cli_mock, capsys):
+    """ Facet filter is built from input, facets are printed once, next pages are read by offset. """
+    cli = cli_mock
+    library = [{"Title": f"Title {i:02d}", "Year": "1995", "imdbID": f"tt{i:07d}"} for i in range(13)]
+    queries = []
+
+    def find_titles(query):
+        queries.append(query.compile())
+        return {"titles": library[query.offset_value:query.offset_value + query.limit_value], "total": 13,
+                "facets": {"genre": {"Drama": 13, "Crime": 4}} if query.facet_names else {}}
+
+    cli.dbm.find_titles = MagicMock(side_effect=find_titles)
+    # genres, countries, person, role, type, year from, year to, IMDb rating, my rating, sort, 'enter'
+    inputs = ["drama, crime", "", "Christopher Nolan", "director", "", "1990", "1999", "8", "", "year", ""]
+    with patch("builtins.input", side_effect=inputs):
+        cli.db_filter_media()
+
+    assert "Drama (13), Crime (4)" in capsys.readouterr().out
+    assert cli.stage == 5
+    assert len(cli.actions) == 11
+    sql, params = queries[0]
+    assert params == [["drama", "crime"], "Christopher Nolan", ["director"], 1990, 1999, 8.0, 10, 0]
+    assert "m.year DESC" in sql
+
+    cli.search_next_page()
+    assert [t["Title"] for t in cli.pager.current] == ["Title 10", "Title 11", "Title 12"]
+    assert queries[1][1][-2:] == [10, 10]
+    assert "json_object_agg" not in queries[1][0]
+
+def test_db_full_text_search(cli_mock, capsys):
+    """ Ranked results are shown with snippets, next pages are read by offset. """
+    cli = cli_mock
+    library = [{"Title": f"Heist {i:02d}", "Year": "1995", "imdbID": f"tt{i:07d}", "Snippet": f"a <<heist>> {i}"}
+               for i in range(12)]
+    cli.dbm.search_full_text = MagicMock(
+        side_effect=lambda text, limit, offset=0: {"titles": library[offset:offset + limit], "total": 12})
+    with patch("builtins.input", return_value="heis"):
+        cli.db_full_text_search()
+
+    assert "a <<heist>> 3" in capsys.readouterr().out
+    assert cli.stage == 5 and cli.from_db
+    assert len(cli.actions) == 11
+
+    cli.search_next_page()
+    assert [t["Title"] for t in cli.pager.current] == ["Heist 10", "Heist 11"]
+    cli.dbm.search_full_text.assert_called_with("heis", limit=10, offset=10)
+
+def test_db_export_files_bad_record(cli_mock, capsys, tmp_path):
+    """ Record MediaTitle can't be built from is reported, not raised. """
+    cli = cli_mock
+    cli.dbm.iter_titles = MagicMock(return_value=iter([{"Title": "Broken", "imdbID": "tt0000001"}]))
+    with patch("builtins.input", side_effect=["json", str(tmp_path)]):
+        cli.db_export_files()
+    assert "Something went wrong" in capsys.readouterr().out
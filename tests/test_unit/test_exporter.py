@@ -0,0 +1,76 @@
+import csv
+import gzip
+import json
+from pathlib import Path
+
+import pytest
+import yaml
+
+from src.bulk_import import read_records
+from src.exporter import StreamExporter, BatchExporter, Exporter
+from src.media_title import MediaTitle
+
+
+@pytest.fixture(scope='module')
+def titles():
+    path = Path(__file__).parent / "test_movie.json"
+    with path.open('r', encoding="utf-8") as f:
+        movie = json.load(f)
+    # MediaTitle objects and a title dict as returned by DbManager
+    return [MediaTitle.from_dict(movie), {**movie, "Title": "Inception 2", "imdbID": "tt1375667", "MyRating": 8}]
+
+@pytest.mark.parametrize("fmt, compress", [("jsonl", False), ("csv", False), ("yaml", False), ("jsonl", True)])
+def test_stream_export_round_trip(titles, tmp_path, fmt, compress):
+    """ Every format is written title by title and imported back by bulk import. """
+    path = str(tmp_path / f"export.{fmt}{'.gz' if compress else ''}")
+    count = StreamExporter(path, fmt, compress).write(iter(titles))
+    assert count == 2
+
+    records = list(read_records([path]))
+    assert [r.media.imdbid for r in records] == ["tt1375666", "tt1375667"]
+    assert records[1].media.actors == ["Leonardo DiCaprio", "Joseph Gordon-Levitt", "Elliot Page"]
+    assert str(records[1].media.my_rating) == "8"
+
+def test_stream_export_formats(titles, tmp_path):
+    """ Output is a valid JSON Lines / CSV / YAML stream. """
+    StreamExporter(str(tmp_path / "a.jsonl"), "jsonl").write(titles)
+    StreamExporter(str(tmp_path / "a.csv"), "csv").write(titles)
+    StreamExporter(str(tmp_path / "a.yaml.gz"), "yaml", compress=True).write(titles)
+
+    lines = (tmp_path / "a.jsonl").read_text(encoding="utf-8").splitlines()
+    assert json.loads(lines[0])["genre"] == ["Action", "Adventure", "Sci-Fi"]
+
+    with open(tmp_path / "a.csv", newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    assert rows[0]["genre"] == "Action, Adventure, Sci-Fi"
+
+    with gzip.open(tmp_path / "a.yaml.gz", "rt", encoding="utf-8") as f:
+        docs = list(yaml.safe_load_all(f))
+    assert [d["title"] for d in docs] == ["Inception", "Inception 2"]
+
+def test_stream_export_unknown_format(tmp_path):
+    with pytest.raises(ValueError):
+        StreamExporter(str(tmp_path / "a.xml"), "xml")
+
+@pytest.mark.parametrize("fmt", ["json", "yaml"])
+def test_batch_export_files(titles, tmp_path, fmt):
+    """ One file per title, same content as Exporter; name collisions get '_1', '_2', ... """
+    (tmp_path / f"Inception.{fmt}").write_text("kept", encoding="utf-8")
+    batch = [*titles, {**titles[1], "imdbID": "tt1375668"}, {**titles[1], "Title": "A/B: C?", "imdbID": "tt1375669"}]
+    stats = BatchExporter(str(tmp_path), fmt, workers=2, chunk_size=1).write(iter(batch))
+    assert stats["files"] == 4 and stats["per_second"] > 0
+
+    files = sorted(p.name for p in tmp_path.iterdir())
+    assert files == sorted(f"{name}.{fmt}" for name in ["Inception", "Inception_1", "Inception 2", "Inception 2_1",
+                                                        "A_B_ C_"])
+    assert (tmp_path / f"Inception.{fmt}").read_text(encoding="utf-8") == "kept"
+
+    # Same file as the single-title export
+    getattr(Exporter(titles[0], str(tmp_path / f"single.{fmt}")), f"to_{fmt}")()
+    assert (tmp_path / f"Inception_1.{fmt}").read_bytes() == (tmp_path / f"single.{fmt}").read_bytes()
+    # Same permissions as well (not mkstemp's 0600)
+    assert (tmp_path / f"Inception_1.{fmt}").stat().st_mode == (tmp_path / f"single.{fmt}").stat().st_mode
+
+def test_batch_export_unknown_format(tmp_path):
+    with pytest.raises(ValueError):
+        BatchExporter(str(tmp_path), "csv")
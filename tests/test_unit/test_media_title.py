@@ -19,3 +19,15 @@ def test_media_title_init(get_movie):
     assert media.actors == ["Leonardo DiCaprio", "Joseph Gordon-Levitt", "Elliot Page"]
     assert media.genre == ["Action", "Adventure", "Sci-Fi"]
     assert media.director == ["Christopher Nolan"]
+
+def test_media_title_compact(get_movie):
+    first = MediaTitle.from_dict(get_movie)
+    second = MediaTitle.from_dict(json.loads(json.dumps(get_movie)))
+
+    # No per-instance __dict__, repeated names share one string object
+    assert not hasattr(first, "__dict__")
+    assert first.genre[0] is second.genre[0]
+    assert first.director[0] is second.director[0]
+
+    # Round trip through attribute dict
+    assert MediaTitle.from_export(first.to_dict()).to_dict() == first.to_dict()
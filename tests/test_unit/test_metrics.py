@@ -0,0 +1,72 @@
+from pathlib import Path
+
+import pytest
+
+from src import metrics
+from src.exporter import Exporter, StreamExporter
+from src.media_title import MediaTitle
+from src.omdb_client import OMDbClient
+from src.cache import ResponseCache
+
+
+@pytest.fixture
+def enabled():
+    metrics.registry.reset()
+    metrics.enable()
+    yield metrics.registry
+    metrics.disable()
+    metrics.registry.reset()
+
+def test_disabled_records_nothing():
+    """ While disabled hooks are no-ops. """
+    metrics.registry.reset()
+    assert metrics.start() is None
+    metrics.record("db_query", None, statement="select titles", rows=3)
+    assert metrics.registry.snapshot() == []
+
+def test_registry_and_prometheus(enabled):
+    """ Events are aggregated per labels, numeric fields are summed up. """
+    metrics.record("db_query", metrics.start(), statement="select titles", rows=3)
+    metrics.record("db_query", metrics.start(), statement="select titles", rows=2)
+    metrics.record("omdb_cache", endpoint="id", result='h"it')
+
+    query, cache = enabled.snapshot()
+    assert cache == {"event": "omdb_cache", "labels": {"endpoint": "id", "result": 'h"it'},
+                     "count": 1, "seconds": 0.0, "max_seconds": 0.0}
+    assert query["count"] == 2 and query["rows"] == 5
+
+    text = enabled.to_prometheus()
+    assert "# TYPE moviedb_db_query_total counter" in text
+    assert 'moviedb_db_query_rows_total{statement="select titles"} 5' in text
+    assert 'moviedb_omdb_cache_total{endpoint="id",result="h\\"it"} 1' in text
+
+def test_db_call_round_trips(enabled):
+    """ Decorated call counts statements sent inside it, nested calls add up to the outer one. """
+    @metrics.db_call
+    def inner():
+        metrics.db_round_trip()
+
+    @metrics.db_call
+    def outer():
+        metrics.db_round_trip()
+        inner()
+
+    outer()
+    calls = {item["labels"]["method"]: item["round_trips"] for item in enabled.snapshot()}
+    assert calls == {"inner": 1, "outer": 2}
+
+def test_client_and_exporter_hooks(enabled, movie, fake_transport, tmp_path):
+    """ OMDb requests, cache hits/misses and exports are recorded. """
+    client = OMDbClient(api_key="test", cache=ResponseCache(), transport=fake_transport({"tt1375666": movie}))
+    client.get_title_by_imdbid("tt1375666")
+    client.get_title_by_imdbid("tt1375666")
+    media = MediaTitle.from_dict(movie)
+    Exporter(media, str(tmp_path / "m.json")).to_json()
+    StreamExporter(str(tmp_path / "m.jsonl.gz"), "jsonl", compress=True).write([media, media])
+
+    events = {(item["event"], tuple(item["labels"].values())): item for item in enabled.snapshot()}
+    assert events[("omdb_cache", ("id", "hit"))]["count"] == 1
+    assert events[("omdb_cache", ("id", "miss"))]["count"] == 1
+    assert events[("omdb_request", ("id", 200))]["retries"] == 0
+    assert events[("export", ("json",))]["bytes"] == Path(tmp_path / "m.json").stat().st_size
+    assert events[("export", ("jsonl.gz",))]["titles"] == 2
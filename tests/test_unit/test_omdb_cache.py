@@ -0,0 +1,80 @@
+import pytest
+
+from src.cache import LRUCache, ResponseCache
+from src.omdb_client import OMDbClient, OMDbNotFoundError, OMDbInvalidKeyError
+
+
+# FIXTURES
+@pytest.fixture
+def transport(movie, fake_transport):
+    return fake_transport({"tt1375666": movie, "Inception": movie})
+
+
+# TESTS
+def test_lru_cache_eviction_and_ttl():
+    """ Least recently used entry is evicted, expired entry is a miss. """
+    cache = LRUCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)  # evicts "b"
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+    cache.set("d", 4, ttl=-1)  # already expired
+    assert cache.get("d") is None
+    assert cache.peek("c") == 3 and cache.peek("d") is None  # not counted
+    assert cache.stats["hits"] == 3
+    assert cache.stats["misses"] == 2
+
+def test_client_cache_hit(transport):
+    """ Second lookup is served from cache. """
+    client = OMDbClient(api_key="key", cache=ResponseCache(), transport=transport)
+
+    first = client.get_title_by_imdbid("tt1375666")
+    second = client.get_title_by_imdbid("tt1375666")
+
+    assert first == second
+    assert transport.calls == 1
+    assert client.cache.stats["hits"] == 1
+    assert client.cache.stats["misses"] == 1
+
+def test_client_negative_cache(transport):
+    """ 'Movie not found!' is cached and raised again without a request. """
+    client = OMDbClient(api_key="key", cache=ResponseCache(), transport=transport)
+
+    for _ in range(2):
+        with pytest.raises(OMDbNotFoundError):
+            client.get_title_by_name("No Such Movie")
+    assert transport.calls == 1
+
+def test_client_errors_not_cached(fake_transport):
+    """ Errors other than 'not found' always go to the API. """
+    transport = fake_transport({"tt1375666": {"Response": "False", "Error": "Invalid API key!"}})
+    client = OMDbClient(api_key="bad", cache=ResponseCache(), transport=transport)
+
+    for _ in range(2):
+        with pytest.raises(OMDbInvalidKeyError):
+            client.get_title_by_imdbid("tt1375666")
+    assert transport.calls == 2
+
+def test_disk_cache_survives_new_client(transport, tmp_path):
+    """ Responses stored on disk are reused by a new client (new process). """
+    path = str(tmp_path / "omdb_cache.sqlite")
+    OMDbClient(api_key="key", cache=ResponseCache(path=path), transport=transport).get_title_by_name("Inception")
+
+    client = OMDbClient(api_key="key", cache=ResponseCache(path=path), transport=transport)
+    assert client.get_title_by_name("inception ")["imdbID"] == "tt1375666"
+    assert transport.calls == 1
+
+def test_response_cache_counts_from_threads():
+    """ Hits and misses of concurrent lookups are all counted. """
+    from concurrent.futures import ThreadPoolExecutor
+
+    cache = ResponseCache()
+    cache.set("id", "hit", {"Response": "True"})
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(lambda i: cache.get("hit" if i % 2 else "miss"), range(8000)))
+    assert (cache.stats["hits"], cache.stats["misses"]) == (4000, 4000)
@@ -0,0 +1,103 @@
+import asyncio
+import socket
+import time
+
+import pytest
+import requests
+
+from src.async_omdb_client import AsyncOMDbClient
+from src.omdb_client import OMDbClient, OMDbConnectionError
+from tests.omdb_stub import OMDbStubServer, make_titles
+
+
+# FIXTURES
+@pytest.fixture
+def stub(movie):
+    with OMDbStubServer([movie]) as server:
+        yield server
+
+
+# TESTS
+def test_session_reused(stub):
+    """ Default transport is a keep-alive session. """
+    client = OMDbClient(api_key="test", base_url=stub.url)
+    assert isinstance(client.transport, requests.Session)
+
+    client.get_title_by_imdbid("tt1375666")
+    client.get_title_by_name("Inception")
+    assert client.stats['requests'] == 2
+    assert client.stats['failures'] == 0
+
+def test_retry_on_5xx(stub):
+    """ Transient 5xx answers are retried and counted. """
+    client = OMDbClient(api_key="test", base_url=stub.url, backoff=0.01)
+    stub.fail_with = [503, 502]
+
+    assert client.get_title_by_imdbid("tt1375666")["Title"] == "Inception"
+    assert client.history[-1]['retries'] == 2
+    assert client.history[-1]['status'] == 200
+    assert stub.requests == 3
+
+def test_retry_gives_up(stub):
+    """ After all retries the last status becomes OMDbConnectionError. """
+    client = OMDbClient(api_key="test", base_url=stub.url, retries=2, backoff=0.01)
+    stub.fail_with = [500, 500, 500]
+
+    with pytest.raises(OMDbConnectionError):
+        client.get_title_by_imdbid("tt1375666")
+    assert stub.requests == 3
+    assert client.stats['failures'] == 1
+
+def test_retry_after_honored(stub):
+    """ Retry-After is waited for, too long Retry-After stops retrying. """
+    client = OMDbClient(api_key="test", base_url=stub.url, max_backoff=1)
+    stub.fail_with = [(429, {"Retry-After": "0.1"})]
+    client.get_title_by_imdbid("tt1375666")
+    assert client.history[-1]['latency'] >= 0.1
+
+    stub.fail_with = [(429, {"Retry-After": "3600"})]
+    with pytest.raises(OMDbConnectionError):
+        client.get_title_by_imdbid("tt1375666")
+    assert client.history[-1]['retries'] == 0
+
+def test_unreachable_api():
+    """ Connection errors are retried and reported as OMDbConnectionError. """
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    client = OMDbClient(api_key="test", base_url=f"http://127.0.0.1:{port}/", retries=1, backoff=0.01)
+
+    with pytest.raises(OMDbConnectionError):
+        client.get_title_by_imdbid("tt1375666")
+    assert client.stats['retries'] == 1
+
+def test_iter_search_pages(movie):
+    """ Iterator walks all pages lazily and stops at 'limit'. """
+    titles = make_titles(25, movie)
+    with OMDbStubServer(titles) as stub:
+        client = OMDbClient(api_key="test", base_url=stub.url)
+
+        results = client.iter_search("inception")
+        first = next(results)
+        assert first["imdbID"] == titles[0]["imdbID"]
+        # Page 1 and prefetched page 2
+        time.sleep(0.1)
+        assert stub.requests == 2
+
+        assert [r["imdbID"] for r in results] == [t["imdbID"] for t in titles[1:]]
+        assert stub.requests == 3
+
+        assert len(list(client.iter_search("inception", limit=12, prefetch=False))) == 12
+        assert stub.requests == 5
+
+def test_async_iter_search(movie):
+    """ Async iterator yields the same results. """
+    titles = make_titles(15, movie)
+
+    async def run(client):
+        async with AsyncOMDbClient(client) as async_client:
+            return [r["imdbID"] async for r in async_client.iter_search("inception")]
+
+    with OMDbStubServer(titles) as stub:
+        client = OMDbClient(api_key="test", base_url=stub.url)
+        assert asyncio.run(run(client)) == [t["imdbID"] for t in titles]
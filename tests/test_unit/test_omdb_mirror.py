@@ -0,0 +1,97 @@
+import gzip
+import json
+
+import pytest
+
+from src.cache import ResponseCache
+from src.omdb_client import OMDbClient, OMDbNotFoundError
+from src.omdb_mirror import OMDbMirror
+
+
+# FIXTURES
+@pytest.fixture
+def mirror(tmp_path, movie):
+    # Local stand-in for OMDb: Inception plus a few numbered titles
+    mirror = OMDbMirror(str(tmp_path / "mirror.sqlite"))
+    mirror.add_many([movie] + [{**movie, "Title": f"Mirror Title {i}", "imdbID": f"tt90000{i:02d}"} for i in range(15)])
+    yield mirror
+    mirror.close()
+
+
+# TESTS
+def test_mirror_lookups(mirror, movie):
+    """ imdbID, exact title (case-insensitive) and paged substring search. """
+    assert len(mirror) == 16
+    assert mirror.get_by_imdbid("tt1375666") == movie
+    assert mirror.get_by_title("  inception ")["imdbID"] == "tt1375666"
+    assert mirror.get_by_title("Incept") is None
+
+    page = mirror.search("title", page=2)
+    assert page["totalResults"] == "15" and page["Response"] == "True"
+    # Ordered by title text: 0, 1, 10..14, 2, 3, 4 | 5..9
+    assert [t["Title"] for t in page["Search"]] == [f"Mirror Title {i}" for i in range(5, 10)]
+    assert set(page["Search"][0]) == {"Title", "Year", "imdbID", "Type", "Poster"}
+    assert mirror.search("ce")["Search"][0]["imdbID"] == "tt1375666"  # short substring - LIKE scan
+    assert mirror.search("nothing like it") is None
+
+def test_mirror_stores_only_full_records(mirror, movie):
+    assert not mirror.add({"Response": "False", "Error": "Movie not found!"})
+    assert not mirror.add({"Search": [movie], "totalResults": "1", "Response": "True"})
+    # Newer version replaces the old one, also in the search index
+    assert mirror.add({**movie, "Title": "Inception Redux"})
+    assert mirror.search("redux")["Search"][0]["imdbID"] == "tt1375666"
+    assert mirror.search("title 1")["totalResults"] == "6"
+    assert len(mirror) == 16
+
+def test_mirror_seeding(tmp_path, movie):
+    # From an OMDb response cache file (search answers are skipped) ...
+    cache = ResponseCache(path=str(tmp_path / "cache.sqlite"))
+    cache.set("id", "k1", movie)
+    cache.set("search", "k2", {"Search": [movie], "totalResults": "1", "Response": "True"})
+    mirror = OMDbMirror(str(tmp_path / "mirror.sqlite"))
+    assert mirror.seed_from_cache(str(tmp_path / "cache.sqlite")) == 1
+
+    # ... and from gzipped JSON Lines / JSON array dumps
+    with gzip.open(tmp_path / "dump.jsonl.gz", "wt", encoding="utf-8") as f:
+        f.write("\n".join(json.dumps({**movie, "imdbID": f"tt800000{i}"}) for i in range(3)) + "\n")
+    (tmp_path / "dump.json").write_text(json.dumps([{**movie, "imdbID": "tt8000009"}]), encoding="utf-8")
+    assert mirror.seed_from_dump(str(tmp_path / "dump.jsonl.gz")) == 3
+    assert mirror.seed_from_dump(str(tmp_path / "dump.json")) == 1
+    assert len(mirror) == 5
+    mirror.close()
+
+def test_client_answers_from_mirror(mirror, movie, fake_transport):
+    """ Mirrored lookups never reach the network; misses go to the API and land in the mirror. """
+    other = {**movie, "Title": "Other", "imdbID": "tt7000001"}
+    transport = fake_transport({"tt7000001": other})
+    client = OMDbClient(api_key="key", transport=transport, mirror=mirror)
+
+    assert client.get_title_by_name("Inception") == movie
+    assert client.get_title_by_imdbid("tt1375666") == movie
+    assert transport.calls == 0
+
+    assert client.get_title_by_imdbid("tt7000001") == other
+    assert transport.calls == 1
+    assert mirror.get_by_title("other") == other
+
+def test_client_searches_online(mirror, movie, fake_transport):
+    """ Partial mirror doesn't answer searches online - totals and pages come from the API only. """
+    search = {"Search": [{"Title": "Inception", "imdbID": "tt1375666"}] * 10, "totalResults": "30", "Response": "True"}
+    transport = fake_transport({"incep": search})
+    client = OMDbClient(api_key="key", transport=transport, mirror=mirror)
+    assert client.search_title("incep")["totalResults"] == "30"
+    assert transport.calls == 1
+
+    # Complete mirror is trusted for searches
+    client = OMDbClient(api_key="key", transport=transport, mirror=mirror, mirror_complete=True)
+    assert client.search_title("mirror title")["totalResults"] == "15"
+    assert transport.calls == 1
+
+def test_client_offline(mirror, fake_transport):
+    transport = fake_transport({})
+    client = OMDbClient(api_key="key", transport=transport, mirror=mirror, offline=True)
+    assert client.get_title_by_imdbid("tt9000003")["Title"] == "Mirror Title 3"
+    with pytest.raises(OMDbNotFoundError):
+        client.get_title_by_name("Not Mirrored")
+    assert client.search_title("mirror title")["totalResults"] == "15"
+    assert transport.calls == 0
@@ -0,0 +1,28 @@
+import pytest
+
+from src.title_query import TitleQuery
+
+
+def test_title_query_compile():
+    """ Filters become parametrized conditions, values are never put into SQL text. """
+    query = (TitleQuery().genre("Drama").country("France", "Italy").person("Tom Hanks", "writer").type("movie")
+             .years(1990).imdb_rating(7, 9).my_rating(5).title("50%").order_by("imdb_rating", descending=True)
+             .limit(20, 40).facets("genre", "decade"))
+    sql, params = query.compile()
+
+    assert params == [["drama"], ["france", "italy"], "Tom Hanks", ["writer", "creator"], "movie",
+                      1990, 7, 9, 5, "%50%%", 20, 40]
+    assert sql.count("%s") == len(params)
+    assert "ORDER BY m.imdb_rating DESC NULLS LAST, m.title_id" in sql
+    assert "'genre'" in sql and "'decade'" in sql and "'country'" not in sql
+
+def test_title_query_invalid_input():
+    """ Unknown sort keys, roles and facets are rejected before any SQL is built. """
+    with pytest.raises(ValueError):
+        TitleQuery().order_by("plot")
+    with pytest.raises(ValueError):
+        TitleQuery().person("Tom Hanks", "producer")
+    with pytest.raises(ValueError):
+        TitleQuery().facets("awards")
+    with pytest.raises(ValueError):
+        TitleQuery().genre()